@@ -1,3 +1,16 @@
-from . import access
-from . import assess
-from . import address
+# Submodules are imported on first attribute access (PEP 562), so ``import fynesse``
+# does not pull in pandas, geopandas, scikit-learn or the plotting libraries.
+import importlib
+from typing import Any, List
+
+__all__ = ["access", "assess", "address", "benchmark", "config", "profiling"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,66 +1,1404 @@
 # access.py
-import geopandas as gpd
+import contextlib
+import functools
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
 import pandas as pd
 
+from .config import config
+from .profiling import profiled
+
+# Bump when the columnar conversion changes so existing Parquet copies are rebuilt.
+COLUMNAR_FORMAT_VERSION = "1"
+
+# Source readers: reader(source, columns=None, dtypes=None) -> DataFrame
+Reader = Callable[..., Any]
+
+
+class DatasetCache:
+    """
+    Content-addressed on-disk cache for remote datasets.
+
+    Downloaded files are stored once under ``objects/`` named by the SHA-256 of
+    their content, and ``manifest.json`` maps each source URL to its object
+    together with the ETag/Last-Modified validators reported by the source.
+    Entries younger than ``max_age`` seconds are served straight from disk;
+    older entries are revalidated with a conditional request and only
+    downloaded again when the source has changed. When the cache grows beyond
+    ``max_bytes`` the least recently used objects are evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        offline: bool = False,
+        timeout: float = 60,
+    ) -> None:
+        """
+        Parameters:
+            cache_dir (str): Cache directory (default: ``cache_dir`` from config).
+            max_bytes (int): Size limit of the cache in bytes (default: ``cache_max_bytes``).
+            max_age (float): Seconds before a cached entry is revalidated
+                (default: ``cache_max_age``).
+            offline (bool): Never contact the source when a cached copy exists.
+            timeout (float): Timeout in seconds for each request to the source.
+        """
+        cache_dir = cache_dir or config.get("cache_dir", "~/.cache/fynesse")
+        self.cache_dir = os.path.expanduser(os.path.expandvars(cache_dir))
+        self.max_bytes = int(
+            max_bytes
+            if max_bytes is not None
+            else config.get("cache_max_bytes", 2 * 1024**3)
+        )
+        self.max_age = float(
+            max_age if max_age is not None else config.get("cache_max_age", 86400)
+        )
+        self.offline = offline
+        self.timeout = timeout
+        self.objects_dir = os.path.join(self.cache_dir, "objects")
+        self.manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.manifest = self._read_manifest()
+        self._lock = threading.RLock()
+
+    def get(self, url: str, timeout: Optional[float] = None) -> str:
+        """
+        Return a local file path holding the current content of ``url``.
+
+        Safe to call from several threads at once; the manifest is only
+        touched under a lock while downloads run concurrently.
+
+        Parameters:
+            url (str): Source URL (``http(s)://`` or ``file://``).
+            timeout (float): Request timeout in seconds (default: ``self.timeout``).
+
+        Returns:
+            str: Path to the cached copy.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self.manifest.get(url)
+            if entry is not None:
+                entry = dict(entry)
+        if entry is not None and not os.path.exists(self._object_path(entry)):
+            entry = None
+
+        if entry is not None and (
+            self.offline or now - entry["checked"] < self.max_age
+        ):
+            return self._hit(url, entry, now, checked=False)
+
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = urllib.request.urlopen(
+                urllib.request.Request(url, headers=headers),
+                timeout=timeout or self.timeout,
+            )
+        except urllib.error.HTTPError as err:
+            if err.code == 304 and entry is not None:
+                return self._hit(url, entry, now, checked=True)
+            raise
+
+        with response:
+            validators = _validators(response.headers)
+            # Sources that ignore conditional headers (e.g. file://) still let us
+            # compare validators before reading the body.
+            if entry is not None and (
+                validators["etag"] or validators["last_modified"]
+            ):
+                if all(entry.get(k) == v for k, v in validators.items()):
+                    return self._hit(url, entry, now, checked=True)
+            # Stream the body to disk, hashing as it goes, so it is never held in memory
+            fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    digest, size = _copy_hashed(response, file)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+        entry = dict(
+            validators,
+            sha256=digest,
+            suffix=_url_suffix(url),
+            size=size,
+            checked=now,
+            accessed=now,
+        )
+        path = self._object_path(entry)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.manifest[url] = entry
+            self._evict(keep=os.path.basename(path))
+            self._write_manifest()
+        return path
+
+    def verify(self) -> List[str]:
+        """
+        Re-hash every cached object and drop those whose content no longer matches.
+
+        Returns:
+            list: URLs whose cached copy was missing or corrupt.
+        """
+        invalid: List[str] = []
+        with self._lock:
+            for url, entry in list(self.manifest.items()):
+                path = self._object_path(entry)
+                if not os.path.exists(path) or _file_sha256(path) != entry["sha256"]:
+                    invalid.append(url)
+                    del self.manifest[url]
+                    if os.path.exists(path):
+                        os.remove(path)
+            self._write_manifest()
+        return invalid
+
+    def clear(self) -> None:
+        """Remove every cached object and reset the manifest."""
+        with self._lock:
+            for name in os.listdir(self.objects_dir):
+                os.remove(os.path.join(self.objects_dir, name))
+            self.manifest = {}
+            self._write_manifest()
+
+    def size(self) -> int:
+        """Return the total size in bytes of the cached objects."""
+        return sum(entry["size"] for entry in self._objects().values())
+
+    # ---- Internal helpers ----
+    def _hit(self, url: str, entry: Dict[str, Any], now: float, checked: bool) -> str:
+        with self._lock:
+            stored = self.manifest.get(url, entry)
+            stored["accessed"] = now
+            if checked:
+                stored["checked"] = now
+            self._write_manifest()
+        return self._object_path(entry)
+
+    def _object_path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.objects_dir, entry["sha256"] + entry["suffix"])
+
+    def _objects(self) -> Dict[str, Dict[str, Any]]:
+        """Map each object file name to its size and most recent access time."""
+        objects: Dict[str, Dict[str, Any]] = {}
+        for entry in self.manifest.values():
+            name = entry["sha256"] + entry["suffix"]
+            accessed = objects.get(name, {}).get("accessed", 0)
+            objects[name] = {
+                "size": entry["size"],
+                "accessed": max(accessed, entry["accessed"]),
+            }
+        return objects
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        objects = self._objects()
+        total = sum(obj["size"] for obj in objects.values())
+        for name in sorted(objects, key=lambda n: objects[n]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            path = os.path.join(self.objects_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+            total -= objects[name]["size"]
+            self.manifest = {
+                url: entry
+                for url, entry in self.manifest.items()
+                if entry["sha256"] + entry["suffix"] != name
+            }
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path) as file:
+                manifest: Dict[str, Dict[str, Any]] = json.load(file)
+                return manifest
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(self.manifest, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+
+class DataLoadError(RuntimeError):
+    """
+    Raised when one or more loader sources fail.
+
+    Attributes:
+        errors (dict): Maps each failed source to the exception it raised.
+    """
+
+    def __init__(self, errors: Dict[str, BaseException]) -> None:
+        self.errors = errors
+        details = "; ".join(f"{name}: {err}" for name, err in errors.items())
+        super().__init__(f"Failed to load {len(errors)} source(s): {details}")
+
+
+def _is_transient(err: OSError) -> bool:
+    """Return True for fetch errors worth retrying."""
+    if isinstance(err, urllib.error.HTTPError):
+        return err.code >= 500 or err.code == 429
+    if isinstance(err, urllib.error.URLError):
+        return not isinstance(err.reason, FileNotFoundError)
+    return True
+
+
+def _validators(headers: Any) -> Dict[str, Optional[str]]:
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "content_length": headers.get("Content-Length"),
+    }
+
+
+def _url_suffix(url: str) -> str:
+    return os.path.splitext(urllib.parse.urlparse(url).path)[1]
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _copy_hashed(source: IO[bytes], target: IO[bytes]) -> Tuple[str, int]:
+    """Copy file-like ``source`` into ``target`` in 1 MiB blocks; return its SHA-256 and size."""
+    digest = hashlib.sha256()
+    size = 0
+    for block in iter(lambda: source.read(1024 * 1024), b""):
+        digest.update(block)
+        target.write(block)
+        size += len(block)
+    return digest.hexdigest(), size
+
+
 class HealthDataLoader:
-    def __init__(self):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache: Union[DatasetCache, None, bool] = None,
+        max_workers: Optional[int] = None,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        columnar: Optional[bool] = None,
+    ) -> None:
         """
         Load GeoPackage and CSV datasets directly from GitHub raw URLs.
-        """
-        # GitHub raw URL for GeoPackage
-        self.gpkg_url = "https://raw.githubusercontent.com/jamesmuiru/mlfccourse/main/csvs/county_with_raster_means.gpkg"
 
-        # GitHub raw URLs for CSV datasets
-        base_csv_url = "https://raw.githubusercontent.com/jamesmuiru/mlfccourse/main/csvs"
+        Parameters:
+            base_url (str): Location of the datasets; defaults to the GitHub mirror.
+                Any ``file://`` or local HTTP URL serving the same files works too.
+            cache (DatasetCache): Cache for downloaded files. ``None`` uses a cache
+                configured from ``defaults.yml``; ``False`` disables caching.
+            max_workers (int): Number of sources fetched and parsed at once.
+            retries (int): Extra attempts per source after a transient failure.
+            timeout (float): Timeout in seconds for each request.
+            columnar (bool): Convert each cached source once to (Geo)Parquet and read
+                that copy, memory-mapped, on later loads. Requires pyarrow and a cache;
+                defaults to ``loader_columnar`` when pyarrow is installed.
+        """
+        # GitHub raw URLs for the GeoPackage and CSV datasets
+        base_csv_url = (
+            base_url
+            or "https://raw.githubusercontent.com/jamesmuiru/mlfccourse/main/csvs"
+        )
+        self.gpkg_url = f"{base_csv_url}/county_with_raster_means.gpkg"
         self.health_facilities_data = f"{base_csv_url}/facilities_data.csv"
         self.projected_population_2025 = f"{base_csv_url}/projected_population_2025.csv"
         self.teen_pregnancy_bycounty = f"{base_csv_url}/teen_pregnacy_dataByCounty.csv"
-        self.level2_nurse_facilities = f"{base_csv_url}/level2_lessthan3nursesfacilities_nurses.csv"
+        self.level2_nurse_facilities = (
+            f"{base_csv_url}/level2_lessthan3nursesfacilities_nurses.csv"
+        )
         self.sexual_violence = f"{base_csv_url}/sexual_violence.csv"
 
+        self.cache: Any = DatasetCache() if cache is None else cache
+        self.max_workers = int(max_workers or config.get("loader_max_workers", 6))
+        self.retries = int(
+            retries if retries is not None else config.get("loader_retries", 2)
+        )
+        self.timeout = float(timeout or config.get("loader_timeout", 60))
+        self.backoff = 0.5
+        if columnar is None:
+            columnar = (
+                config.get("loader_columnar", True)
+                and importlib.util.find_spec("pyarrow") is not None
+            )
+        self.columnar = bool(columnar)
+
         # Placeholders for loaded data
-        self.county_boundaries_df = None
-        self.facilities_df = None
-        self.projected_population_df = None
-        self.teen_pregnancy_df = None
-        self.less_than3_nursefacilities_df = None
-        self.sexual_violence_df = None
-
-    def load_data(self):
-        """Load all datasets into memory."""
-        # Load GeoPackage directly
-        self.county_boundaries_df = gpd.read_file(self.gpkg_url)
-
-        # Load CSV datasets
-        self.facilities_df = pd.read_csv(self.health_facilities_data)
-        self.projected_population_df = pd.read_csv(self.projected_population_2025)
-        self.teen_pregnancy_df = pd.read_csv(self.teen_pregnancy_bycounty)
-        self.less_than3_nursefacilities_df = pd.read_csv(self.level2_nurse_facilities)
-        self.sexual_violence_df = pd.read_csv(self.sexual_violence)
+        self.county_boundaries_df: Any = None
+        self.facilities_df: Any = None
+        self.projected_population_df: Any = None
+        self.teen_pregnancy_df: Any = None
+        self.less_than3_nursefacilities_df: Any = None
+        self.sexual_violence_df: Any = None
+        self._projections: Dict[Tuple[Any, ...], Any] = {}
+
+    @profiled(frame=lambda args, kwargs, result: args[0]._loaded_shape())
+    def load_data(self) -> None:
+        """
+        Load all datasets into memory, reusing cached copies where possible.
+
+        Sources are fetched and parsed concurrently on up to ``max_workers``
+        threads, so a cold start takes roughly as long as the slowest file.
+        Every source is attempted; failures are collected and raised together
+        as a single DataLoadError.
+        """
+        sources = self._sources()
+        self._projections = {}
+        errors: Dict[str, BaseException] = {}
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(sources))
+        ) as pool:
+            futures = {
+                pool.submit(self._load_source, url, reader): name
+                for name, (url, reader) in sources.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    setattr(self, name, future.result())
+                except Exception as err:
+                    errors[name] = err
+        if errors:
+            raise DataLoadError(errors)
+
+    def _loaded_shape(self) -> Tuple[int, int]:
+        """Total (rows, columns) over the loaded datasets, as recorded by the profiler."""
+        frames = [getattr(self, name) for name in self._sources()]
+        frames = [f for f in frames if f is not None]
+        return sum(len(f) for f in frames), sum(len(f.columns) for f in frames)
+
+    def _sources(self) -> Dict[str, Tuple[str, Reader]]:
+        """Map each dataset attribute to its source URL and reader."""
+        return {
+            "county_boundaries_df": (self.gpkg_url, _read_geopackage),
+            "facilities_df": (self.health_facilities_data, _read_csv),
+            "projected_population_df": (self.projected_population_2025, _read_csv),
+            "teen_pregnancy_df": (self.teen_pregnancy_bycounty, _read_csv),
+            "less_than3_nursefacilities_df": (self.level2_nurse_facilities, _read_csv),
+            "sexual_violence_df": (self.sexual_violence, _read_csv),
+        }
+
+    def _load_source(
+        self,
+        url: str,
+        reader: Reader,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        source = self._fetch(url)
+        if self.columnar and isinstance(source, str):
+            columnar_dir = os.path.join(self.cache.cache_dir, "columnar")
+            return _read_columnar(
+                source, url, reader, columnar_dir, columns=columns, dtypes=dtypes
+            )
+        if isinstance(source, str):
+            return reader(source, columns=columns, dtypes=dtypes)
+        with source:
+            return reader(source, columns=columns, dtypes=dtypes)
+
+    def _get(
+        self,
+        name: str,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Return dataset ``name``, reading it from its source on first use.
+
+        Without ``columns``/``dtypes`` the full dataset is loaded once and kept
+        in its placeholder attribute. A projection is served from the full
+        dataset when that is already in memory, and otherwise parsed directly
+        from the source so only the requested columns are materialised.
+        Projections are memoised per (columns, dtypes) request.
+        """
+        if columns is None and not dtypes:
+            if getattr(self, name) is None:
+                url, reader = self._sources()[name]
+                setattr(self, name, self._load_source(url, reader))
+            return getattr(self, name)
+
+        key = (
+            name,
+            tuple(columns) if columns is not None else None,
+            tuple(sorted((col, str(dtype)) for col, dtype in (dtypes or {}).items())),
+        )
+        if key not in self._projections:
+            full = getattr(self, name)
+            if full is not None:
+                df = (
+                    full[_projected_columns(full.columns, columns)]
+                    if columns is not None
+                    else full
+                )
+                self._projections[key] = df.astype(dtypes) if dtypes else df
+            else:
+                url, reader = self._sources()[name]
+                self._projections[key] = self._load_source(
+                    url, reader, columns=columns, dtypes=dtypes
+                )
+        return self._projections[key]
+
+    def _fetch(self, url: str) -> Union[str, IO[bytes]]:
+        """
+        Fetch url with retries and exponential backoff on transient errors.
+
+        Returns:
+            str or file object: Local cached path or, when caching is disabled, an
+                anonymous temporary file holding the body (removed once closed).
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                if self.cache:
+                    path: str = self.cache.get(url, timeout=self.timeout)
+                    return path
+                with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                    body = tempfile.TemporaryFile()
+                    try:
+                        _copy_hashed(response, body)
+                    except BaseException:
+                        body.close()
+                        raise
+                body.seek(0)
+                return body
+            except OSError as err:
+                if attempt == self.retries or not _is_transient(err):
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+        raise AssertionError("unreachable")
+
+    def aggregate_by_county(
+        self,
+        url: str,
+        sums: Iterable[str] = (),
+        means: Iterable[str] = (),
+        rates: Optional[Dict[str, Tuple[str, str]]] = None,
+        count: Optional[str] = "Records",
+        col: str = "County",
+        chunksize: int = 100000,
+        max_workers: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Stream a large CSV and reduce it to per-county indicators.
+
+        The CSV (fetched through the cache like any other source) is read in
+        chunks by a generator. Each chunk has its county names cleaned and is
+        reduced to partial sums and counts on worker threads. Partials are
+        merged as they complete, with at most ``2 * max_workers`` chunks in
+        flight, so memory stays bounded whatever the file size.
+
+        Parameters:
+            url (str): CSV location, e.g. a facility registry or survey microdata extract.
+            sums (list): Columns summed per county.
+            means (list): Columns averaged per county (output as ``<col>_mean``).
+            rates (dict): Output name -> (numerator, denominator); the ratio of county sums.
+            count (str): Name of the row-count column, or None to omit it.
+            col (str): County column.
+            chunksize (int): Rows per chunk.
+            max_workers (int): Worker threads (default: the loader's max_workers).
+
+        Returns:
+            pd.DataFrame: One row per county. ``attrs["dropped_rows"]`` holds the number
+                of rows whose county could not be matched.
+        """
+        sums, means, rates = list(sums), list(means), rates or {}
+        numeric = list(
+            dict.fromkeys(
+                [*sums, *means, *(c for pair in rates.values() for c in pair)]
+            )
+        )
+        source = self._fetch(url)
+        chunks = iter_csv_chunks(source, chunksize=chunksize, columns=[col, *numeric])
+        reduce_chunk = functools.partial(
+            _county_partials, col=col, sums=sums, means=means, rates=rates
+        )
+
+        max_workers = max_workers or self.max_workers
+        total: Any = None
+        dropped = 0
+        with contextlib.ExitStack() as stack, ThreadPoolExecutor(
+            max_workers=max_workers
+        ) as pool:
+            if not isinstance(source, str):
+                stack.enter_context(source)
+            pending: set = set()
+            for chunk in chunks:
+                pending.add(pool.submit(reduce_chunk, chunk))
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    total, dropped = _merge_partials(done, total, dropped)
+            total, dropped = _merge_partials(pending, total, dropped)
+
+        if total is None:
+            total = _county_partials(
+                pd.DataFrame(columns=[col, *numeric]), col, sums, means, rates
+            )[0]
+        result = pd.DataFrame(index=total.index)
+        if count:
+            result[count] = total["_rows"].astype("int64")
+        for c in sums:
+            result[c] = total[f"_sum_{c}"]
+        for c in means:
+            result[f"{c}_mean"] = total[f"_sum_{c}"] / total[f"_n_{c}"].replace(
+                0, np.nan
+            )
+        for name, (num, den) in rates.items():
+            result[name] = total[f"_sum_{num}"] / total[f"_sum_{den}"].replace(
+                0, np.nan
+            )
+        result = result.reset_index()
+        result.attrs["dropped_rows"] = dropped
+        return result
 
     # ---- Accessor Methods ----
-    def get_county_boundaries(self):
-        return self.county_boundaries_df
+    # Each accessor loads its dataset on first use. Pass ``columns`` to parse
+    # only those fields (the ``County`` key and geometry are always kept) and
+    # ``dtypes`` to read them with compact types, e.g. {"County": "category"}.
+    def get_county_boundaries(
+        self,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self._get("county_boundaries_df", columns, dtypes)
+
+    def get_facilities(
+        self,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self._get("facilities_df", columns, dtypes)
+
+    def get_projected_population(
+        self,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self._get("projected_population_df", columns, dtypes)
+
+    def get_teen_pregnancy(
+        self,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self._get("teen_pregnancy_df", columns, dtypes)
+
+    def get_low_staff_facilities(
+        self,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self._get("less_than3_nursefacilities_df", columns, dtypes)
+
+    def get_sexual_violence(
+        self,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        return self._get("sexual_violence_df", columns, dtypes)
+
+
+def iter_csv_chunks(
+    source: Any, chunksize: int = 100000, columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield a CSV source as DataFrames of at most ``chunksize`` rows.
+
+    Parameters:
+        source (str or file-like): CSV path, URL or buffer.
+        chunksize (int): Rows per chunk.
+        columns (list): Only parse these columns when given.
+    """
+    usecols: Optional[Callable[[str], bool]] = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda c: c in wanted  # noqa: E731
+    with pd.read_csv(source, usecols=usecols, chunksize=chunksize) as reader:
+        yield from reader
+
+
+def _county_partials(
+    chunk: pd.DataFrame,
+    col: str,
+    sums: List[str],
+    means: List[str],
+    rates: Dict[str, Tuple[str, str]],
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Reduce one chunk to additive per-county partial aggregates.
+
+    Returns:
+        tuple: (partials indexed by canonical county, number of rows dropped by cleaning).
+    """
+    from .assess import clean_county_names
+
+    cleaned = clean_county_names(chunk, col=col)
+    columns = {"_rows": np.ones(len(cleaned))}
+    for c in dict.fromkeys(
+        [*sums, *means, *(c for pair in rates.values() for c in pair)]
+    ):
+        values = pd.to_numeric(cleaned[c], errors="coerce")
+        columns[f"_sum_{c}"] = values.fillna(0).to_numpy()
+        columns[f"_n_{c}"] = values.notna().to_numpy(dtype=float)
+    partial = (
+        pd.DataFrame(columns, index=cleaned[col]).groupby(level=0, observed=True).sum()
+    )
+    return partial, len(chunk) - len(cleaned)
+
+
+def _merge_partials(
+    futures: Iterable["Future[Tuple[pd.DataFrame, int]]"], total: Any, dropped: int
+) -> Tuple[Any, int]:
+    """Fold finished chunk futures into the running total and dropped-row count."""
+    for future in futures:
+        partial, n_dropped = future.result()
+        dropped += n_dropped
+        total = partial if total is None else total.add(partial, fill_value=0)
+    return total, dropped
 
-    def get_facilities(self):
-        return self.facilities_df
 
-    def get_projected_population(self):
-        return self.projected_population_df
+def _projected_columns(
+    available: Iterable[str], columns: Iterable[str], key: str = "County"
+) -> List[str]:
+    """Return the requested columns plus the join key, in source order."""
+    wanted = set(columns) | {key, "geometry"}
+    return [col for col in available if col in wanted]
 
-    def get_teen_pregnancy(self):
-        return self.teen_pregnancy_df
 
-    def get_low_staff_facilities(self):
-        return self.less_than3_nursefacilities_df
+def _read_csv(
+    source: Any,
+    columns: Optional[List[str]] = None,
+    dtypes: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """Read a CSV source, parsing only ``columns`` (plus the key) when given."""
+    usecols: Optional[Callable[[str], bool]] = None
+    if columns is not None:
+        wanted = set(columns) | {"County"}
+        usecols = lambda col: col in wanted  # noqa: E731
+    return pd.read_csv(source, usecols=usecols, dtype=dtypes)
 
-    def get_sexual_violence(self):
-        return self.sexual_violence_df
 
+def _read_geopackage(
+    source: Any,
+    columns: Optional[List[str]] = None,
+    dtypes: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Read a GeoPackage source, reading only ``columns`` (plus key and geometry) when given."""
+    import geopandas as gpd
 
-def merge_dfs_to_gdf(gdf, dfs, key="County"):
-    """Merge multiple pandas DataFrames into a GeoDataFrame on a common key."""
-    merged = gdf.copy()
+    if columns is not None:
+        columns = [
+            col for col in dict.fromkeys(["County", *columns]) if col != "geometry"
+        ]
+    gdf = gpd.read_file(source, columns=columns)
+    return gdf.astype(dtypes) if dtypes else gdf
+
+
+def _source_fingerprint(source_path: str, reader: Reader) -> str:
+    """
+    Fingerprint a cached source together with the reader that parses it.
+
+    Cached objects are named by the SHA-256 of their content, so any change to
+    the source, to the reader, or to COLUMNAR_FORMAT_VERSION yields a new
+    fingerprint and forces reconversion.
+    """
+    content_digest = os.path.splitext(os.path.basename(source_path))[0]
+    key = f"{content_digest}:{reader.__name__}:{COLUMNAR_FORMAT_VERSION}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _read_columnar(
+    source_path: str,
+    url: str,
+    reader: Reader,
+    columnar_dir: str,
+    columns: Optional[List[str]] = None,
+    dtypes: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Read a source through its columnar (Geo)Parquet copy, converting it first if needed.
+
+    The GeoPackage is stored as GeoParquet with WKB geometry and CSVs as typed
+    Parquet tables, one file per source URL named by its fingerprint. Reads are
+    memory-mapped and only the projected columns are materialised. Sources
+    Arrow cannot store (e.g. a CSV column mixing numbers and strings) are
+    served from the direct parse instead, and a ``.direct`` marker with the
+    same fingerprint makes later loads skip the conversion attempt.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    stem = hashlib.sha256(url.encode()).hexdigest()[:16]
+    name = f"{stem}-{_source_fingerprint(source_path, reader)}"
+    path = os.path.join(columnar_dir, f"{name}.parquet")
+    unsupported = os.path.join(columnar_dir, f"{name}.direct")
+    if os.path.exists(unsupported):
+        return reader(source_path, columns=columns, dtypes=dtypes)
+    if not os.path.exists(path):
+        os.makedirs(columnar_dir, exist_ok=True)
+        df = reader(source_path)
+        fd, tmp_path = tempfile.mkstemp(dir=columnar_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path, index=False)
+        except pa.ArrowException:
+            os.remove(tmp_path)
+            open(unsupported, "w").close()
+        else:
+            os.replace(tmp_path, path)
+        # Drop conversions and markers of earlier versions of this source
+        for stale in glob.glob(os.path.join(columnar_dir, f"{stem}-*")):
+            if stale not in (path, unsupported):
+                os.remove(stale)
+        if os.path.exists(unsupported):
+            if columns is not None:
+                df = df[_projected_columns(df.columns, columns)]
+            return df.astype(dtypes) if dtypes else df
+
+    if columns is not None:
+        columns = _projected_columns(pq.read_schema(path).names, columns)
+    if reader is _read_geopackage:
+        import geopandas as gpd
+
+        df = gpd.read_parquet(path, columns=columns, memory_map=True)
+    else:
+        df = pd.read_parquet(path, columns=columns, memory_map=True)
+    return df.astype(dtypes) if dtypes else df
+
+
+@profiled()
+def merge_dfs_to_gdf(
+    gdf: Any,
+    dfs: Iterable[pd.DataFrame],
+    key: str = "County",
+    validate: str = "one_to_one",
+    overwrite: bool = False,
+) -> Any:
+    """
+    Merge multiple pandas DataFrames into a GeoDataFrame on a common key.
+
+    This is a left join of every frame onto ``gdf`` done in a single pass: the
+    key of ``gdf`` is factorised into one hash index, each frame's key is
+    looked up in it once, and all columns are gathered into the result with
+    one allocation instead of N chained merges. Overlapping column names from
+    the i-th frame get the suffix ``_i`` unless ``overwrite`` is set.
+
+    Parameters:
+        gdf (GeoDataFrame): Left frame; its rows and order are preserved.
+        dfs (list): DataFrames to join on ``key``.
+        key (str): Name of the common key column.
+        validate (str): "one_to_one" requires unique keys on both sides;
+            "many_to_one" allows repeated keys in ``gdf`` only.
+        overwrite (bool): Replace columns that already exist with the frame's
+            values (missing where the frame has no row for a key) instead of
+            adding suffixed copies.
+
+    Returns:
+        GeoDataFrame: Merged GeoDataFrame.
+    """
+    if validate not in ("one_to_one", "many_to_one"):
+        raise ValueError("validate must be 'one_to_one' or 'many_to_one'")
+
+    codes, uniques = pd.factorize(gdf[key], use_na_sentinel=False)
+    if validate == "one_to_one" and len(uniques) != len(gdf):
+        duplicated = gdf[key][gdf[key].duplicated()].unique().tolist()
+        raise ValueError(f"Duplicate '{key}' values in GeoDataFrame: {duplicated[:10]}")
+    key_index = pd.Index(uniques)
+
+    columns = {col: gdf[col].array for col in gdf.columns}
     for i, df in enumerate(dfs, 1):
-        merged = merged.merge(df, on=key, how="left", suffixes=("", f"_{i}"))
-    return merged
+        positions = key_index.get_indexer(df[key])
+        matched = np.flatnonzero(positions >= 0)
+        counts = np.bincount(positions[matched], minlength=len(key_index))
+        if (counts > 1).any():
+            duplicated = key_index[counts > 1].tolist()
+            raise ValueError(
+                f"Duplicate '{key}' values in DataFrame {i}: {duplicated[:10]}"
+            )
+
+        # Row of df for each distinct key, -1 where the key is absent
+        take = np.full(len(key_index), -1, dtype=np.intp)
+        take[positions[matched]] = matched
+        take = take[codes]
+        for col in df.columns:
+            if col == key:
+                continue
+            name = f"{col}_{i}" if col in columns and not overwrite else col
+            columns[name] = pd.api.extensions.take(df[col].array, take, allow_fill=True)
+
+    import geopandas as gpd
+
+    merged = pd.DataFrame(columns, index=gdf.index, copy=False)
+    return gpd.GeoDataFrame(merged, geometry=gdf.geometry.name, crs=gdf.crs)
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _lonlat_to_xyz(lon: Any, lat: Any) -> np.ndarray:
+    """Project longitude/latitude in degrees onto the unit sphere."""
+    lon, lat = np.radians(lon), np.radians(lat)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def _point_coordinates(
+    points: Any, lon_col: str = "Longitude", lat_col: str = "Latitude"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (lon, lat) arrays from point/polygon geometries or from coordinate columns."""
+    import geopandas as gpd
+
+    if isinstance(points, (gpd.GeoDataFrame, gpd.GeoSeries)):
+        geoms = points.geometry
+        if geoms.crs is not None and not geoms.crs.is_geographic:
+            geoms = geoms.to_crs(4326)
+        if not (geoms.geom_type == "Point").all():
+            geoms = geoms.representative_point()
+        return geoms.x.to_numpy(), geoms.y.to_numpy()
+    return (
+        pd.to_numeric(points[lon_col], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(points[lat_col], errors="coerce").to_numpy(dtype=float),
+    )
+
+
+class FacilityDistanceIndex:
+    """
+    KD-tree over facility locations for nearest-facility distances.
+
+    Facilities (e.g. ``facilities_data.csv`` or a point GeoDataFrame) are
+    bulk-loaded once as unit-sphere vectors into a scipy cKDTree; queries run
+    vectorised in chunks and return great-circle distances in kilometres.
+    Rebuild the index whenever the facility list changes and recompute
+    ``Health_Facilities_distance`` from it.
+    """
+
+    def __init__(
+        self, facilities: Any, lon_col: str = "Longitude", lat_col: str = "Latitude"
+    ) -> None:
+        """
+        Parameters:
+            facilities (pd.DataFrame or GeoDataFrame): Facility locations.
+            lon_col (str): Longitude column when facilities is not a GeoDataFrame.
+            lat_col (str): Latitude column when facilities is not a GeoDataFrame.
+        """
+        from scipy.spatial import cKDTree
+
+        lon, lat = _point_coordinates(facilities, lon_col, lat_col)
+        valid = np.isfinite(lon) & np.isfinite(lat)
+        if not valid.any():
+            raise ValueError("No facilities with valid coordinates")
+        self.lon_col = lon_col
+        self.lat_col = lat_col
+        self.facility_index = np.flatnonzero(valid)
+        self.tree = cKDTree(_lonlat_to_xyz(lon[valid], lat[valid]))
+
+    def query(
+        self, lon: Any, lat: Any, chunk_size: int = 500_000, workers: int = -1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the nearest facility for each query point.
+
+        Parameters:
+            lon (array-like): Longitudes in degrees.
+            lat (array-like): Latitudes in degrees.
+            chunk_size (int): Points queried per chunk, bounding temporary memory.
+            workers (int): Threads used by cKDTree.query (-1 for all CPUs).
+
+        Returns:
+            tuple: (distance_km, facility) arrays; facility holds the row position of the
+                nearest facility in the input frame, -1 (and NaN distance) for invalid points.
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        distance = np.full(len(lon), np.nan)
+        nearest = np.full(len(lon), -1, dtype=np.int64)
+        for start in range(0, len(lon), chunk_size):
+            stop = start + chunk_size
+            valid = (
+                np.flatnonzero(
+                    np.isfinite(lon[start:stop]) & np.isfinite(lat[start:stop])
+                )
+                + start
+            )
+            chord, idx = self.tree.query(
+                _lonlat_to_xyz(lon[valid], lat[valid]), k=1, workers=workers
+            )
+            distance[valid] = (
+                2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+            )
+            nearest[valid] = self.facility_index[idx]
+        return distance, nearest
+
+    def county_stats(
+        self,
+        points: Any,
+        county_col: str = "County",
+        weight_col: Optional[str] = None,
+        chunk_size: int = 500_000,
+    ) -> pd.DataFrame:
+        """
+        Summarise nearest-facility distances per county.
+
+        Parameters:
+            points (pd.DataFrame or GeoDataFrame): Query points labelled with a county,
+                e.g. a population grid, or county polygons (queried at a representative point).
+            county_col (str): County label column.
+            weight_col (str): Optional weight (e.g. population) for the mean distance.
+            chunk_size (int): Points queried per chunk.
+
+        Returns:
+            pd.DataFrame: Per county: Health_Facilities_distance (weighted mean), median,
+                max and number of points. Merge with
+                ``merge_dfs_to_gdf(..., overwrite=True)`` so the distances replace the
+                boundaries' Health_Facilities_distance column read by ``preprocess``.
+        """
+        lon, lat = _point_coordinates(points, self.lon_col, self.lat_col)
+        distance, _ = self.query(lon, lat, chunk_size=chunk_size)
+        weights = (
+            np.ones(len(distance))
+            if weight_col is None
+            else points[weight_col].to_numpy(dtype=float)
+        )
+        weights = np.where(np.isnan(distance), 0.0, np.nan_to_num(weights))
+        frame = pd.DataFrame(
+            {
+                county_col: points[county_col].to_numpy(),
+                "weighted": np.nan_to_num(distance) * weights,
+                "weight": weights,
+                "distance": distance,
+            }
+        )
+        grouped = frame.groupby(county_col, sort=False, observed=True)
+        sums = grouped[["weighted", "weight"]].sum()
+        return pd.DataFrame(
+            {
+                "Health_Facilities_distance": sums["weighted"]
+                / sums["weight"].replace(0, np.nan),
+                "Health_Facilities_distance_median": grouped["distance"].median(),
+                "Health_Facilities_distance_max": grouped["distance"].max(),
+                "Distance_points": grouped["distance"].count(),
+            }
+        ).reset_index()
+
+
+def zonal_statistics(
+    raster: Union[str, np.ndarray],
+    zones: Any,
+    name: str = "value",
+    transform: Optional[Tuple[float, ...]] = None,
+    nodata: Optional[float] = None,
+    band: int = 1,
+    zone_col: str = "County",
+    window_rows: int = 256,
+    label_cache_dir: Optional[str] = None,
+    label_cache_max_bytes: Optional[int] = None,
+) -> Any:
+    """
+    Mean, sum and count of raster values per zone, computed in streaming windows.
+
+    The raster is read one block of rows at a time (memory-mapped for
+    ``.npy`` files and arrays, windowed reads for GeoTIFFs), so it is never
+    loaded whole. Zones are rasterised once onto the raster grid into an int32
+    label mask (with rasterio when available, else an STRtree of the zone
+    polygons) and cached on disk keyed by the zone geometries and grid. Later rasters
+    on the same grid reuse it. Per-zone sums and counts are accumulated with
+    ``np.bincount``.
+
+    Parameters:
+        raster (str or np.ndarray): Path to a ``.npy`` file, a 2-D array/memmap, or a
+            path readable by rasterio (optional dependency).
+        zones (GeoDataFrame): Zone polygons in the raster's CRS, e.g. county boundaries.
+        name (str): Output column for the mean; sums and counts go to
+            ``<name>_sum`` and ``<name>_count``.
+        transform (tuple): Affine (a, b, c, d, e, f) mapping (col, row) to (x, y);
+            taken from the file for rasterio sources.
+        nodata (float): Value to ignore in addition to NaN.
+        band (int): Band to read from rasterio sources.
+        zone_col (str): Zone label column kept in the output.
+        window_rows (int): Raster rows processed per window.
+        label_cache_dir (str): Where label masks are cached (default: ``<cache_dir>/zones``).
+        label_cache_max_bytes (int): Size limit of the label mask cache; the least
+            recently used masks are evicted beyond it (default: ``zone_cache_max_bytes``).
+
+    Returns:
+        GeoDataFrame: Copy of zones with the new statistics columns, ready to write as a
+            GeoPackage like ``county_with_raster_means.gpkg``.
+    """
+    dataset: Any = None
+    if isinstance(raster, str) and raster.endswith(".npy"):
+        raster = np.load(raster, mmap_mode="r")
+    if isinstance(raster, str):
+        import rasterio
+
+        dataset = rasterio.open(raster)
+        shape = (dataset.height, dataset.width)
+        if transform is None:
+            t = dataset.transform
+            transform = (t.a, t.b, t.c, t.d, t.e, t.f)
+        nodata = dataset.nodata if nodata is None else nodata
+    else:
+        shape = raster.shape
+    if transform is None:
+        raise ValueError("transform is required for array rasters")
+    if transform[1] != 0 or transform[3] != 0:
+        raise ValueError("Only north-up rasters (no rotation) are supported")
+
+    labels = _zone_labels(
+        zones, shape, transform, window_rows, label_cache_dir, label_cache_max_bytes
+    )
+    sums = np.zeros(len(zones))
+    counts = np.zeros(len(zones), dtype=np.int64)
+    try:
+        for start in range(0, shape[0], window_rows):
+            stop = min(start + window_rows, shape[0])
+            if dataset is not None:
+                from rasterio.windows import Window
+
+                values = dataset.read(
+                    band, window=Window(0, start, shape[1], stop - start)
+                )
+            else:
+                values = raster[start:stop]
+            values = np.asarray(values, dtype=float)
+            zone = labels[start:stop]
+            valid = (zone >= 0) & np.isfinite(values)
+            if nodata is not None:
+                valid &= values != nodata
+            sums += np.bincount(
+                zone[valid], weights=values[valid], minlength=len(zones)
+            )
+            counts += np.bincount(zone[valid], minlength=len(zones))
+    finally:
+        if dataset is not None:
+            dataset.close()
+
+    result = zones.copy()
+    result[name] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    result[f"{name}_sum"] = sums
+    result[f"{name}_count"] = counts
+    return result
+
+
+def _zone_labels(
+    zones: Any,
+    shape: Tuple[int, ...],
+    transform: Tuple[float, ...],
+    window_rows: int,
+    cache_dir: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Return an int32 mask giving the zone position of each pixel centre (-1 outside).
+
+    The mask is built once per (zones, grid, labeller) fingerprint and stored
+    as a memory-mapped ``.npy`` file. Zones are burned in with
+    ``rasterio.features.rasterize`` when rasterio is installed, and otherwise
+    located with an STRtree query of the pixel centres; the two can label
+    boundary pixels differently, so their masks are kept apart. Masks beyond
+    ``max_bytes`` are evicted least recently used first.
+    """
+    import shapely
+
+    method = (
+        "rasterio" if importlib.util.find_spec("rasterio") is not None else "strtree"
+    )
+    digest = hashlib.sha256(repr((tuple(shape), tuple(transform[:6]), method)).encode())
+    for wkb in shapely.to_wkb(zones.geometry.to_numpy()):
+        digest.update(wkb)
+    cache_dir = cache_dir or os.path.join(
+        os.path.expanduser(
+            os.path.expandvars(config.get("cache_dir", "~/.cache/fynesse"))
+        ),
+        "zones",
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"labels-{digest.hexdigest()[:16]}.npy")
+    if os.path.exists(path):
+        os.utime(path)  # Recently used, for eviction
+        cached: np.ndarray = np.load(path, mmap_mode="r")
+        return cached
+
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".npy")
+    os.close(fd)
+    labels = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.int32, shape=tuple(shape)
+    )
+    if method == "rasterio":
+        _rasterize_zones(labels, zones, transform, window_rows)
+    else:
+        _query_zones(labels, zones, transform, window_rows)
+    labels.flush()
+    del labels
+    os.replace(tmp_path, path)
+    _evict_zone_labels(
+        cache_dir,
+        int(
+            max_bytes
+            if max_bytes is not None
+            else config.get("zone_cache_max_bytes", 1024**3)
+        ),
+        keep=path,
+    )
+    loaded: np.ndarray = np.load(path, mmap_mode="r")
+    return loaded
+
+
+def _evict_zone_labels(cache_dir: str, max_bytes: int, keep: str) -> None:
+    """Remove the least recently used label masks until the rest fit in ``max_bytes``."""
+    masks = []
+    for path in glob.glob(os.path.join(cache_dir, "labels-*.npy")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        masks.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in masks)
+    for _, size, path in sorted(masks):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:  # e.g. still memory-mapped on Windows
+            continue
+        total -= size
+
+
+def _rasterize_zones(
+    labels: np.ndarray, zones: Any, transform: Tuple[float, ...], window_rows: int
+) -> None:
+    """Burn each zone's position into ``labels`` with GDAL, one block of rows at a time."""
+    from rasterio.features import rasterize
+    from rasterio.transform import Affine
+
+    a, b, c, d, e, f = transform[:6]
+    geometries = [
+        (geom, i)
+        for i, geom in enumerate(zones.geometry)
+        if geom is not None and not geom.is_empty
+    ]
+    for start in range(0, labels.shape[0], window_rows):
+        stop = min(start + window_rows, labels.shape[0])
+        if not geometries:
+            labels[start:stop] = -1
+            continue
+        labels[start:stop] = rasterize(
+            geometries,
+            out_shape=(stop - start, labels.shape[1]),
+            transform=Affine(a, b, c + b * start, d, e, f + e * start),
+            fill=-1,
+            dtype=np.int32,
+        )
+
+
+def _query_zones(
+    labels: np.ndarray, zones: Any, transform: Tuple[float, ...], window_rows: int
+) -> None:
+    """Fill ``labels`` by querying pixel centres against an STRtree of the zones."""
+    import shapely
+
+    a, _, c, _, e, f = transform[:6]
+    tree = shapely.STRtree(zones.geometry.to_numpy())
+    x = c + a * (np.arange(labels.shape[1]) + 0.5)
+    for start in range(0, labels.shape[0], window_rows):
+        stop = min(start + window_rows, labels.shape[0])
+        y = f + e * (np.arange(start, stop) + 0.5)
+        xx, yy = np.meshgrid(x, y)
+        window = np.full(xx.size, -1, dtype=np.int32)
+        point_idx, zone_idx = tree.query(
+            shapely.points(xx.ravel(), yy.ravel()), predicate="within"
+        )
+        window[point_idx] = zone_idx
+        labels[start:stop] = window.reshape(xx.shape)
+
+
+# Default map simplification tolerances in degrees: about one screen pixel at
+# web-map zoom levels 12, 10, 8 and 6 (see GeometryCache.tolerance_for_zoom).
+geometry_tolerances = (0.0003, 0.001, 0.005, 0.02)
+# Boundary sets whose GeometryCache is kept by geometry_cache()
+geometry_cache_size = 8
+_geometry_caches: "OrderedDict[str, GeometryCache]" = OrderedDict()
+_geometry_caches_lock = threading.Lock()
+
+
+class GeometryCache:
+    """
+    Simplified copies of a set of boundaries for map rendering.
+
+    Boundaries are reprojected to EPSG:4326 once and simplified lazily at each
+    tolerance. Edges shared by neighbouring polygons stay coincident
+    (shapely's coverage_simplify; on shapely < 2.1, or for non-polygonal input,
+    each geometry is simplified on its own with topology preserved). The
+    GeoJSON for each level is built once, with coordinates rounded to
+    ``precision`` decimals, and reused by every map drawn from the same
+    boundaries. Use ``geometry_cache()`` to share instances between callers.
+    """
+
+    def __init__(
+        self,
+        geometry: Any,
+        tolerances: Iterable[float] = geometry_tolerances,
+        precision: int = 5,
+    ) -> None:
+        """
+        Parameters:
+            geometry (GeoSeries or GeoDataFrame): Boundaries to simplify.
+            tolerances (tuple): Simplification levels in degrees.
+            precision (int): Decimal places kept in the GeoJSON coordinates.
+        """
+        import geopandas as gpd
+
+        geometry = gpd.GeoSeries(
+            geometry.geometry if isinstance(geometry, gpd.GeoDataFrame) else geometry
+        )
+        if geometry.crs is not None and not geometry.crs.equals("EPSG:4326"):
+            geometry = geometry.to_crs(4326)
+        self.geometry = geometry
+        self.tolerances = tuple(sorted(tolerances))
+        self.precision = precision
+        self._levels = {0.0: geometry}
+        self._geojson: Dict[float, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def tolerance_for_zoom(self, zoom: float, tile_size: int = 256) -> float:
+        """Coarsest cached tolerance below one pixel at a web-map zoom level."""
+        return self._within(360 / (tile_size * 2**zoom))
+
+    def tolerance_for_extent(self, pixels: float) -> float:
+        """Coarsest cached tolerance below one pixel when the boundaries span ``pixels``."""
+        minx, miny, maxx, maxy = self.geometry.total_bounds
+        return self._within(max(maxx - minx, maxy - miny) / pixels)
+
+    def _within(self, pixel: float) -> float:
+        fitting = [t for t in self.tolerances if t <= pixel]
+        return fitting[-1] if fitting else 0.0
+
+    def simplified(self, tolerance: float) -> Any:
+        """Return the boundaries simplified at ``tolerance`` degrees (0 for full resolution)."""
+        with self._lock:
+            if tolerance not in self._levels:
+                self._levels[tolerance] = self._simplify(tolerance)
+            return self._levels[tolerance]
+
+    def geojson(self, tolerance: float) -> Dict[str, Any]:
+        """Return the boundaries at ``tolerance`` as a GeoJSON FeatureCollection keyed by index."""
+        import geopandas as gpd
+        import shapely
+
+        simplified = self.simplified(tolerance)
+        with self._lock:
+            if tolerance not in self._geojson:
+                rounded = shapely.transform(
+                    simplified.to_numpy(), lambda c: np.round(c, self.precision)
+                )
+                self._geojson[tolerance] = gpd.GeoSeries(
+                    rounded, index=simplified.index
+                ).__geo_interface__
+            return self._geojson[tolerance]
+
+    def _simplify(self, tolerance: float) -> Any:
+        import geopandas as gpd
+        import shapely
+
+        geoms = self.geometry.to_numpy()
+        present = ~shapely.is_missing(geoms) & ~shapely.is_empty(geoms)
+        polygonal = np.isin(shapely.get_type_id(geoms[present]), [3, 6])
+        simplified = geoms.copy()
+        if hasattr(shapely, "coverage_simplify") and polygonal.all():
+            simplified[present] = shapely.coverage_simplify(geoms[present], tolerance)
+        else:
+            simplified[present] = shapely.simplify(
+                geoms[present], tolerance, preserve_topology=True
+            )
+        return gpd.GeoSeries(
+            simplified, index=self.geometry.index, crs=self.geometry.crs
+        )
+
+
+def geometry_cache(
+    geometry: Any, tolerances: Iterable[float] = geometry_tolerances
+) -> GeometryCache:
+    """
+    Return the shared GeometryCache for a set of boundaries.
+
+    Caches are keyed by the boundaries' WKB, index and CRS, so every plot of
+    the same counties or wards reuses the simplified levels and GeoJSON.
+
+    Parameters:
+        geometry (GeoSeries or GeoDataFrame): Boundaries to render.
+        tolerances (tuple): Simplification levels in degrees.
+
+    Returns:
+        GeometryCache: Cache for these boundaries.
+    """
+    import geopandas as gpd
+    import shapely
+
+    geoms = (
+        geometry.geometry
+        if isinstance(geometry, gpd.GeoDataFrame)
+        else gpd.GeoSeries(geometry)
+    )
+    digest = hashlib.sha256(repr((str(geoms.crs), tuple(tolerances))).encode())
+    digest.update(pd.util.hash_pandas_object(geoms.index).to_numpy().tobytes())
+    for wkb in shapely.to_wkb(geoms.to_numpy()):
+        digest.update(wkb or b"")
+    key = digest.hexdigest()
+    with _geometry_caches_lock:
+        if key in _geometry_caches:
+            _geometry_caches.move_to_end(key)
+            return _geometry_caches[key]
+    cache = GeometryCache(geoms, tolerances)
+    with _geometry_caches_lock:
+        cache = _geometry_caches.setdefault(key, cache)
+        while len(_geometry_caches) > geometry_cache_size:
+            _geometry_caches.popitem(last=False)
+    return cache
@@ -1,162 +1,1464 @@
 # address.py
 import pandas as pd
 import numpy as np
-import math
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.cluster import KMeans
-import matplotlib.pyplot as plt
-import plotly.express as px
+import functools
+import hashlib
+import heapq
+import inspect
+import os
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .access import EARTH_RADIUS_KM, _lonlat_to_xyz, _point_coordinates, geometry_cache
+from .assess import _finish_figure, _new_figure, _render_batch, _safe_filename
+from .config import config
+from .profiling import profiled
+
+# Indicators combined into Priority_Score; 'Accessibility' is scored inverted
+score_indicators = [
+    "Facility_Ratio",
+    "Accessibility",
+    "Scarcity",
+    "Vulnerability_raw",
+    "LowStaff_Ratio",
+]
+default_weights = {
+    "Facility_Ratio": 0.3,
+    "Accessibility": 0.2,
+    "Scarcity": 0.2,
+    "Vulnerability_raw": 0.15,
+    "LowStaff_Ratio": 0.1,
+}
+
+# Cleaned preprocess inputs the derived indicators are computed from
+indicator_inputs = [
+    "2025_Projected_Population",
+    "Total_number_of_facilities",
+    "Health_Facilities_distance",
+    "Percentage_of_scarcity",
+    "Have_ever_had_a_pregnancy_loss",
+    "Number_of_women_with_underage_pregnancy",
+    "Number_of_women_5",
+    "Ever_got_underage_pregnancy(%)",
+    "LowStaff_Facilities",
+    "Total_Level2_Facilities",
+]
+# Numeric inputs coerced by preprocess, and those whose missing values mean zero
+num_cols = [
+    "Population_density",
+    "Health_Facilities_distance",
+    "Total_number_of_facilities",
+    "insurance_covered_population",
+    "Facilities_Completed",
+    "Facilities_Closed",
+    "2025_Projected_Population",
+    "Have_ever_had_a_pregnancy_loss",
+    "Number_of_women_with_underage_pregnancy",
+    "Total_Level2_Facilities",
+    "LowStaff_Facilities",
+    "Percentage_of_scarcity",
+    "Ever_got_underage_pregnancy(%)",
+    "Number_of_women_5",
+]
+fill_zero_cols = [
+    "Total_number_of_facilities",
+    "Facilities_Completed",
+    "Facilities_Closed",
+    "Total_Level2_Facilities",
+    "LowStaff_Facilities",
+    "Number_of_women_5",
+    "2025_Projected_Population",
+    "Population_density",
+]
+# Input columns each derived indicator depends on, used by update()
+indicator_dependencies = {
+    "Facility_Ratio": ["2025_Projected_Population", "Total_number_of_facilities"],
+    "Accessibility": ["Health_Facilities_distance"],
+    "Scarcity": ["Percentage_of_scarcity"],
+    "Vulnerability_raw": [
+        "Have_ever_had_a_pregnancy_loss",
+        "Number_of_women_with_underage_pregnancy",
+        "Number_of_women_5",
+        "Ever_got_underage_pregnancy(%)",
+    ],
+    "LowStaff_Ratio": ["LowStaff_Facilities", "Total_Level2_Facilities"],
+}
+# Default relative (1 sd) uncertainty of the inputs perturbed by rank_stability
+default_uncertainty = {
+    "2025_Projected_Population": 0.05,
+    "Health_Facilities_distance": 0.10,
+    "Have_ever_had_a_pregnancy_loss": 0.10,
+    "Ever_got_underage_pregnancy(%)": 0.10,
+}
+
+# Columns preprocess requires
+expected_cols = [
+    "Shape_Leng",
+    "Shape_Area",
+    "County",
+    "ADM1_PCODE",
+    "ADM1_REF",
+    "ADM1ALT1EN",
+    "ADM1ALT2EN",
+    "ADM0_EN",
+    "ADM0_PCODE",
+    "date",
+    "validOn",
+    "validTo",
+    "Population_density",
+    "Health_Facilities_distance",
+    "geometry",
+    "Total_number_of_facilities",
+    "insurance_covered_population",
+    "Facilities_Completed",
+    "Facilities_Closed",
+    "2025_Projected_Population",
+    "Have_ever_had_a_pregnancy_loss",
+    "Number_of_women_with_underage_pregnancy",
+    "Total_Level2_Facilities",
+    "LowStaff_Facilities",
+    "Percentage_of_scarcity",
+    "Ever_got_underage_pregnancy(%)",
+    "Number_of_women_5",
+]
+# Whole-number counts stored as int32 in compact mode; other numbers use float32
+count_cols = [
+    "Total_number_of_facilities",
+    "Facilities_Completed",
+    "Facilities_Closed",
+    "2025_Projected_Population",
+    "Number_of_women_with_underage_pregnancy",
+    "Total_Level2_Facilities",
+    "LowStaff_Facilities",
+    "Number_of_women_5",
+]
+# Admin string columns stored as categoricals in compact mode
+admin_cols = [
+    "County",
+    "ADM1_PCODE",
+    "ADM1_REF",
+    "ADM1ALT1EN",
+    "ADM1ALT2EN",
+    "ADM0_EN",
+    "ADM0_PCODE",
+    "date",
+    "validOn",
+    "validTo",
+]
+
+# Features clustered by cluster_counties
+cluster_features = [
+    "Facility_Ratio",
+    "Accessibility",
+    "Scarcity",
+    "Vulnerability_raw",
+    "LowStaff_Ratio",
+    "Population_density",
+]
+# Inputs with more rows than this use MiniBatchKMeans when method='auto'
+minibatch_threshold = 10000
+# Fitted cluster models kept, keyed by (feature fingerprint, n_clusters, method,
+# warm-start centroids fingerprint)
+cluster_model_cache_size = 32
+_cluster_model_cache: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _minmax(X: np.ndarray, axis: int = 0) -> Any:
+    """Min-max scale X along axis, mapping constant slices to 0 as MinMaxScaler does."""
+    lo = X.min(axis=axis, keepdims=True)
+    span = X.max(axis=axis, keepdims=True) - lo
+    return (X - lo) / np.where(span == 0, 1, span)
+
+
+def _fits_integer(values: np.ndarray, dtype: Any = np.int32) -> bool:
+    """Return True when every value is a finite integer within the range of ``dtype``."""
+    values = np.asarray(values, dtype=float)
+    info = np.iinfo(dtype)
+    return bool(
+        np.isfinite(values).all()
+        and np.array_equal(values, np.round(values))
+        and (
+            values.size == 0 or (values.min() >= info.min and values.max() <= info.max)
+        )
+    )
+
+
+def _downcast(series: pd.Series, col: str) -> pd.Series:
+    """Store a count column as int32 when its values fit, and any other column as float32."""
+    if col in count_cols and _fits_integer(series.to_numpy(dtype=float)):
+        return series.astype(np.int32)
+    return series.astype(np.float32)
+
+
+def _copy_on_write() -> bool:
+    """Return True when pandas copy-on-write is on: always from pandas 3, opt-in before."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def _derive_indicators(inputs: Any) -> Dict[str, Any]:
+    """
+    Compute the derived indicators from cleaned inputs.
+
+    Works on arrays of any shape whose last axis is counties, so a batch of
+    perturbed inputs with shape (n_draws, n_counties) is handled in one call.
+    """
+    women = inputs["Number_of_women_5"]
+    women = np.where(np.isnan(women) | (women == 0), 1, women)
+    return {
+        "Facility_Ratio": inputs["2025_Projected_Population"]
+        / (inputs["Total_number_of_facilities"] + 1),
+        "Accessibility": 1 / (inputs["Health_Facilities_distance"] + 1),
+        "Scarcity": np.nan_to_num(inputs["Percentage_of_scarcity"]),
+        "Vulnerability_raw": (
+            np.nan_to_num(inputs["Have_ever_had_a_pregnancy_loss"]) * 0.5
+            + (np.nan_to_num(inputs["Number_of_women_with_underage_pregnancy"]) / women)
+            * 0.3
+            + np.nan_to_num(inputs["Ever_got_underage_pregnancy(%)"]) * 0.2
+        ),
+        "LowStaff_Ratio": inputs["LowStaff_Facilities"]
+        / (inputs["Total_Level2_Facilities"] + 1),
+    }
+
+
+def _normalize_indicators(X: np.ndarray) -> np.ndarray:
+    """Min-max normalise indicators (..., n_counties, 5) over counties and invert Accessibility."""
+    X = _minmax(np.nan_to_num(X), axis=-2)
+    X[..., 1] = 1 - X[..., 1]
+    return X
+
+
+def _rank_stability_batch(
+    inputs: Dict[str, np.ndarray],
+    uncertainty: Dict[str, float],
+    w: np.ndarray,
+    top_n: int,
+    n_draws: int,
+    seed: Any,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score one batch of perturbed inputs and tally the resulting ranks.
+
+    Returns:
+        tuple: (rank_counts, top_counts); rank_counts[i, r] counts draws where county i
+            ranked r+1, top_counts[i] counts draws where it ranked within top_n.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(next(iter(inputs.values())))
+    batch = dict(inputs)
+    for col, sigma in uncertainty.items():
+        # Mean-preserving multiplicative lognormal noise keeps counts and rates positive
+        noise = np.exp(sigma * rng.standard_normal((n_draws, n)) - sigma**2 / 2)
+        batch[col] = inputs[col] * noise
+    derived = _derive_indicators(batch)
+    X = np.stack(
+        [np.broadcast_to(derived[k], (n_draws, n)) for k in score_indicators], axis=-1
+    )
+    scores = _minmax(_normalize_indicators(X) @ w, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    rank_counts = np.zeros((n, n), dtype=np.int64)
+    np.add.at(rank_counts, (order, np.arange(n)[None, :]), 1)
+    return rank_counts, rank_counts[:, :top_n].sum(axis=1)
+
+
+def _feature_fingerprint(X: np.ndarray) -> str:
+    """Return a content hash of a feature matrix."""
+    X = np.ascontiguousarray(X)
+    return hashlib.blake2b(
+        X.tobytes() + str(X.shape).encode(), digest_size=16
+    ).hexdigest()
+
+
+def _resolve_cluster_method(method: str, n_rows: int) -> str:
+    if method == "auto":
+        return "minibatch" if n_rows > minibatch_threshold else "kmeans"
+    if method not in ("kmeans", "minibatch"):
+        raise ValueError("method must be 'auto', 'kmeans' or 'minibatch'")
+    return method
+
+
+def _fit_kmeans(
+    X: np.ndarray,
+    n_clusters: int,
+    method: str,
+    init: Any = "k-means++",
+    batch_size: int = 1024,
+) -> Any:
+    """Fit a full-batch or mini-batch KMeans model; explicit centroids need a single init."""
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    n_init = 1 if not isinstance(init, str) else None
+    if method == "minibatch":
+        model = MiniBatchKMeans(
+            n_clusters=n_clusters,
+            init=init,
+            n_init=n_init or 3,
+            batch_size=batch_size,
+            random_state=42,
+        )
+    else:
+        model = KMeans(
+            n_clusters=n_clusters, init=init, n_init=n_init or 10, random_state=42
+        )
+    return model.fit(X)
+
+
+def _warm_start_init(previous: Any, params: Dict[str, Any]) -> Any:
+    """Centroids of the previous fit that a warm-started clustering starts from, or None."""
+    if (
+        params["warm_start"]
+        and previous is not None
+        and previous.n_clusters == params["n_clusters"]
+    ):
+        return previous.cluster_centers_
+    return None
+
+
+def _score_n_clusters(
+    X: np.ndarray, k: int, method: str, sample_size: int
+) -> Dict[str, Any]:
+    """Fit k clusters and return the inertia and (sampled) silhouette score."""
+    from sklearn.metrics import silhouette_score
+
+    model = _fit_kmeans(X, k, method)
+    sample = sample_size if len(X) > sample_size else None
+    return {
+        "n_clusters": k,
+        "inertia": model.inertia_,
+        "silhouette": silhouette_score(
+            X, model.labels_, sample_size=sample, random_state=42
+        ),
+    }
+
+
+def _additional_facilities(
+    projected_pop: np.ndarray, current_fac: np.ndarray, people_per_facility: Any
+) -> Any:
+    """Return extra facilities needed as an (n_counties x n_thresholds) int64 array."""
+    thresholds = np.atleast_1d(np.asarray(people_per_facility, dtype=float))
+    target_facilities = np.ceil(
+        projected_pop[:, None] / np.where(thresholds > 0, thresholds, 1)[None, :]
+    )
+    return np.maximum(0, target_facilities - np.trunc(current_fac)[:, None]).astype(
+        np.int64
+    )
+
+
+def _render_scenario_map(
+    shared: Dict[str, Any], scenario: Any, name: str, path: str
+) -> str:
+    """Draw one scenario's priority choropleth headless and save it to ``path``."""
+    import geopandas as gpd
+
+    outlines, scores = shared
+    fig = _new_figure((9, 9), show=False)
+    ax = fig.add_subplot()
+    frame = gpd.GeoDataFrame({"Priority_Score": scores[scenario]}, geometry=outlines)
+    frame.plot(column="Priority_Score", cmap="Reds", legend=True, vmin=0, vmax=1, ax=ax)
+    ax.set_title(f"Priority Score - {name}")
+    ax.axis("off")
+    _finish_figure(fig, show=False, path=path)
+    return path
+
+
+class StageCache:
+    """
+    Memo store for optimizer stage results: an in-memory LRU plus an optional on-disk store.
+
+    Entries are keyed by a content hash of a stage's input columns and its
+    parameters, so rerunning a notebook or batch job on unchanged data reuses
+    earlier outputs. Entries are held pickled, so callers never share mutable
+    state with the cache, and each store evicts its least recently used
+    entries once it grows beyond ``max_bytes``.
+    """
+
+    def __init__(
+        self, max_bytes: Optional[int] = None, directory: Optional[str] = None
+    ) -> None:
+        """
+        Parameters:
+            max_bytes (int): Size limit in bytes of each store (default:
+                ``stage_cache_max_bytes``).
+            directory (str): Optional directory persisting entries as pickle files.
+        """
+        self.max_bytes = int(
+            max_bytes
+            if max_bytes is not None
+            else config.get("stage_cache_max_bytes", 256 * 1024**2)
+        )
+        self.directory = (
+            os.path.expanduser(os.path.expandvars(directory)) if directory else None
+        )
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the entry for key, or None."""
+        blob = self._entries.get(key)
+        if blob is not None:
+            self._entries.move_to_end(key)
+        elif self.directory:
+            path = os.path.join(self.directory, f"{key}.pkl")
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as file:
+                blob = file.read()
+            os.utime(path)  # Recently used, for the disk store's eviction order
+            self._remember(key, blob)
+        else:
+            return None
+        entry: Dict[str, Any] = pickle.loads(blob)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store a copy of entry under key."""
+        blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, blob)
+        if self.directory and len(blob) <= self.max_bytes:
+            path = os.path.join(self.directory, f"{key}.pkl")
+            with open(f"{path}.{os.getpid()}.tmp", "wb") as file:
+                file.write(blob)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+            self._evict_disk(keep=path)
+
+    def clear(self) -> None:
+        """Drop every in-memory and on-disk entry."""
+        self._entries.clear()
+        self._bytes = 0
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def size(self) -> int:
+        """Return the total size in bytes of the in-memory entries."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        if len(blob) > self.max_bytes:
+            return
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _evict_disk(self, keep: Optional[str] = None) -> None:
+        assert self.directory is not None
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+# Shared by optimizers constructed with stage_cache=True
+default_stage_cache = StageCache(directory=config.get("stage_cache_dir"))
+
+
+def _param_token(value: Any) -> str:
+    if isinstance(value, np.ndarray):
+        return f"{value.dtype.str}{value.shape}{value.tobytes().hex()}"
+    if isinstance(value, dict):
+        return repr(sorted((k, _param_token(v)) for k, v in value.items()))
+    return repr(value)
+
+
+def _stage_key(
+    stage: str, frame: pd.DataFrame, columns: Sequence[str], params: Dict[str, Any]
+) -> str:
+    """Hash a stage name, the content of its input columns and its parameters."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(
+        repr((stage, list(columns), [str(frame[c].dtype) for c in columns])).encode()
+    )
+    digest.update(
+        pd.util.hash_pandas_object(frame[list(columns)], index=False)
+        .to_numpy()
+        .tobytes()
+    )
+    digest.update(_param_token(params).encode())
+    return digest.hexdigest()
+
+
+def _memoized_stage(
+    inputs: Sequence[str],
+    outputs: Union[Sequence[str], Callable[[Dict[str, Any]], Sequence[str]]],
+    attrs: Union[Sequence[str], Callable[[Dict[str, Any]], Sequence[str]]] = (),
+    requires: Sequence[str] = (),
+    state: Optional[Callable[[Any, Dict[str, Any]], Any]] = None,
+) -> Callable[[F], F]:
+    """
+    Memoise an optimizer stage in its stage cache.
+
+    Every column the stage writes must be one of its inputs or a function of
+    them, since a cache hit restores them all.
+
+    Parameters:
+        inputs (list): Columns of ``self.counties`` the stage reads.
+        outputs (list or callable): Columns it writes, or a function of the bound
+            parameters returning them.
+        attrs (tuple or callable): Optimizer attributes it sets, or a function of the
+            bound parameters returning them; restored alongside the columns.
+        requires (list): Columns that must be present; checked before the cache lookup.
+        state (callable): ``state(self, params)`` returning optimizer state the result
+            also depends on (e.g. a previous fit), hashed into the key.
+    """
+
+    def decorator(method: F) -> F:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            missing = [c for c in requires if c not in self.counties.columns]
+            if missing:
+                raise ValueError(f"Missing expected columns: {missing}")
+            cache = self.stage_cache
+            if cache is None or any(c not in self.counties.columns for c in inputs):
+                result = method(self, *args, **kwargs)
+                self._record_memory(method.__name__)
+                return result
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k != "self"}
+            # Compact and full-precision runs produce different column dtypes
+            extra = {"_compact": self.compact}
+            if state is not None:
+                extra["_state"] = state(self, params)
+            key = _stage_key(
+                method.__name__, self.counties, inputs, {**params, **extra}
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                for col, values in entry["columns"].items():
+                    self.counties[col] = values
+                for name, value in entry["attrs"].items():
+                    setattr(self, name, value)
+                self._record_memory(method.__name__)
+                return entry["result"]
+
+            result = method(self, *args, **kwargs)
+            written = outputs(params) if callable(outputs) else outputs
+            assigned = attrs(params) if callable(attrs) else attrs
+            cache.put(
+                key,
+                {
+                    "columns": {c: self.counties[c].array for c in written},
+                    "attrs": {name: getattr(self, name) for name in assigned},
+                    "result": result,
+                },
+            )
+            self._record_memory(method.__name__)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _optimizer_frame(args: Tuple[Any, ...], kwargs: Dict[str, Any], result: Any) -> Any:
+    """Frame whose size is recorded for a profiled optimizer stage: its counties table."""
+    return args[0].counties
+
 
 class HealthFacilityOptimizer:
-    def __init__(self, gdf):
+    def __init__(
+        self,
+        gdf: Any,
+        stage_cache: Union[StageCache, None, bool] = None,
+        compact: bool = False,
+        report_memory: Optional[bool] = None,
+    ) -> None:
         """
         Initialize with a GeoDataFrame containing the required columns.
+
+        Parameters:
+            gdf (GeoDataFrame): County-level inputs.
+            stage_cache (StageCache or bool): Memo store for stage results; True uses
+                the shared ``default_stage_cache``. Off by default (None or False),
+                since hashing the inputs costs more than recomputing cheap stages.
+            compact (bool): Store counts as int32, other numeric columns as float32 and
+                admin strings as categoricals, and share ``gdf``'s data instead of
+                deep-copying it when pandas copy-on-write is on (always from pandas 3).
+            report_memory (bool): Record the frame's deep memory use after each stage in
+                ``memory_report``; defaults to ``compact``.
         """
-        self.counties = gdf.copy()
-        self.summary = None
-        self.cluster_stats = None
+        self.compact = compact
+        self.report_memory = compact if report_memory is None else report_memory
+        self.memory_report: List[Dict[str, Any]] = []
+        self.counties = gdf.copy(deep=not (compact and _copy_on_write()))
+        if stage_cache is True:
+            stage_cache = default_stage_cache
+        self.stage_cache = stage_cache if isinstance(stage_cache, StageCache) else None
+        self.summary: Any = None
+        self.cluster_stats: Any = None
+        self.rank_distribution: Any = None
+        self.cluster_model: Any = None
+        self.cluster_scaler: Any = None
+        self._cluster_params: Any = None
+        self._score_state: Any = None
+        self._people_per_facility: Any = None
+        self._record_memory("init")
 
-    def preprocess(self):
+    @profiled(frame=_optimizer_frame)
+    @_memoized_stage(
+        inputs=num_cols + admin_cols,
+        outputs=num_cols + list(indicator_dependencies) + admin_cols,
+        requires=expected_cols,
+    )
+    def preprocess(self) -> None:
         """Coerce numeric columns, fill missing values, and compute derived indicators."""
-        expected_cols = [
-            'Shape_Leng','Shape_Area','County','ADM1_PCODE','ADM1_REF','ADM1ALT1EN','ADM1ALT2EN',
-            'ADM0_EN','ADM0_PCODE','date','validOn','validTo','Population_density',
-            'Health_Facilities_distance','geometry','Total_number_of_facilities',
-            'insurance_covered_population','Facilities_Completed','Facilities_Closed',
-            '2025_Projected_Population','Have_ever_had_a_pregnancy_loss',
-            'Number_of_women_with_underage_pregnancy','Total_Level2_Facilities',
-            'LowStaff_Facilities','Percentage_of_scarcity','Ever_got_underage_pregnancy(%)',
-            'Number_of_women_5'
-        ]
-        missing = [c for c in expected_cols if c not in self.counties.columns]
-        if missing:
-            raise ValueError(f"Missing expected columns: {missing}")
-
         # Numeric coercion
-        num_cols = [
-            'Population_density','Health_Facilities_distance','Total_number_of_facilities',
-            'insurance_covered_population','Facilities_Completed','Facilities_Closed',
-            '2025_Projected_Population','Have_ever_had_a_pregnancy_loss',
-            'Number_of_women_with_underage_pregnancy','Total_Level2_Facilities',
-            'LowStaff_Facilities','Percentage_of_scarcity','Ever_got_underage_pregnancy(%)',
-            'Number_of_women_5'
-        ]
         for col in num_cols:
-            self.counties[col] = pd.to_numeric(self.counties[col], errors='coerce')
+            self.counties[col] = pd.to_numeric(self.counties[col], errors="coerce")
 
         # Fill sensible defaults
-        fill_zero_cols = [
-            'Total_number_of_facilities','Facilities_Completed','Facilities_Closed',
-            'Total_Level2_Facilities','LowStaff_Facilities','Number_of_women_5'
-        ]
         for c in fill_zero_cols:
             self.counties[c] = self.counties[c].fillna(0)
-        self.counties['2025_Projected_Population'] = self.counties['2025_Projected_Population'].fillna(0)
-        self.counties['Population_density'] = self.counties['Population_density'].fillna(0)
-        if self.counties['Health_Facilities_distance'].isna().any():
-            maxd = self.counties['Health_Facilities_distance'].max(skipna=True)
+        if self.counties["Health_Facilities_distance"].isna().any():
+            maxd = self.counties["Health_Facilities_distance"].max(skipna=True)
             if pd.isna(maxd):
                 maxd = 1.0
-            self.counties['Health_Facilities_distance'] = self.counties['Health_Facilities_distance'].fillna(maxd*1.2)
+            self.counties["Health_Facilities_distance"] = self.counties[
+                "Health_Facilities_distance"
+            ].fillna(maxd * 1.2)
 
         # Derived indicators
-        self.counties['Facility_Ratio'] = self.counties['2025_Projected_Population'] / (self.counties['Total_number_of_facilities'] + 1)
-        self.counties['Accessibility'] = 1 / (self.counties['Health_Facilities_distance'] + 1)
-        self.counties['Scarcity'] = self.counties['Percentage_of_scarcity'].fillna(0)
-        self.counties['Vulnerability_raw'] = (
-            self.counties['Have_ever_had_a_pregnancy_loss'].fillna(0)*0.5 +
-            (self.counties['Number_of_women_with_underage_pregnancy'].fillna(0) / self.counties['Number_of_women_5'].replace(0,np.nan).fillna(1))*0.3 +
-            self.counties['Ever_got_underage_pregnancy(%)'].fillna(0)*0.2
-        )
-        self.counties['LowStaff_Ratio'] = self.counties['LowStaff_Facilities'] / (self.counties['Total_Level2_Facilities'] + 1)
-
-    def normalize_and_score(self):
-        """Normalize key indicators and compute composite Priority_Score."""
-        scaler = MinMaxScaler()
-        to_normalize = ['Facility_Ratio','Accessibility','Scarcity','Vulnerability_raw','LowStaff_Ratio','Population_density']
-        counties_norm = self.counties.copy()
-        counties_norm[to_normalize] = scaler.fit_transform(counties_norm[to_normalize].fillna(0))
-        counties_norm['Inverted_Accessibility'] = 1 - counties_norm['Accessibility']
-
-        weights = {'Facility_Ratio':0.3,'Accessibility':0.2,'Scarcity':0.2,'Vulnerability_raw':0.15,'LowStaff_Ratio':0.1}
-        counties_norm['Priority_Score_raw'] = (
-            weights['Facility_Ratio']*counties_norm['Facility_Ratio'] +
-            weights['Accessibility']*counties_norm['Inverted_Accessibility'] +
-            weights['Scarcity']*counties_norm['Scarcity'] +
-            weights['Vulnerability_raw']*counties_norm['Vulnerability_raw'] +
-            weights['LowStaff_Ratio']*counties_norm['LowStaff_Ratio']
-        )
-        counties_norm['Priority_Score'] = MinMaxScaler().fit_transform(counties_norm[['Priority_Score_raw']])
-        self.counties['Priority_Score'] = counties_norm['Priority_Score']
-
-    def cluster_counties(self, n_clusters=3):
-        """Apply KMeans clustering to priority features."""
-        features_for_clustering = ['Facility_Ratio','Accessibility','Scarcity','Vulnerability_raw','LowStaff_Ratio','Population_density']
-        cluster_scaler = StandardScaler()
-        X = cluster_scaler.fit_transform(self.counties[features_for_clustering].fillna(0))
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        self.counties['Cluster'] = kmeans.fit_predict(X)
-
-    def suggest_new_facilities(self, people_per_facility=30000):
-        """Compute suggested new facilities per county."""
-        def compute_additional_facilities(row, desired=people_per_facility):
-            projected_pop = row['2025_Projected_Population']
-            current_fac = row['Total_number_of_facilities']
-            target_facilities = math.ceil(projected_pop / (desired if desired>0 else 1))
-            additional_needed = max(0, target_facilities - int(current_fac))
-            return additional_needed
-        self.counties['Suggested_New_Facilities'] = self.counties.apply(lambda r: compute_additional_facilities(r), axis=1)
-
-    def get_summary(self, top_n=10):
+        inputs = {c: self.counties[c].to_numpy(dtype=float) for c in indicator_inputs}
+        for name, values in _derive_indicators(inputs).items():
+            self.counties[name] = values
+        if self.compact:
+            self._compact_columns()
+
+    def _compact_columns(self) -> None:
+        """Downcast numeric columns to 32 bits and admin strings to categoricals."""
+        for col in num_cols + list(indicator_dependencies):
+            self.counties[col] = _downcast(self.counties[col], col)
+        for col in admin_cols:
+            if col in self.counties.columns and not isinstance(
+                self.counties[col].dtype, pd.CategoricalDtype
+            ):
+                self.counties[col] = self.counties[col].astype("category")
+
+    def _column_values(self, values: Any) -> Any:
+        """Float results in the optimizer's storage precision."""
+        return np.asarray(values, dtype=np.float32) if self.compact else values
+
+    def _count_values(self, values: Any) -> Any:
+        """Whole-number results as int32 in compact mode when they fit."""
+        values = np.asarray(values)
+        if self.compact and _fits_integer(values):
+            return values.astype(np.int32)
+        return values
+
+    def _set_rows(self, rows: pd.Index, col: str, values: Any) -> None:
+        """
+        Write ``values`` into ``rows`` of ``col``, keeping the column's dtype.
+
+        An integer column receiving values it cannot hold exactly (fractions,
+        NaN) is first converted to float (float32 in compact mode).
+        """
+        column = self.counties.columns.get_loc(col)
+        values = np.asarray(values)
+        dtype = self.counties[col].dtype
+        if (
+            isinstance(dtype, np.dtype)
+            and dtype.kind in "iu"
+            and not _fits_integer(values, dtype)
+        ):
+            dtype = np.dtype(np.float32 if self.compact else float)
+            self.counties[col] = self.counties[col].astype(dtype)
+        if isinstance(dtype, np.dtype) and dtype != values.dtype:
+            values = values.astype(dtype)
+        self.counties.iloc[rows, column] = values
+
+    def _record_memory(self, stage: str) -> None:
+        """Append the frame's deep memory use after ``stage`` to ``memory_report``."""
+        if not self.report_memory:
+            return
+        usage = self.counties.memory_usage(deep=True)
+        self.memory_report.append(
+            {
+                "stage": stage,
+                "bytes": int(usage.sum()),
+                "columns": len(self.counties.columns),
+            }
+        )
+
+    @profiled(frame=_optimizer_frame)
+    @_memoized_stage(
+        inputs=score_indicators, outputs=["Priority_Score"], attrs=("_score_state",)
+    )
+    def normalize_and_score(self, weights: Optional[Dict[str, float]] = None) -> None:
+        """
+        Normalize key indicators and compute composite Priority_Score.
+
+        Parameters:
+            weights (dict): Overrides for ``default_weights``, keyed by indicator.
+        """
+        weights = {**default_weights, **(weights or {})}
+        w = np.array([weights[k] for k in score_indicators])
+        X = self.counties[score_indicators].fillna(0).to_numpy(dtype=float)
+        raw = _normalize_indicators(X) @ w
+        # Keep the global normalisation statistics so update() can rescore rows in place
+        self._score_state = {
+            "weights": weights,
+            "lo": X.min(axis=0),
+            "hi": X.max(axis=0),
+            "raw": raw,
+            "raw_lo": raw.min(),
+            "raw_hi": raw.max(),
+        }
+        self.counties["Priority_Score"] = self._column_values(_minmax(raw, axis=0))
+
+    def score_scenarios(self, weights: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score many weightings of the indicators at once.
+
+        The indicators are normalised once into an (n_counties x 5) matrix and
+        every scenario is scored with a single matrix product, so sweeping
+        hundreds of weightings costs little more than one.
+
+        Parameters:
+            weights (array-like or pd.DataFrame): (n_scenarios x 5) weight matrix with
+                columns in ``score_indicators`` order, or a DataFrame with those columns.
+
+        Returns:
+            tuple: (scores, ranks) arrays of shape (n_scenarios, n_counties). Scores are
+                float32 rescaled to 0-1 per scenario, as Priority_Score; ranks are int32
+                with 1 for the highest-priority county.
+        """
+        scores = self._score_matrix(weights)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        ranks = np.empty(scores.shape, dtype=np.int32)
+        np.put_along_axis(
+            ranks,
+            order,
+            np.arange(1, scores.shape[1] + 1, dtype=np.int32)[None, :],
+            axis=1,
+        )
+        return scores.astype(np.float32), ranks
+
+    def _normalized_indicators(self) -> np.ndarray:
+        """Return the min-max normalised score indicators as an (n_counties x 5) array."""
+        return _normalize_indicators(
+            self.counties[score_indicators].to_numpy(dtype=float)
+        )
+
+    def _score_matrix(self, weights: Any) -> Any:
+        """Return float64 scenario scores of shape (n_scenarios, n_counties)."""
+        if isinstance(weights, pd.DataFrame):
+            weights = weights[score_indicators]
+        W = np.atleast_2d(np.asarray(weights, dtype=float))
+        if W.shape[1] != len(score_indicators):
+            raise ValueError(
+                f"weights must have {len(score_indicators)} columns: {score_indicators}"
+            )
+        return _minmax(W @ self._normalized_indicators().T, axis=1)
+
+    def rank_stability(
+        self,
+        n_draws: int = 2000,
+        top_n: int = 10,
+        uncertainty: Optional[Dict[str, float]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        batch_size: int = 250,
+        n_jobs: Optional[int] = None,
+        seed: int = 42,
+    ) -> pd.DataFrame:
+        """
+        Monte Carlo sensitivity of the priority ranking to uncertain inputs.
+
+        Each draw perturbs the preprocess inputs with mean-preserving lognormal
+        noise and re-runs the indicator -> normalise -> score pipeline. Draws
+        are evaluated vectorised in batches, and batches are spread over a
+        process pool. Every batch gets its own child of ``seed``, so results
+        do not depend on ``n_jobs``.
+
+        Parameters:
+            n_draws (int): Number of perturbed input sets.
+            top_n (int): Size of the top group whose membership probability is reported.
+            uncertainty (dict): Relative standard deviation per input column
+                (default: ``default_uncertainty``).
+            weights (dict): Overrides for ``default_weights``.
+            batch_size (int): Draws scored together in one vectorised batch.
+            n_jobs (int): Worker processes; 1 runs in-process (default: CPU count).
+            seed (int): Seed for reproducible draws.
+
+        Returns:
+            pd.DataFrame: Per county: baseline rank, mean rank, 5th/95th percentile rank
+                and probability of being in the top N, sorted by that probability.
+                The full rank distribution (counties x ranks) is kept in
+                ``self.rank_distribution``.
+        """
+        if "Facility_Ratio" not in self.counties.columns:
+            raise ValueError("Run preprocess() before rank_stability()")
+        uncertainty = default_uncertainty if uncertainty is None else uncertainty
+        unknown = [c for c in uncertainty if c not in indicator_inputs]
+        if unknown:
+            raise ValueError(
+                f"Cannot perturb {unknown}; choose from {indicator_inputs}"
+            )
+        weights = {**default_weights, **(weights or {})}
+        w = np.array([weights[k] for k in score_indicators])
+        inputs = {c: self.counties[c].to_numpy(dtype=float) for c in indicator_inputs}
+
+        sizes = [
+            min(batch_size, n_draws - start) for start in range(0, n_draws, batch_size)
+        ]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = [
+            (inputs, uncertainty, w, top_n, size, child)
+            for size, child in zip(sizes, seeds)
+        ]
+        n_jobs = n_jobs or os.cpu_count() or 1
+        if n_jobs == 1 or len(args) == 1:
+            results = [_rank_stability_batch(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(args))) as pool:
+                results = list(pool.map(_rank_stability_batch, *zip(*args)))
+        rank_counts = functools.reduce(np.add, (r[0] for r in results))
+        top_counts = sum(r[1] for r in results)
+
+        n = len(self.counties)
+        ranks = np.arange(1, n + 1)
+        cumulative = rank_counts.cumsum(axis=1) / n_draws
+        baseline = _minmax(self._normalized_indicators() @ w, axis=0)
+        baseline_rank = np.empty(n, dtype=int)
+        baseline_rank[np.argsort(-baseline, kind="stable")] = ranks
+        self.rank_distribution = pd.DataFrame(
+            rank_counts / n_draws,
+            index=self.counties["County"].to_numpy(),
+            columns=ranks,
+        )
+        return (
+            pd.DataFrame(
+                {
+                    "County": self.counties["County"].to_numpy(),
+                    "Baseline_Rank": baseline_rank,
+                    "Mean_Rank": rank_counts @ ranks / n_draws,
+                    "Rank_p05": ranks[(cumulative < 0.05).sum(axis=1)],
+                    "Rank_p95": ranks[(cumulative < 0.95).sum(axis=1)],
+                    f"P_Top_{top_n}": top_counts / n_draws,
+                }
+            )
+            .sort_values(f"P_Top_{top_n}", ascending=False, kind="stable")
+            .reset_index(drop=True)
+        )
+
+    @profiled(frame=_optimizer_frame)
+    @_memoized_stage(
+        inputs=cluster_features,
+        outputs=["Cluster"],
+        attrs=("cluster_model", "cluster_scaler", "_cluster_params"),
+        state=lambda self, params: _warm_start_init(self.cluster_model, params),
+    )
+    def cluster_counties(
+        self,
+        n_clusters: int = 3,
+        method: str = "auto",
+        warm_start: bool = False,
+        batch_size: int = 1024,
+    ) -> None:
+        """
+        Apply KMeans clustering to priority features.
+
+        Fitted models are cached by a fingerprint of the standardised feature
+        matrix, so re-clustering unchanged data is free.
+
+        Parameters:
+            n_clusters (int): Number of clusters.
+            method (str): 'kmeans' (full batch, n_init=10), 'minibatch' (MiniBatchKMeans
+                for large inputs) or 'auto' to pick by row count.
+            warm_start (bool): Start from the previous fit's centroids when it had the
+                same number of clusters; useful after small data changes.
+            batch_size (int): Mini-batch size for the 'minibatch' backend.
+        """
+        from sklearn.preprocessing import StandardScaler
+
+        self.cluster_scaler = StandardScaler().fit(
+            self.counties[cluster_features].fillna(0)
+        )
+        X = self.cluster_scaler.transform(self.counties[cluster_features].fillna(0))
+        method = _resolve_cluster_method(method, len(X))
+        init = _warm_start_init(
+            self.cluster_model, {"n_clusters": n_clusters, "warm_start": warm_start}
+        )
+        if init is not None and init.shape[1] != X.shape[1]:
+            init = None
+        warm = None if init is None else _feature_fingerprint(init)
+        key = (_feature_fingerprint(X), n_clusters, method, warm)
+        model = _cluster_model_cache.get(key)
+        if model is None:
+            model = _fit_kmeans(
+                X,
+                n_clusters,
+                method,
+                init="k-means++" if init is None else init,
+                batch_size=batch_size,
+            )
+            _cluster_model_cache[key] = model
+            while len(_cluster_model_cache) > cluster_model_cache_size:
+                _cluster_model_cache.popitem(last=False)
+        else:
+            _cluster_model_cache.move_to_end(key)
+        self.cluster_model = model
+        self._cluster_params = {
+            "n_clusters": n_clusters,
+            "method": method,
+            "batch_size": batch_size,
+        }
+        self.counties["Cluster"] = model.labels_
+
+    def select_n_clusters(
+        self,
+        k_values: Iterable[int] = range(2, 11),
+        method: str = "auto",
+        n_jobs: Optional[int] = None,
+        sample_size: int = 10000,
+    ) -> pd.DataFrame:
+        """
+        Sweep candidate cluster counts in parallel and score each fit.
+
+        Parameters:
+            k_values (iterable): Cluster counts to try.
+            method (str): Backend as in cluster_counties.
+            n_jobs (int): Parallel jobs (joblib semantics; default: all CPUs).
+            sample_size (int): Rows sampled for the silhouette score on large inputs.
+
+        Returns:
+            pd.DataFrame: One row per k with inertia and silhouette score.
+        """
+        from joblib import Parallel, delayed
+
+        X = self._cluster_matrix()
+        method = _resolve_cluster_method(method, len(X))
+        rows = Parallel(n_jobs=n_jobs or -1)(
+            delayed(_score_n_clusters)(X, k, method, sample_size) for k in k_values
+        )
+        return pd.DataFrame(rows)
+
+    def _cluster_matrix(self) -> Any:
+        """Return the standardised clustering features as an array (scaler not kept)."""
+        from sklearn.preprocessing import StandardScaler
+
+        return StandardScaler().fit_transform(self.counties[cluster_features].fillna(0))
+
+    @profiled(frame=_optimizer_frame)
+    @_memoized_stage(
+        inputs=["2025_Projected_Population", "Total_number_of_facilities"],
+        outputs=lambda params: (
+            ["Suggested_New_Facilities"]
+            if np.ndim(params["people_per_facility"]) == 0
+            else []
+        ),
+        attrs=lambda params: (
+            ["_people_per_facility"]
+            if np.ndim(params["people_per_facility"]) == 0
+            else []
+        ),
+    )
+    def suggest_new_facilities(
+        self, people_per_facility: Any = 30000
+    ) -> Optional[pd.DataFrame]:
+        """
+        Compute suggested new facilities per county.
+
+        Parameters:
+            people_per_facility (int or array-like): People served per facility. A scalar
+                fills the Suggested_New_Facilities column; an array of service standards
+                is evaluated in one pass and returned as a table.
+
+        Returns:
+            pd.DataFrame or None: For an array, additional facilities needed with one row
+                per county (indexed by County) and one column per threshold.
+        """
+        additional_needed = _additional_facilities(
+            self.counties["2025_Projected_Population"].to_numpy(dtype=float),
+            self.counties["Total_number_of_facilities"].to_numpy(dtype=float),
+            people_per_facility,
+        )
+        if np.ndim(people_per_facility) == 0:
+            self.counties["Suggested_New_Facilities"] = self._count_values(
+                additional_needed[:, 0]
+            )
+            self._people_per_facility = people_per_facility
+            return None
+        return pd.DataFrame(
+            additional_needed,
+            index=pd.Index(self.counties["County"].to_numpy(), name="County"),
+            columns=pd.Index(
+                np.asarray(people_per_facility), name="people_per_facility"
+            ),
+        )
+
+    @profiled(frame=_optimizer_frame)
+    def update(self, updates: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Apply row-level input corrections and refresh derived outputs incrementally.
+
+        Only the indicators that depend on the updated columns are recomputed,
+        and only for the updated rows. Priority_Score is rescored row by row
+        unless an update moves an indicator's min/max (renormalise everything)
+        or the raw-score range (rescale the column). Clusters are refitted with
+        the last cluster_counties() parameters when the update changes the
+        feature scaling or an updated row's nearest centroid, so Cluster
+        matches a full run. Suggested_New_Facilities is refreshed for the
+        updated rows.
+
+        Parameters:
+            updates (pd.DataFrame): New input values, indexed like ``self.counties``.
+
+        Returns:
+            dict: What was recomputed: rows, indicators, rescored ('rows',
+                'rescaled', 'global' or None) and the number of rows whose cluster label
+                changed.
+        """
+        rows = self.counties.index.get_indexer(updates.index)
+        if (rows < 0).any():
+            raise KeyError(f"Unknown rows: {list(updates.index[rows < 0])}")
+        unknown = [c for c in updates.columns if c not in self.counties.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {unknown}")
+
+        for col in updates.columns:
+            values = updates[col]
+            if col in num_cols:
+                values = pd.to_numeric(values, errors="coerce")
+                if col in fill_zero_cols:
+                    values = values.fillna(0)
+                elif col == "Health_Facilities_distance":
+                    values = values.fillna(self.counties[col].max() * 1.2)
+            self._set_rows(rows, col, values.to_numpy())
+
+        changed = [
+            k
+            for k, deps in indicator_dependencies.items()
+            if set(deps) & set(updates.columns)
+        ]
+        report = {
+            "rows": len(rows),
+            "indicators": changed,
+            "rescored": None,
+            "reclustered": 0,
+        }
+        if changed and "Facility_Ratio" in self.counties.columns:
+            inputs = {
+                c: self.counties[c].to_numpy(dtype=float)[rows]
+                for c in indicator_inputs
+            }
+            derived = _derive_indicators(inputs)
+            for k in changed:
+                self._set_rows(rows, k, derived[k])
+            if self._score_state is not None:
+                report["rescored"] = self._rescore_rows(rows)
+        if self.cluster_model is not None and (
+            changed or "Population_density" in updates.columns
+        ):
+            report["reclustered"] = self._recluster_rows(rows)
+        if self._people_per_facility is not None and {
+            "2025_Projected_Population",
+            "Total_number_of_facilities",
+        } & set(updates.columns):
+            additional = _additional_facilities(
+                self.counties["2025_Projected_Population"].to_numpy(dtype=float)[rows],
+                self.counties["Total_number_of_facilities"].to_numpy(dtype=float)[rows],
+                self._people_per_facility,
+            )
+            self._set_rows(
+                rows, "Suggested_New_Facilities", self._count_values(additional[:, 0])
+            )
+        return report
+
+    def _rescore_rows(self, rows: pd.Index) -> str:
+        """Rescore updated rows, widening to a global pass only when the scaling changed."""
+        state = self._score_state
+        X = self.counties[score_indicators].fillna(0).to_numpy(dtype=float)
+        lo, hi = X.min(axis=0), X.max(axis=0)
+        if not (np.array_equal(lo, state["lo"]) and np.array_equal(hi, state["hi"])):
+            self.normalize_and_score(state["weights"])
+            return "global"
+
+        w = np.array([state["weights"][k] for k in score_indicators])
+        span = np.where(hi - lo == 0, 1, hi - lo)
+        normalized = (X[rows] - lo) / span
+        normalized[:, 1] = 1 - normalized[:, 1]
+        raw = state["raw"]
+        raw[rows] = normalized @ w
+        if raw.min() != state["raw_lo"] or raw.max() != state["raw_hi"]:
+            state["raw_lo"], state["raw_hi"] = raw.min(), raw.max()
+            self._set_rows(slice(None), "Priority_Score", _minmax(raw, axis=0))
+            return "rescaled"
+        raw_span = state["raw_hi"] - state["raw_lo"]
+        self._set_rows(
+            rows,
+            "Priority_Score",
+            (raw[rows] - state["raw_lo"]) / (raw_span if raw_span else 1),
+        )
+        return "rows"
+
+    def _recluster_rows(self, rows: pd.Index) -> int:
+        """Refit the clusters if an update moved the feature scaling or an updated row's cluster."""
+        from sklearn.preprocessing import StandardScaler
+
+        features = self.counties[cluster_features].fillna(0)
+        scaler = StandardScaler().fit(features)
+        before = self.counties["Cluster"].to_numpy().copy()
+        same_scaling = np.array_equal(
+            scaler.mean_, self.cluster_scaler.mean_
+        ) and np.array_equal(scaler.scale_, self.cluster_scaler.scale_)
+        labels = self.cluster_model.predict(scaler.transform(features.iloc[rows]))
+        if same_scaling and (labels == before[rows]).all():
+            return 0
+        self.cluster_counties(**self._cluster_params)
+        return int((self.counties["Cluster"].to_numpy() != before).sum())
+
+    def get_summary(self, top_n: int = 10) -> pd.DataFrame:
         """Return a sorted summary of top counties by priority score."""
         summary_cols = [
-            'County','2025_Projected_Population','Total_number_of_facilities','Facility_Ratio',
-            'Priority_Score','Cluster','Suggested_New_Facilities','Scarcity','LowStaff_Ratio'
+            "County",
+            "2025_Projected_Population",
+            "Total_number_of_facilities",
+            "Facility_Ratio",
+            "Priority_Score",
+            "Cluster",
+            "Suggested_New_Facilities",
+            "Scarcity",
+            "LowStaff_Ratio",
         ]
-        self.summary = self.counties[summary_cols].copy().sort_values('Priority_Score', ascending=False).reset_index(drop=True)
+        self.summary = (
+            self.counties[summary_cols]
+            .copy()
+            .sort_values("Priority_Score", ascending=False)
+            .reset_index(drop=True)
+        )
         return self.summary.head(top_n)
 
-    def plot_priority(self):
-        """Matplotlib and Plotly visualizations for priority and clusters."""
-        fig, ax = plt.subplots(1, 2, figsize=(18,9))
-        self.counties.plot(column='Priority_Score', cmap='Reds', legend=True, ax=ax[0])
-        ax[0].set_title('Priority Score for Facility Placement (0 low - 1 high)')
-        ax[0].axis('off')
-        self.counties.plot(column='Cluster', categorical=True, legend=True, ax=ax[1])
-        ax[1].set_title('KMeans clusters (3) - planning buckets')
-        ax[1].axis('off')
-        plt.tight_layout()
-        plt.show()
-
-        # Interactive Plotly choropleth
-        fig = px.choropleth_mapbox(
+    def plot_priority(
+        self,
+        show: bool = True,
+        path: Optional[str] = None,
+        html_path: Optional[str] = None,
+    ) -> Optional[Tuple[Any, Any]]:
+        """
+        Matplotlib and Plotly visualizations for priority and clusters.
+
+        Boundaries come from the shared geometry cache, simplified to about one
+        pixel at each figure's resolution.
+
+        Parameters:
+            show (bool): Display both figures; False renders headless with Agg.
+            path (str): Optional file for the matplotlib panels (.png, .svg, .pdf).
+            html_path (str): Optional standalone HTML file for the interactive map.
+
+        Returns:
+            tuple or None: (matplotlib Figure, plotly Figure) when ``show`` is False.
+        """
+        import geopandas as gpd
+        import plotly.express as px
+
+        shapes = geometry_cache(self.counties.geometry)
+        zoom = 5.8
+        fig = _new_figure((18, 9), show)
+        ax = fig.subplots(1, 2)
+        # Each panel is roughly 900 px across at the default 100 dpi
+        outlines = shapes.simplified(shapes.tolerance_for_extent(900))
+        frame = gpd.GeoDataFrame(
+            self.counties[["Priority_Score", "Cluster"]], geometry=outlines
+        )
+        frame.plot(column="Priority_Score", cmap="Reds", legend=True, ax=ax[0])
+        ax[0].set_title("Priority Score for Facility Placement (0 low - 1 high)")
+        ax[0].axis("off")
+        frame.plot(column="Cluster", categorical=True, legend=True, ax=ax[1])
+        ax[1].set_title("KMeans clusters (3) - planning buckets")
+        ax[1].axis("off")
+        _finish_figure(fig, show, path)
+
+        # Interactive Plotly choropleth (MapLibre traces replace the Mapbox ones in plotly 5.24+)
+        if hasattr(px, "choropleth_map"):
+            choropleth, map_key = px.choropleth_map, "map"
+        else:
+            choropleth, map_key = px.choropleth_mapbox, "mapbox"
+        map_fig = choropleth(
             self.counties,
-            geojson=self.counties.geometry.__geo_interface__,
+            geojson=shapes.geojson(shapes.tolerance_for_zoom(zoom)),
             locations=self.counties.index,
             color="Priority_Score",
             hover_name="County",
             hover_data={
-                "Priority_Score": ':.2f',
+                "Priority_Score": ":.2f",
                 "2025_Projected_Population": True,
                 "Total_number_of_facilities": True,
                 "Suggested_New_Facilities": True,
-                "Cluster": True
+                "Cluster": True,
             },
-            mapbox_style="carto-positron",
             center={"lat": -0.0236, "lon": 37.9062},
-            zoom=5.8,
+            zoom=zoom,
             opacity=0.65,
             color_continuous_scale=[
                 [0.0, "lightyellow"],
                 [0.3, "orange"],
                 [0.6, "orangered"],
-                [1.0, "darkred"]
-            ]
+                [1.0, "darkred"],
+            ],
+            **{f"{map_key}_style": "carto-positron"},
+        )
+        map_fig.update_layout(
+            {map_key: {"zoom": zoom, "center": {"lat": -0.0236, "lon": 37.9062}}},
+            title={
+                "text": "🩺 Health Facility Optimization Priority Heatmap (Kenyan Counties)",
+                "y": 0.95,
+                "x": 0.5,
+                "xanchor": "center",
+                "yanchor": "top",
+                "font": {"size": 20},
+            },
+            margin={"r": 0, "t": 30, "l": 0, "b": 0},
+            legend_title="Priority Score",
+        )
+        if html_path is not None:
+            map_fig.write_html(html_path, include_plotlyjs="cdn")
+        if show:
+            map_fig.show()
+            return None
+        return fig, map_fig
+
+    def export_scenario_maps(
+        self,
+        weights: Any,
+        directory: str,
+        fmt: str = "png",
+        max_workers: Optional[int] = None,
+    ) -> Dict[Any, str]:
+        """
+        Write a priority map for each weighting scenario, rendered in parallel.
+
+        Scenarios are scored together with ``score_scenarios``; the maps are
+        drawn headless across a process pool from the shared simplified
+        boundaries.
+
+        Parameters:
+            weights (array-like or pd.DataFrame): Scenario weights as for ``score_scenarios``;
+                a DataFrame's index names the files.
+            directory (str): Output directory, created if needed.
+            fmt (str): File format, e.g. "png", "svg" or "pdf".
+            max_workers (int): Worker processes; 1 renders in-process (default: CPU count).
+
+        Returns:
+            dict: Output path by scenario name.
+        """
+        scores, _ = self.score_scenarios(weights)
+        names = (
+            weights.index
+            if isinstance(weights, pd.DataFrame)
+            else [f"scenario_{i}" for i in range(len(scores))]
+        )
+        shapes = geometry_cache(self.counties.geometry)
+        outlines = shapes.simplified(shapes.tolerance_for_extent(900))
+        os.makedirs(directory, exist_ok=True)
+        paths = {
+            name: os.path.join(directory, f"{_safe_filename(name)}.{fmt}")
+            for name in names
+        }
+        tasks = [(i, str(name), path) for i, (name, path) in enumerate(paths.items())]
+        _render_batch(_render_scenario_map, tasks, (outlines, scores), max_workers)
+        return paths
+
+
+class FacilitySitingOptimizer:
+    """
+    Choose locations for new facilities by lazy-greedy coverage optimisation.
+
+    Demand points (e.g. population grid cells) and candidate sites are held in
+    KD-trees. Each candidate's neighbourhood within ``radius_km`` is computed
+    once as a sparse list of demand cells with distances. Sites are then
+    added greedily from a priority queue of stale gains: only the top
+    candidate's gain is recomputed, and the coverage state is updated
+    incrementally after each pick. Both objectives are submodular, so the
+    lazy evaluation selects the same sites as a full greedy pass.
+
+    Objectives:
+        'coverage': maximise demand weight within radius_km of a facility.
+        'median': minimise weighted distance to the nearest facility, with
+            distances truncated at radius_km (a p-median heuristic).
+    """
+
+    def __init__(
+        self,
+        demand: Any,
+        candidates: Any,
+        existing: Any = None,
+        radius_km: float = 5.0,
+        weight_col: Optional[str] = "Population",
+        lon_col: str = "Longitude",
+        lat_col: str = "Latitude",
+        chunk_size: int = 2048,
+    ) -> None:
+        """
+        Parameters:
+            demand (pd.DataFrame or GeoDataFrame): Demand points with a weight column.
+            candidates (pd.DataFrame or GeoDataFrame): Candidate sites.
+            existing (pd.DataFrame or GeoDataFrame): Existing facilities, which already
+                cover or serve nearby demand.
+            radius_km (float): Coverage radius (and distance cap for 'median').
+            weight_col (str): Demand weight column; missing means every point weighs 1.
+            lon_col (str): Longitude column for non-geometry inputs.
+            lat_col (str): Latitude column for non-geometry inputs.
+            chunk_size (int): Candidates whose neighbourhoods are queried at once.
+        """
+        from scipy.spatial import cKDTree
+
+        self.candidates = candidates
+        self.radius_km = float(radius_km)
+        chord = 2 * np.sin(self.radius_km / (2 * EARTH_RADIUS_KM))
+
+        demand_xyz = _lonlat_to_xyz(*_point_coordinates(demand, lon_col, lat_col))
+        cand_xyz = _lonlat_to_xyz(*_point_coordinates(candidates, lon_col, lat_col))
+        self.weights = (
+            demand[weight_col].to_numpy(dtype=float)
+            if weight_col in demand.columns
+            else np.ones(len(demand_xyz))
+        )
+        self.weights = np.nan_to_num(self.weights)
+        demand_tree = cKDTree(demand_xyz)
+
+        # Existing facilities: demand they already cover and its distance to the nearest one
+        self.current = np.full(len(demand_xyz), self.radius_km)
+        self.covered = np.zeros(len(demand_xyz), dtype=bool)
+        if existing is not None and len(existing):
+            existing_tree = cKDTree(
+                _lonlat_to_xyz(*_point_coordinates(existing, lon_col, lat_col))
+            )
+            d, _ = existing_tree.query(demand_xyz, distance_upper_bound=chord)
+            self.covered = np.isfinite(d)
+            self.current[self.covered] = _chord_to_km(d[self.covered])
+
+        # Candidate neighbourhoods as CSR arrays: indptr, demand indices, distances (km)
+        indptr, indices, distances = [0], [], []
+        for start in range(0, len(cand_xyz), chunk_size):
+            block = cand_xyz[start : start + chunk_size]
+            for xyz, nbrs in zip(
+                block, demand_tree.query_ball_point(block, chord, return_sorted=False)
+            ):
+                nbrs = np.asarray(nbrs, dtype=np.int64)
+                indices.append(nbrs)
+                distances.append(
+                    _chord_to_km(np.linalg.norm(demand_xyz[nbrs] - xyz, axis=1))
+                )
+                indptr.append(indptr[-1] + len(nbrs))
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = (
+            np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+        )
+        self.distances = np.concatenate(distances) if distances else np.empty(0)
+
+    def solve(self, n_sites: int, objective: str = "coverage") -> pd.DataFrame:
+        """
+        Select up to n_sites candidate locations.
+
+        Parameters:
+            n_sites (int): Number of new facilities to site.
+            objective (str): 'coverage' or 'median'.
+
+        Returns:
+            pd.DataFrame: Selected candidates in pick order with their marginal gain and the
+                cumulative covered weight (and its share of total demand).
+        """
+        if objective not in ("coverage", "median"):
+            raise ValueError("objective must be 'coverage' or 'median'")
+        covered = self.covered.copy()
+        current = self.current.copy()
+        n_candidates = len(self.indptr) - 1
+
+        def gain(c: int) -> float:
+            idx = self.indices[self.indptr[c] : self.indptr[c + 1]]
+            if objective == "coverage":
+                return float(self.weights[idx][~covered[idx]].sum())
+            dist = self.distances[self.indptr[c] : self.indptr[c + 1]]
+            return float((self.weights[idx] * np.maximum(0, current[idx] - dist)).sum())
+
+        # Initial gains for every candidate in one vectorised pass
+        owner = np.repeat(np.arange(n_candidates), np.diff(self.indptr))
+        if objective == "coverage":
+            benefit = self.weights[self.indices] * ~covered[self.indices]
+        else:
+            benefit = self.weights[self.indices] * np.maximum(
+                0, current[self.indices] - self.distances
+            )
+        gains = np.bincount(owner, weights=benefit, minlength=n_candidates)
+        heap = [(-g, c) for c, g in enumerate(gains) if g > 0]
+        heapq.heapify(heap)
+
+        total = self.weights.sum()
+        covered_weight = self.weights[covered].sum()
+        rows: List[Dict[str, Any]] = []
+        while heap and len(rows) < n_sites:
+            _, c = heapq.heappop(heap)
+            g = gain(c)
+            if g <= 0:
+                continue
+            if heap and g < -heap[0][0]:
+                # Stale bound: reinsert with the fresh gain and try the next best
+                heapq.heappush(heap, (-g, c))
+                continue
+            sl = slice(self.indptr[c], self.indptr[c + 1])
+            idx = self.indices[sl]
+            covered_weight += self.weights[idx][~covered[idx]].sum()
+            covered[idx] = True
+            current[idx] = np.minimum(current[idx], self.distances[sl])
+            rows.append(
+                {
+                    "candidate": self.candidates.index[c],
+                    "order": len(rows) + 1,
+                    "gain": g,
+                    "covered_weight": covered_weight,
+                    "covered_share": covered_weight / total if total > 0 else 0.0,
+                }
+            )
+        return pd.DataFrame(
+            rows,
+            columns=["candidate", "order", "gain", "covered_weight", "covered_share"],
         )
-        fig.update_layout(title={'text': "🩺 Health Facility Optimization Priority Heatmap (Kenyan Counties)",
-                                 'y':0.95,'x':0.5,'xanchor':'center','yanchor':'top','font':{'size':20}},
-                          margin={"r":0,"t":30,"l":0,"b":0},
-                          mapbox_zoom=5.8,mapbox_center={"lat": -0.0236,"lon":37.9062},
-                          legend_title="Priority Score")
-        fig.show()
 
+
+def _chord_to_km(chord: Any) -> np.ndarray:
+    """Convert unit-sphere chord lengths to great-circle kilometres."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
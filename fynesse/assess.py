@@ -1,128 +1,952 @@
+import difflib
+import functools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
 # Define valid counties
 valid_counties = [
- 'Baringo','Bomet','Bungoma','Busia','Elgeyo-Marakwet','Embu','Garissa','Homa Bay',
- 'Isiolo','Kajiado','Kakamega','Kericho','Kiambu','Kilifi','Kirinyaga','Kisii',
- 'Kisumu','Kitui','Kwale','Laikipia','Lamu','Machakos','Makueni','Mandera',
- 'Marsabit','Meru','Migori','Mombasa',"Murang'a",'Nairobi','Nandi','Narok',
- 'Nyamira','Nyandarua','Nyeri','Samburu','Siaya','Taita Taveta','Tana River',
- 'Tharaka-Nithi','Trans Nzoia','Turkana','Uasin Gishu','Vihiga','Wajir',
- 'West Pokot','Nakuru'
+    "Baringo",
+    "Bomet",
+    "Bungoma",
+    "Busia",
+    "Elgeyo-Marakwet",
+    "Embu",
+    "Garissa",
+    "Homa Bay",
+    "Isiolo",
+    "Kajiado",
+    "Kakamega",
+    "Kericho",
+    "Kiambu",
+    "Kilifi",
+    "Kirinyaga",
+    "Kisii",
+    "Kisumu",
+    "Kitui",
+    "Kwale",
+    "Laikipia",
+    "Lamu",
+    "Machakos",
+    "Makueni",
+    "Mandera",
+    "Marsabit",
+    "Meru",
+    "Migori",
+    "Mombasa",
+    "Murang'a",
+    "Nairobi",
+    "Nandi",
+    "Narok",
+    "Nyamira",
+    "Nyandarua",
+    "Nyeri",
+    "Samburu",
+    "Siaya",
+    "Taita Taveta",
+    "Tana River",
+    "Tharaka-Nithi",
+    "Trans Nzoia",
+    "Turkana",
+    "Uasin Gishu",
+    "Vihiga",
+    "Wajir",
+    "West Pokot",
+    "Nakuru",
 ]
 
-def clean_county_names(df, col="County"):
+# Spellings that normalisation alone cannot reconcile
+county_aliases = {
+    "Nairobi City": "Nairobi",
+}
+
+# Shared categorical dtype so County columns from every source align on integer codes
+county_dtype = pd.CategoricalDtype(sorted(valid_counties))
+
+_quote_table = str.maketrans({"\u2019": "'", "\u2018": "'", "\u02bc": "'", "`": "'"})
+
+
+# Trailing words dropped from keys, so "Kisumu County" and "Nairobi City County" match
+_county_suffixes = ("citycounty", "county")
+
+
+def _normalise_county_key(name: str) -> str:
+    """Reduce a county spelling to a lower-case alphanumeric key without "County"."""
+    name = str(name).translate(_quote_table).lower()
+    key = "".join(ch for ch in name if ch.isalnum())
+    for suffix in _county_suffixes:
+        if key.endswith(suffix) and len(key) > len(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+_county_index = {_normalise_county_key(name): name for name in valid_counties}
+_county_index.update(
+    {_normalise_county_key(alias): name for alias, name in county_aliases.items()}
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _match_county(key: str, cutoff: float) -> Optional[str]:
+    """Fuzzy-match a normalised key to a canonical county name, or None."""
+    matches = difflib.get_close_matches(key, list(_county_index), n=1, cutoff=cutoff)
+    return _county_index[matches[0]] if matches else None
+
+
+def _canonical_county_codes(
+    values: Any, fuzzy: bool = True, cutoff: float = 0.85
+) -> Any:
+    """Return the county_dtype code of each value's canonical name, -1 where unmatched."""
+    codes, uniques = pd.factorize(values)
+    categories = county_dtype.categories
+    canonical_codes = np.full(len(uniques) + 1, -1, dtype=np.int16)
+    for i, name in enumerate(uniques):
+        key = _normalise_county_key(name)
+        canonical = _county_index.get(key)
+        if canonical is None and fuzzy and key:
+            canonical = _match_county(key, cutoff)
+        if canonical is not None:
+            canonical_codes[i] = categories.get_loc(canonical)
+    # Missing values have code -1 and pick up the trailing -1 sentinel
+    return canonical_codes[codes]
+
+
+@profiled()
+def clean_county_names(
+    df: pd.DataFrame,
+    col: str = "County",
+    fuzzy: bool = True,
+    cutoff: float = 0.85,
+    return_dropped: bool = False,
+) -> Any:
     """
     Standardize County names and remove invalid rows.
 
+    Names are matched through a precomputed index of normalised spellings
+    (case, punctuation, slashes and curly quotes ignored), with a cached
+    fuzzy-match fallback for unseen variants. Each distinct spelling is
+    resolved once, so the cost scales with the number of unique values
+    rather than rows. The cleaned column is a categorical over
+    ``county_dtype``, shared by every cleaned frame.
+
     Parameters:
         df (pd.DataFrame): DataFrame to clean
         col (str): Name of the county column
+        fuzzy (bool): Fall back to fuzzy matching for unknown spellings
+        cutoff (float): Minimum similarity (0-1) accepted by the fuzzy match
+        return_dropped (bool): Also return the rows that could not be matched
+
+    Returns:
+        pd.DataFrame: Cleaned DataFrame, or (cleaned, dropped) when return_dropped is set
+    """
+    county_codes = _canonical_county_codes(df[col], fuzzy, cutoff)
+    keep = county_codes >= 0
+    cleaned = df[keep].copy()
+    cleaned[col] = pd.Categorical.from_codes(county_codes[keep], dtype=county_dtype)
+
+    if return_dropped:
+        return cleaned, df[~keep]
+    return cleaned
+
+
+def assign_facilities_to_counties(
+    facilities: Any,
+    counties: Any,
+    col: str = "County",
+    lon_col: str = "Longitude",
+    lat_col: str = "Latitude",
+    chunk_size: int = 200000,
+) -> Tuple[Any, pd.DataFrame]:
+    """
+    Assign facilities to county polygons by their coordinates.
+
+    Points are matched in chunks with one bulk STRtree query per chunk
+    against prepared county geometries. Facilities whose point falls outside
+    every polygon, and those whose County label (canonicalised as in
+    clean_county_names) disagrees with their location, are reported.
+
+    Parameters:
+        facilities (pd.DataFrame or GeoDataFrame): Facilities with coordinates or point geometry.
+        counties (GeoDataFrame): County polygons, e.g. from get_county_boundaries().
+        col (str): County label column in both frames.
+        lon_col (str): Longitude column when facilities has no geometry.
+        lat_col (str): Latitude column when facilities has no geometry.
+        chunk_size (int): Points queried per chunk.
 
     Returns:
-        pd.DataFrame: Cleaned DataFrame
-    """
-    replacements = {
-        "Muranga": "Murang'a",
-        "Murang’a": "Murang'a",
-        "Taita/Taveta": "Taita Taveta",
-        "Tharaka Nithi": "Tharaka-Nithi",
-        "TharakaNithi": "Tharaka-Nithi",
-        "Elgeyo Marakwet": "Elgeyo-Marakwet",
-        "Elgeyo/Marakwet": "Elgeyo-Marakwet",
-        "Nairobi City": "Nairobi",
-        "HomaBay": "Homa Bay",
-        "Total": None  # drop invalid rows
+        tuple: (assigned, report). assigned is a copy of facilities with a categorical
+            ``<col>_spatial`` column; report lists the facilities that are 'outside' or
+            whose label is a 'mismatch', with both labels.
+    """
+    import shapely
+    from .access import _point_coordinates
+
+    polygons = (
+        counties.to_crs(4326).geometry.to_numpy()
+        if counties.crs is not None
+        else counties.geometry.to_numpy()
+    )
+    shapely.prepare(polygons)
+    tree = shapely.STRtree(polygons)
+    polygon_codes = _canonical_county_codes(counties[col].reset_index(drop=True))
+
+    lon, lat = _point_coordinates(facilities, lon_col, lat_col)
+    spatial_codes = np.full(len(lon), -1, dtype=np.int16)
+    for start in range(0, len(lon), chunk_size):
+        points = shapely.points(
+            lon[start : start + chunk_size], lat[start : start + chunk_size]
+        )
+        point_idx, polygon_idx = tree.query(points, predicate="intersects")
+        # Points on a shared border match twice; keep the first polygon
+        first = np.unique(point_idx, return_index=True)[1]
+        spatial_codes[start + point_idx[first]] = polygon_codes[polygon_idx[first]]
+
+    assigned = facilities.copy()
+    assigned[f"{col}_spatial"] = pd.Categorical.from_codes(
+        spatial_codes, dtype=county_dtype
+    )
+
+    outside = spatial_codes < 0
+    if col in facilities.columns:
+        label_codes = _canonical_county_codes(facilities[col])
+        mismatch = ~outside & (label_codes != spatial_codes)
+    else:
+        mismatch = np.zeros(len(lon), dtype=bool)
+    flagged = outside | mismatch
+    report = pd.DataFrame(
+        {
+            "label": (
+                facilities[col].to_numpy()[flagged]
+                if col in facilities.columns
+                else None
+            ),
+            "spatial": assigned[f"{col}_spatial"].to_numpy()[flagged],
+            "issue": np.where(outside[flagged], "outside", "mismatch"),
+        },
+        index=facilities.index[flagged],
+    )
+    return assigned, report
+
+
+def spatial_weights(
+    gdf: Any, method: str = "queen", k: int = 6, row_standardize: bool = True
+) -> Any:
+    """
+    Build spatial weights between polygons as a sparse CSR matrix.
+
+    Contiguity neighbours come from one bulk STRtree query instead of
+    pairwise checks. 'queen' links polygons that share any boundary point
+    (slight overlaps from digitising also count). 'rook' additionally
+    requires a shared edge of non-zero length. 'knn' links each polygon to
+    the k nearest representative points, with great-circle distance.
+
+    Parameters:
+        gdf (GeoDataFrame): Polygons, e.g. counties or wards.
+        method (str): 'queen', 'rook' or 'knn'.
+        k (int): Neighbours per polygon for 'knn'.
+        row_standardize (bool): Scale each row to sum to 1; rows without
+            neighbours (islands) stay zero.
+
+    Returns:
+        scipy.sparse.csr_matrix: (n x n) weights in row order of gdf.
+    """
+    import shapely
+    from scipy import sparse
+
+    n = len(gdf)
+    if method in ("queen", "rook"):
+        geoms = gdf.geometry.to_numpy()
+        tree = shapely.STRtree(geoms)
+        rows, cols = tree.query(geoms, predicate="intersects")
+        keep = rows != cols
+        rows, cols = rows[keep], cols[keep]
+        if method == "rook":
+            shared = shapely.length(shapely.intersection(geoms[rows], geoms[cols]))
+            rows, cols = rows[shared > 0], cols[shared > 0]
+    elif method == "knn":
+        from scipy.spatial import cKDTree
+        from .access import _lonlat_to_xyz, _point_coordinates
+
+        if not 0 < k < n:
+            raise ValueError(f"k must be between 1 and {n - 1}")
+        xyz = _lonlat_to_xyz(*_point_coordinates(gdf))
+        _, idx = cKDTree(xyz).query(xyz, k=k + 1)
+        # Drop each point's match with itself, keeping the k nearest others
+        others = np.argsort(idx == np.arange(n)[:, None], axis=1, kind="stable")[:, :k]
+        rows = np.repeat(np.arange(n), k)
+        cols = np.take_along_axis(idx, others, axis=1).ravel()
+    else:
+        raise ValueError("method must be 'queen', 'rook' or 'knn'")
+
+    weights = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    weights.sum_duplicates()
+    weights.data[:] = 1.0
+    if row_standardize:
+        degree = np.asarray(weights.sum(axis=1)).ravel()
+        weights = sparse.diags(1 / np.where(degree > 0, degree, 1)) @ weights
+    return weights.tocsr()
+
+
+def _standardized_values(gdf: Any, column: str) -> Any:
+    """Return the column as deviations from its mean, rejecting missing values."""
+    values = pd.to_numeric(gdf[column], errors="coerce").to_numpy(dtype=float)
+    if np.isnan(values).any():
+        raise ValueError(
+            f"Column '{column}' has {int(np.isnan(values).sum())} missing values"
+        )
+    return values - values.mean()
+
+
+def morans_i(
+    gdf: Any,
+    column: str,
+    weights: Any = None,
+    permutations: int = 999,
+    seed: Optional[int] = 42,
+    block_size: int = 256,
+) -> Dict[str, Any]:
+    """
+    Global Moran's I of an indicator with permutation inference.
+
+    All permutations are drawn as one (permutations x n) matrix and their
+    spatial lags computed with sparse-dense products in blocks of
+    ``block_size`` permutations.
+
+    Parameters:
+        gdf (GeoDataFrame): Polygons with the indicator column.
+        column (str): Indicator to test.
+        weights (scipy.sparse matrix): Spatial weights; default queen contiguity,
+            row-standardised.
+        permutations (int): Random permutations for the pseudo p-value.
+        seed (int): Random seed.
+        block_size (int): Permutations evaluated per sparse product.
+
+    Returns:
+        dict: I, expected I under no autocorrelation, z-score and pseudo p-value
+            (one-sided, in the direction of the observed I) from the permutations.
+    """
+    z = _standardized_values(gdf, column)
+    w = spatial_weights(gdf) if weights is None else weights.tocsr()
+    n = len(z)
+    s0 = w.sum()
+    scale = n / (s0 * (z @ z))
+    observed = scale * (z @ (w @ z))
+
+    rng = np.random.default_rng(seed)
+    simulated = np.empty(permutations)
+    for start in range(0, permutations, block_size):
+        count = min(block_size, permutations - start)
+        shuffled = rng.permuted(np.broadcast_to(z, (count, n)), axis=1)
+        simulated[start : start + count] = scale * np.einsum(
+            "pn,np->p", shuffled, w @ shuffled.T
+        )
+
+    expected = -1 / (n - 1)
+    larger = (
+        (simulated >= observed).sum()
+        if observed >= expected
+        else (simulated <= observed).sum()
+    )
+    return {
+        "I": float(observed),
+        "expected": expected,
+        "z": (
+            float((observed - simulated.mean()) / simulated.std())
+            if simulated.std()
+            else np.nan
+        ),
+        "p_sim": float((larger + 1) / (permutations + 1)),
     }
 
-    # Apply replacements
-    df[col] = df[col].replace(replacements)
 
-    # Keep only counties that are in the valid list
-    df = df[df[col].isin(valid_counties)].copy()
+def local_morans(
+    gdf: Any,
+    column: str,
+    weights: Any = None,
+    permutations: int = 999,
+    alpha: float = 0.05,
+    seed: Optional[int] = 42,
+    block_size: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Local Moran's I (LISA) of an indicator with conditional permutation inference.
+
+    For each polygon its neighbours' values are replaced by values drawn
+    from the other polygons. One (permutations x max_neighbours) table of
+    draws is shared by all polygons, as in PySAL, and polygons with the same
+    number of neighbours are evaluated together in blocks, so there is no
+    Python loop over polygons or permutations.
+
+    Parameters:
+        gdf (GeoDataFrame): Polygons with the indicator column.
+        column (str): Indicator to test.
+        weights (scipy.sparse matrix): Spatial weights; default queen contiguity,
+            row-standardised.
+        permutations (int): Random permutations for the pseudo p-values.
+        alpha (float): Significance level for the ``significant`` flag.
+        seed (int): Random seed.
+        block_size (int): Polygons evaluated together; default keeps each block's
+            draws to about 10 million values.
+
+    Returns:
+        pd.DataFrame: Indexed like gdf, with the local statistic ``I``, folded
+            pseudo p-value ``p_sim``, ``quadrant`` ('HH', 'LH', 'LL', 'HL'; None
+            for islands) and ``significant``.
+    """
+    z = _standardized_values(gdf, column)
+    w = spatial_weights(gdf) if weights is None else weights.tocsr()
+    n = len(z)
+    m2 = (z @ z) / n
+    lag = w @ z
+    local = z * lag / m2
+
+    degree = np.diff(w.indptr)
+    max_k = int(degree.max()) if n else 0
+    rng = np.random.default_rng(seed)
+    # Draws from the other n - 1 polygons, without replacement within each permutation
+    draws = np.argsort(rng.random((permutations, n - 1)), axis=1)[:, :max_k]
+    larger = np.zeros(n, dtype=np.int64)
+    for k in np.unique(degree[degree > 0]):
+        rows = np.flatnonzero(degree == k)
+        step = block_size or max(1, 10_000_000 // (permutations * k))
+        for start in range(0, len(rows), step):
+            block = rows[start : start + step]
+            idx = draws[None, :, :k]
+            # Skip over each polygon's own position so it never draws itself
+            idx = idx + (idx >= block[:, None, None])
+            neighbour_weights = w.data[w.indptr[block][:, None] + np.arange(k)]
+            simulated = (
+                z[block, None] * np.einsum("bpk,bk->bp", z[idx], neighbour_weights) / m2
+            )
+            larger[block] = (simulated >= local[block, None]).sum(axis=1)
+
+    folded = np.minimum(larger, permutations - larger)
+    p_sim = (folded + 1) / (permutations + 1)
+    quadrant = np.select(
+        [
+            (z > 0) & (lag > 0),
+            (z <= 0) & (lag > 0),
+            (z <= 0) & (lag <= 0),
+            (z > 0) & (lag <= 0),
+        ],
+        ["HH", "LH", "LL", "HL"],
+        default="",
+    ).astype(object)
+    quadrant[degree == 0] = None
+    p_sim[degree == 0] = np.nan
+    return pd.DataFrame(
+        {
+            "I": local,
+            "p_sim": p_sim,
+            "quadrant": quadrant,
+            "significant": p_sim <= alpha,
+        },
+        index=gdf.index,
+    )
 
-    return df
-# assess.py
-import matplotlib.pyplot as plt
-import geopandas as gpd
 
-def plot_gdf_column(gdf, column, plot_type="bar", top_n=None, figsize=(12,6), title=None):
+def _correlation_inputs(
+    df: pd.DataFrame, columns: Optional[Iterable[str]], method: str
+) -> Tuple[np.ndarray, np.ndarray, List[str], Optional[np.ndarray]]:
+    """
+    Return standardised float32 values (NaN as 0), the float32 presence mask, column names
+    and, for Spearman, the unranked float64 values used to re-rank incomplete pairs.
+    """
+    columns = (
+        list(df.select_dtypes(include="number").columns)
+        if columns is None
+        else list(columns)
+    )
+    values = df[columns].apply(pd.to_numeric, errors="coerce")
+    raw = None
+    if method == "spearman":
+        # Ranked once per column over its observed values
+        raw = values.to_numpy(dtype=np.float64)
+        values = values.rank()
+    elif method != "pearson":
+        raise ValueError("method must be 'pearson' or 'spearman'")
+    X = values.to_numpy(dtype=np.float64)
+    present = ~np.isnan(X)
+    # Centre and scale in float64 so the float32 products below do not cancel
+    X = (X - np.nanmean(X, axis=0)) / np.where(
+        np.nanstd(X, axis=0) > 0, np.nanstd(X, axis=0), 1
+    )
+    return (
+        np.where(present, X, 0).astype(np.float32),
+        present.astype(np.float32),
+        columns,
+        raw,
+    )
+
+
+def _complete_spearman(a: np.ndarray, b: np.ndarray) -> float:
+    """Spearman correlation of a and b re-ranked over the rows where both are present."""
+    from scipy import stats
+
+    both = ~(np.isnan(a) | np.isnan(b))
+    ra, rb = stats.rankdata(a[both]), stats.rankdata(b[both])
+    ra, rb = ra - ra.mean(), rb - rb.mean()
+    denominator = np.sqrt((ra * ra).sum() * (rb * rb).sum())
+    return float((ra * rb).sum() / denominator) if denominator > 0 else np.nan
+
+
+def _correlation_blocks(
+    X: np.ndarray,
+    present: np.ndarray,
+    block_size: int,
+    min_periods: int,
+    raw: Optional[np.ndarray] = None,
+) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+    """
+    Yield (i, j, r, n) for column blocks i <= j of the pairwise-complete correlation.
+
+    Each pair uses only the rows where both columns are present; sums over
+    those rows are computed for a whole block at once from products with
+    the presence mask. With ``raw`` (Spearman), pairs missing different rows
+    are re-ranked over their common rows, since ranks over each column's own
+    rows would not match.
+    """
+    p = X.shape[1]
+    counts = present.sum(axis=0)
+    X2 = X * X
+    for i in range(0, p, block_size):
+        a, ma, a2 = (
+            X[:, i : i + block_size],
+            present[:, i : i + block_size],
+            X2[:, i : i + block_size],
+        )
+        for j in range(i, p, block_size):
+            b, mb, b2 = (
+                X[:, j : j + block_size],
+                present[:, j : j + block_size],
+                X2[:, j : j + block_size],
+            )
+            n = ma.T @ mb
+            safe_n = np.maximum(n, 1)
+            sum_a, sum_b = a.T @ mb, ma.T @ b
+            cov = a.T @ b - sum_a * sum_b / safe_n
+            var_a = a2.T @ mb - sum_a * sum_a / safe_n
+            var_b = ma.T @ b2 - sum_b * sum_b / safe_n
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r = np.clip(cov / np.sqrt(var_a * var_b), -1, 1)
+            r[(n < min_periods) | (var_a <= 0) | (var_b <= 0)] = np.nan
+            if raw is not None:
+                incomplete = (n != counts[i : i + block_size, None]) | (
+                    n != counts[None, j : j + block_size]
+                )
+                for x, y in zip(*np.nonzero(incomplete & (n >= min_periods))):
+                    r[x, y] = _complete_spearman(raw[:, i + x], raw[:, j + y])
+            yield i, j, r, n
+
+
+def _correlation_pvalues(r: np.ndarray, n: np.ndarray) -> Any:
+    """Two-sided p-values of correlations r from n paired observations (t-test)."""
+    from scipy import stats
+
+    df = np.asarray(n, dtype=np.float64) - 2
+    r = np.asarray(r, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = r * np.sqrt(df / np.maximum(1 - r * r, 1e-12))
+        p = 2 * stats.t.sf(np.abs(t), np.where(df > 0, df, np.nan))
+    return p.astype(np.float32)
+
+
+def correlation_matrix(
+    df: pd.DataFrame,
+    columns: Optional[List[str]] = None,
+    method: str = "pearson",
+    min_periods: int = 3,
+    block_size: int = 256,
+    return_pvalues: bool = False,
+) -> Any:
+    """
+    Correlate numeric columns with pairwise-complete handling of missing values.
+
+    Values are held as one float32 matrix and the correlations computed in
+    column blocks, so memory beyond the result grows with ``block_size``
+    rather than the number of columns.
+
+    Parameters:
+        df (pd.DataFrame): Input data.
+        columns (list): Columns to correlate (default: all numeric columns).
+        method (str): 'pearson' or 'spearman'. Spearman ranks each pair over its
+            common rows, as ``DataFrame.corr`` does.
+        min_periods (int): Minimum paired observations; pairs with fewer are NaN.
+        block_size (int): Columns per block.
+        return_pvalues (bool): Also return two-sided p-values and pair counts.
+
+    Returns:
+        pd.DataFrame or tuple: float32 correlation matrix, or (corr, pvalues, counts).
+    """
+    X, present, columns, raw = _correlation_inputs(df, columns, method)
+    p = len(columns)
+    r = np.full((p, p), np.nan, dtype=np.float32)
+    n = np.zeros((p, p), dtype=np.int64)
+    for i, j, block_r, block_n in _correlation_blocks(
+        X, present, block_size, min_periods, raw
+    ):
+        rows, cols = slice(i, i + block_r.shape[0]), slice(j, j + block_r.shape[1])
+        r[rows, cols], n[rows, cols] = block_r, block_n
+        r[cols, rows], n[cols, rows] = block_r.T, block_n.T
+    diagonal = np.diag(n) >= min_periods
+    r[np.diag_indices(p)] = np.where(diagonal, 1, np.nan)
+    corr = pd.DataFrame(r, index=columns, columns=columns)
+    if not return_pvalues:
+        return corr
+    pvalues = _correlation_pvalues(r, n)
+    pvalues[np.diag_indices(p)] = np.where(diagonal, 0, np.nan)
+    return (
+        corr,
+        pd.DataFrame(pvalues, index=columns, columns=columns),
+        pd.DataFrame(n, index=columns, columns=columns),
+    )
+
+
+def top_correlations(
+    df: pd.DataFrame,
+    k: int = 10,
+    columns: Optional[List[str]] = None,
+    method: str = "pearson",
+    min_periods: int = 3,
+    block_size: int = 256,
+) -> pd.DataFrame:
+    """
+    Return the k most strongly correlated column pairs.
+
+    Only the best k candidates of each block are kept, so the full matrix is
+    never materialised.
+
+    Parameters:
+        df (pd.DataFrame): Input data.
+        k (int): Pairs to return.
+        columns (list): Columns to consider (default: all numeric columns).
+        method (str): 'pearson' or 'spearman'.
+        min_periods (int): Minimum paired observations.
+        block_size (int): Columns per block.
+
+    Returns:
+        pd.DataFrame: Columns a, b, r, p_value and n, sorted by |r| descending.
+    """
+    X, present, columns, raw = _correlation_inputs(df, columns, method)
+    found = []
+    for i, j, r, n in _correlation_blocks(X, present, block_size, min_periods, raw):
+        pairs = np.indices(r.shape).reshape(2, -1)
+        a, b = pairs[0] + i, pairs[1] + j
+        r, n = r.ravel(), n.ravel()
+        keep = (a < b) & ~np.isnan(r)
+        a, b, r, n = a[keep], b[keep], r[keep], n[keep]
+        if len(r) > k:
+            best = np.argpartition(-np.abs(r), k)[:k]
+            a, b, r, n = a[best], b[best], r[best], n[best]
+        found.append((a, b, r, n))
+    if not found:
+        return pd.DataFrame(columns=["a", "b", "r", "p_value", "n"])
+    a, b, r, n = (np.concatenate(parts) for parts in zip(*found))
+    order = np.argsort(-np.abs(r), kind="stable")[:k]
+    names = np.asarray(columns, dtype=object)
+    return pd.DataFrame(
+        {
+            "a": names[a[order]],
+            "b": names[b[order]],
+            "r": r[order],
+            "p_value": _correlation_pvalues(r[order], n[order]),
+            "n": n[order].astype(np.int64),
+        }
+    )
+
+
+# matplotlib, seaborn and geopandas are imported where they are used so that
+# importing fynesse for data access stays fast.
+
+
+def _new_figure(figsize: Tuple[float, float], show: bool) -> Any:
+    """
+    Create a figure for a plot.
+
+    Shown plots use pyplot; headless ones get a standalone Figure that is
+    rendered by Agg on save and never touches pyplot's global state, so it
+    works without a display and in worker processes.
+    """
+    if show:
+        import matplotlib.pyplot as plt
+
+        return plt.figure(figsize=figsize)
+    from matplotlib.figure import Figure
+
+    return Figure(figsize=figsize)
+
+
+def _finish_figure(fig: Any, show: bool = True, path: Optional[str] = None) -> Any:
+    """
+    Lay out ``fig``, save it to ``path`` (format from the suffix) and/or show it.
+
+    Returns the figure only when it is not shown, so notebooks do not render
+    a displayed figure a second time as the cell's result.
+    """
+    fig.tight_layout()
+    if path is not None:
+        fig.savefig(path)
+    if show:
+        import matplotlib.pyplot as plt
+
+        plt.show()
+        return None
+    return fig
+
+
+def _safe_filename(name: Any) -> str:
+    """File name stem for a column or scenario label."""
+    return re.sub(r"[^\w.-]+", "_", str(name)).strip("_") or "plot"
+
+
+_batch_state = None
+
+
+def _init_batch(shared: Any) -> None:
+    global _batch_state
+    _batch_state = shared
+
+
+def _run_batch_task(render: Callable[..., Any], task: Tuple[Any, ...]) -> Any:
+    return render(_batch_state, *task)
+
+
+def _render_batch(
+    render: Callable[..., Any],
+    tasks: List[Tuple[Any, ...]],
+    shared: Any,
+    max_workers: Optional[int] = None,
+) -> List[Any]:
+    """
+    Run ``render(shared, *task)`` for every task, spread across a process pool.
+
+    ``shared`` (e.g. the GeoDataFrame) is sent to each worker once rather
+    than with every task. One worker, or a single task, runs in-process.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) <= 1:
+        return [render(shared, *task) for task in tasks]
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(tasks)),
+        initializer=_init_batch,
+        initargs=(shared,),
+    ) as pool:
+        return list(pool.map(_run_batch_task, [render] * len(tasks), tasks))
+
+
+def plot_gdf_column(
+    gdf: Any,
+    column: str,
+    plot_type: str = "bar",
+    top_n: Optional[int] = None,
+    figsize: Tuple[float, float] = (12, 6),
+    title: Optional[str] = None,
+    show: bool = True,
+    path: Optional[str] = None,
+) -> Any:
     """
     Plot a specific column from a GeoDataFrame.
 
     Parameters:
         gdf (GeoDataFrame): Input GeoDataFrame containing data.
         column (str): Column name to plot.
-        plot_type (str): Type of plot: "bar" (default) or "hist".
+        plot_type (str): Type of plot: "bar" (default), "hist" or "map" (a choropleth
+            drawn from the shared simplified-geometry cache).
         top_n (int): If specified, show only top N rows sorted by column value.
         figsize (tuple): Figure size.
         title (str): Optional plot title.
+        show (bool): Display the plot; False renders headless with Agg.
+        path (str): Optional file to save to, e.g. ``.png``, ``.svg`` or ``.pdf``.
 
     Returns:
-        None: Displays the plot.
+        Figure or None: The rendered figure when ``show`` is False.
     """
     if column not in gdf.columns:
         raise ValueError(f"Column '{column}' not found in the GeoDataFrame")
+    if plot_type not in ("bar", "hist", "map"):
+        raise ValueError("plot_type must be 'bar', 'hist' or 'map'")
 
     # Select data
-    data = gdf[[column, "County"]].copy()
-    
+    if plot_type == "map":
+        import geopandas as gpd
+        from .access import geometry_cache
+
+        shapes = geometry_cache(gdf.geometry)
+        # Simplify to about one pixel of the figure width at 100 dpi
+        outlines = shapes.simplified(shapes.tolerance_for_extent(figsize[0] * 100))
+        data = gpd.GeoDataFrame(gdf[[column, "County"]], geometry=outlines)
+    else:
+        data = gdf[[column, "County"]].copy()
+
     # If top_n is specified, sort by column
     if top_n:
         data = data.sort_values(by=column, ascending=False).head(top_n)
 
-    plt.figure(figsize=figsize)
+    fig = _new_figure(figsize, show)
+    ax = fig.add_subplot()
 
     if plot_type == "bar":
-        plt.bar(data["County"], data[column], color="skyblue")
-        plt.xticks(rotation=90)
-        plt.ylabel(column)
-        plt.xlabel("County")
+        ax.bar(data["County"].astype(str), data[column], color="skyblue")
+        ax.tick_params(axis="x", labelrotation=90)
+        ax.set_ylabel(column)
+        ax.set_xlabel("County")
     elif plot_type == "hist":
-        plt.hist(data[column], bins=20, color="skyblue", edgecolor="black")
-        plt.xlabel(column)
-        plt.ylabel("Frequency")
+        ax.hist(data[column], bins=20, color="skyblue", edgecolor="black")
+        ax.set_xlabel(column)
+        ax.set_ylabel("Frequency")
     else:
-        raise ValueError("plot_type must be 'bar' or 'hist'")
+        data.plot(column=column, cmap="Reds", legend=True, ax=ax)
+        ax.axis("off")
 
     if title:
-        plt.title(title)
+        ax.set_title(title)
     else:
-        plt.title(f"{column} distribution by County")
+        ax.set_title(f"{column} distribution by County")
+
+    return _finish_figure(fig, show, path)
+
+
+def _render_column(
+    shared: Tuple[Any, str, Dict[str, Any]], column: str, path: str
+) -> str:
+    gdf, plot_type, kwargs = shared
+    plot_gdf_column(gdf, column, plot_type=plot_type, show=False, path=path, **kwargs)
+    return path
+
+
+def export_gdf_columns(
+    gdf: Any,
+    columns: Iterable[str],
+    directory: str,
+    plot_type: str = "bar",
+    fmt: str = "png",
+    max_workers: Optional[int] = None,
+    **kwargs: Any,
+) -> Dict[str, str]:
+    """
+    Render ``plot_gdf_column`` for many columns to files in parallel.
+
+    Parameters:
+        gdf (GeoDataFrame): Input GeoDataFrame containing data.
+        columns (list): Columns to plot, one file each.
+        directory (str): Output directory, created if needed.
+        plot_type (str): "bar", "hist" or "map".
+        fmt (str): File format, e.g. "png", "svg" or "pdf".
+        max_workers (int): Worker processes; 1 renders in-process (default: CPU count).
+        **kwargs: Further ``plot_gdf_column`` arguments (top_n, figsize, title).
+
+    Returns:
+        dict: Output path by column.
+    """
+    missing = [c for c in columns if c not in gdf.columns]
+    if missing:
+        raise ValueError(f"Columns not found in the GeoDataFrame: {missing}")
+    os.makedirs(directory, exist_ok=True)
+    paths = {c: os.path.join(directory, f"{_safe_filename(c)}.{fmt}") for c in columns}
+    keep = list(dict.fromkeys([*columns, "County"]))
+    frame = gdf[keep + ([gdf.geometry.name] if plot_type == "map" else [])]
+    _render_batch(
+        _render_column, list(paths.items()), (frame, plot_type, kwargs), max_workers
+    )
+    return paths
 
-    plt.tight_layout()
-    plt.show()
 
-def plot_gdf_correlation(gdf, exclude_cols=None):
+def plot_gdf_correlation(
+    gdf: Any,
+    exclude_cols: Optional[List[str]] = None,
+    show: bool = True,
+    path: Optional[str] = None,
+    method: str = "pearson",
+    max_columns: Optional[int] = 30,
+    annotate_max: int = 20,
+) -> Any:
     """
     Generate a correlation heatmap for numeric columns in a GeoDataFrame.
 
+    Correlations come from ``correlation_matrix``. Only the ``max_columns``
+    columns with the strongest correlation to any other column are drawn,
+    ordered by hierarchical clustering on 1 - |r| so related indicators sit
+    together.
+
     Parameters:
         gdf (GeoDataFrame): The GeoDataFrame containing county-level data.
         exclude_cols (list): Columns to exclude from correlation calculation.
+        show (bool): Display the plot; False renders headless with Agg.
+        path (str): Optional file to save to, e.g. ``.png`` or ``.svg``.
+        method (str): 'pearson' or 'spearman'.
+        max_columns (int): Columns kept in the reduced matrix.
+        annotate_max (int): Annotate cells with r only up to this many columns.
+
+    Returns:
+        Figure or None: The rendered figure when ``show`` is False.
     """
     import seaborn as sns
-    import matplotlib.pyplot as plt
 
     if exclude_cols is None:
-        exclude_cols = ['Shape_Leng', 'Shape_Area', 'ADM1_PCODE', 'ADM1_REF', 
-                        'ADM1ALT1EN', 'ADM1ALT2EN', 'ADM0_EN', 'ADM0_PCODE', 
-                        'date', 'validOn', 'validTo']
+        exclude_cols = [
+            "Shape_Leng",
+            "Shape_Area",
+            "ADM1_PCODE",
+            "ADM1_REF",
+            "ADM1ALT1EN",
+            "ADM1ALT2EN",
+            "ADM0_EN",
+            "ADM0_PCODE",
+            "date",
+            "validOn",
+            "validTo",
+        ]
 
     # Select numeric columns excluding the ones in exclude_cols
-    numeric_cols = gdf.select_dtypes(include='number').columns
+    numeric_cols = gdf.select_dtypes(include="number").columns
     numeric_cols = [col for col in numeric_cols if col not in exclude_cols]
 
-    # Compute correlation matrix
-    corr = gdf[numeric_cols].corr()
+    # Compute correlation matrix, then reduce and cluster it
+    corr = _reduce_correlation(
+        correlation_matrix(gdf, numeric_cols, method=method), max_columns
+    )
 
     # Plot heatmap
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(corr, annot=True, fmt=".2f", cmap='coolwarm', cbar=True, square=True)
-    plt.title("Correlation Heatmap of Numeric County Indicators", fontsize=16)
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
-    plt.tight_layout()
-    plt.show()
-
+    size = min(12, 2 + 0.4 * len(corr))
+    fig = _new_figure((size + 2, size), show)
+    ax = fig.add_subplot()
+    annotate = len(corr) <= annotate_max
+    sns.heatmap(
+        corr,
+        annot=annotate,
+        fmt=".2f",
+        cmap="coolwarm",
+        vmin=-1,
+        vmax=1,
+        cbar=True,
+        square=True,
+        ax=ax,
+    )
+    ax.set_title("Correlation Heatmap of Numeric County Indicators", fontsize=16)
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.tick_params(axis="y", labelrotation=0)
+    return _finish_figure(fig, show, path)
 
 
+def _reduce_correlation(corr: pd.DataFrame, max_columns: Optional[int]) -> pd.DataFrame:
+    """Keep the most strongly correlated columns and order them by hierarchical clustering."""
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
 
+    strength = corr.abs().where(~np.eye(len(corr), dtype=bool)).max().fillna(0)
+    keep = strength.sort_values(ascending=False, kind="stable").index[:max_columns]
+    corr = corr.loc[keep, keep]
+    if len(corr) < 3:
+        return corr
+    distance = 1 - np.abs(np.nan_to_num(corr.to_numpy(dtype=np.float64)))
+    np.fill_diagonal(distance, 0)
+    order = leaves_list(linkage(squareform(distance, checks=False), method="average"))
+    return corr.iloc[order, order]
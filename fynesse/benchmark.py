@@ -0,0 +1,540 @@
+# benchmark.py
+"""
+Offline benchmark suite for the fynesse pipeline.
+
+A deterministic generator builds county-like polygons (a Voronoi tessellation
+of Kenya's bounding box, densified so edges carry realistic vertex counts)
+with every column ``preprocess`` expects. It writes them out in the loader's
+file layout, so the whole pipeline runs against local ``file://`` sources at
+47, 1k, 10k or 100k units without network access.
+
+Stages are timed with ``profiling.Profiler``. Results can be saved as a JSON
+baseline and later runs compared against it:
+
+    python -m fynesse.benchmark --sizes 47 1000 --output baseline.json
+    python -m fynesse.benchmark --sizes 47 1000 --baseline baseline.json
+
+The second command exits with status 1 when a stage is slower than the
+baseline by more than ``--threshold``.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Approximate extent of Kenya (lon/lat) used for the synthetic units
+KENYA_BOUNDS = (33.9, -4.7, 41.9, 5.0)
+benchmark_sizes = (47, 1000, 10000, 100000)
+benchmark_stages = (
+    "load",
+    "merge",
+    "clean",
+    "preprocess",
+    "normalize_and_score",
+    "cluster_counties",
+    "suggest_new_facilities",
+    "optimizer",
+    "render",
+)
+
+# Columns of each synthetic source file, in the loader's layout
+_boundary_cols = [
+    "Shape_Leng",
+    "Shape_Area",
+    "County",
+    "ADM1_PCODE",
+    "ADM1_REF",
+    "ADM1ALT1EN",
+    "ADM1ALT2EN",
+    "ADM0_EN",
+    "ADM0_PCODE",
+    "date",
+    "validOn",
+    "validTo",
+    "Population_density",
+    "Health_Facilities_distance",
+]
+_source_cols = {
+    "facilities_data.csv": [
+        "Total_number_of_facilities",
+        "insurance_covered_population",
+        "Facilities_Completed",
+        "Facilities_Closed",
+    ],
+    "projected_population_2025.csv": ["2025_Projected_Population"],
+    "teen_pregnacy_dataByCounty.csv": [
+        "Have_ever_had_a_pregnancy_loss",
+        "Number_of_women_with_underage_pregnancy",
+        "Ever_got_underage_pregnancy(%)",
+        "Number_of_women_5",
+    ],
+    "level2_lessthan3nursesfacilities_nurses.csv": [
+        "Total_Level2_Facilities",
+        "LowStaff_Facilities",
+    ],
+    "sexual_violence.csv": ["Percentage_of_scarcity"],
+}
+
+
+def synthetic_counties(n: int = 47, seed: int = 0, vertices_per_edge: int = 12) -> Any:
+    """
+    Generate ``n`` county-like units with every column ``preprocess`` expects.
+
+    Parameters:
+        n (int): Number of units.
+        seed (int): Random seed; equal seeds give identical frames.
+        vertices_per_edge (int): Approximate vertices added along each cell edge.
+
+    Returns:
+        GeoDataFrame: Units in EPSG:4326 whose polygons tile the bounding box.
+            With n=47 the units carry the real county names, otherwise unique
+            names derived from them.
+    """
+    import geopandas as gpd
+    import shapely
+
+    from .assess import valid_counties
+
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = KENYA_BOUNDS
+    extent = shapely.box(*KENYA_BOUNDS)
+    seeds = shapely.multipoints(
+        np.column_stack([rng.uniform(minx, maxx, n), rng.uniform(miny, maxy, n)])
+    )
+    cells = shapely.intersection(
+        shapely.get_parts(shapely.voronoi_polygons(seeds, extend_to=extent)), extent
+    )
+    # Densify, then snap to a 1e-7 degree grid so neighbours share identical vertices
+    spacing = np.sqrt(extent.area / n) / vertices_per_edge
+    cells = shapely.set_precision(shapely.segmentize(cells, spacing), 1e-7)
+    order = np.lexsort(
+        (
+            shapely.get_x(shapely.centroid(cells)),
+            -shapely.get_y(shapely.centroid(cells)),
+        )
+    )
+    cells = cells[order]
+
+    names = (
+        list(valid_counties)
+        if n == len(valid_counties)
+        else [
+            f"{valid_counties[i % len(valid_counties)]} {i // len(valid_counties)}"
+            for i in range(n)
+        ]
+    )
+    population = rng.lognormal(np.log(55_000_000 / n), 0.6, n).round()
+    women = np.maximum(1, (population * rng.uniform(0.002, 0.01, n)).round())
+    facilities = np.maximum(1, (population / rng.uniform(2_000, 30_000, n)).round())
+    level2 = np.maximum(1, (facilities * rng.uniform(0.2, 0.6, n)).round())
+    distance = rng.gamma(2.0, 6.0, n)
+    distance[rng.random(n) < 0.02] = np.nan  # preprocess fills missing distances
+    data = {
+        "Shape_Leng": shapely.length(cells),
+        "Shape_Area": shapely.area(cells),
+        "County": names,
+        "ADM1_PCODE": [f"KE{i:06d}" for i in range(n)],
+        "ADM1_REF": None,
+        "ADM1ALT1EN": None,
+        "ADM1ALT2EN": None,
+        "ADM0_EN": "Kenya",
+        "ADM0_PCODE": "KE",
+        "date": "2017-11-03",
+        "validOn": "2019-10-31",
+        "validTo": None,
+        "Population_density": population / (shapely.area(cells) * 12_300),
+        "Health_Facilities_distance": distance,
+        "Total_number_of_facilities": facilities.astype(np.int64),
+        "insurance_covered_population": rng.uniform(0, 1, n),
+        "Facilities_Completed": rng.integers(0, 50, n),
+        "Facilities_Closed": rng.integers(0, 10, n),
+        "2025_Projected_Population": population.astype(np.int64),
+        "Have_ever_had_a_pregnancy_loss": rng.uniform(0, 20, n),
+        "Number_of_women_with_underage_pregnancy": (women * rng.uniform(0, 0.3, n))
+        .round()
+        .astype(np.int64),
+        "Total_Level2_Facilities": level2.astype(np.int64),
+        "LowStaff_Facilities": (level2 * rng.uniform(0, 0.5, n))
+        .round()
+        .astype(np.int64),
+        "Percentage_of_scarcity": rng.uniform(0, 60, n),
+        "Ever_got_underage_pregnancy(%)": rng.uniform(0, 40, n),
+        "Number_of_women_5": women.astype(np.int64),
+    }
+    return gpd.GeoDataFrame(pd.DataFrame(data), geometry=cells, crs="EPSG:4326")
+
+
+def synthetic_county_labels(n: int, seed: int = 0) -> pd.Series:
+    """
+    Generate ``n`` messy county labels (case, spacing, aliases, typos) for cleaning benchmarks.
+
+    Parameters:
+        n (int): Number of labels.
+        seed (int): Random seed.
+
+    Returns:
+        pd.Series: Labels drawn from the 47 counties with realistic variations.
+    """
+    from .assess import county_aliases, valid_counties
+
+    rng = np.random.default_rng(seed)
+    base = np.asarray(valid_counties, dtype=object)[
+        rng.integers(0, len(valid_counties), n)
+    ]
+    variant = rng.integers(0, 6, n)
+    aliases = {v: k for k, v in county_aliases.items()}
+    labels = []
+    for name, kind, cut in zip(base, variant, rng.random(n)):
+        if kind == 1:
+            name = name.upper()
+        elif kind == 2:
+            name = f"  {name.lower()} "
+        elif kind == 3:
+            name = aliases.get(name, f"{name} County")
+        elif kind == 4 and len(name) > 5:
+            i = 1 + int(cut * (len(name) - 2))
+            name = name[:i] + name[i + 1 :]
+        labels.append(name)
+    return pd.Series(labels, name="County")
+
+
+def write_sources(gdf: Any, directory: Union[str, os.PathLike]) -> str:
+    """
+    Write a synthetic frame as the loader's source files.
+
+    Parameters:
+        gdf (GeoDataFrame): Output of ``synthetic_counties``.
+        directory (str): Target directory, created if needed.
+
+    Returns:
+        str: ``file://`` base URL for ``HealthDataLoader(base_url=...)``.
+    """
+    from pathlib import Path
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    gdf[_boundary_cols + [gdf.geometry.name]].to_file(
+        directory / "county_with_raster_means.gpkg", driver="GPKG"
+    )
+    for name, cols in _source_cols.items():
+        gdf[["County"] + cols].to_csv(directory / name, index=False)
+    return directory.resolve().as_uri()
+
+
+def _bench_load(ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]) -> None:
+    from .access import DatasetCache, HealthDataLoader
+
+    loader = HealthDataLoader(
+        base_url=ctx["base_url"], cache=DatasetCache(cache_dir=ctx["cache_dir"])
+    )
+    with timed():
+        loader.load_data()
+    ctx["loader"] = loader
+
+
+def _bench_merge(ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]) -> None:
+    from .access import merge_dfs_to_gdf
+
+    loader = ctx["loader"]
+    frames = [
+        loader.get_facilities(),
+        loader.get_projected_population(),
+        loader.get_teen_pregnancy(),
+        loader.get_low_staff_facilities(),
+        loader.get_sexual_violence(),
+    ]
+    with timed():
+        ctx["merged"] = merge_dfs_to_gdf(loader.get_county_boundaries(), frames)
+
+
+def _bench_clean(ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]) -> None:
+    from . import assess
+
+    frame = pd.DataFrame({"County": ctx["labels"]})
+    assess._match_county.cache_clear()
+    with timed():
+        assess.clean_county_names(frame)
+
+
+def _bench_preprocess(
+    ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]
+) -> None:
+    from .address import HealthFacilityOptimizer
+
+    optimizer = HealthFacilityOptimizer(ctx["merged"])
+    with timed():
+        optimizer.preprocess()
+    ctx["optimizer"] = optimizer
+
+
+def _bench_normalize_and_score(
+    ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]
+) -> None:
+    with timed():
+        ctx["optimizer"].normalize_and_score()
+
+
+def _bench_cluster_counties(
+    ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]
+) -> None:
+    from . import address
+
+    address._cluster_model_cache.clear()
+    with timed():
+        ctx["optimizer"].cluster_counties(n_clusters=3)
+
+
+def _bench_suggest_new_facilities(
+    ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]
+) -> None:
+    with timed():
+        ctx["optimizer"].suggest_new_facilities()
+
+
+def _bench_optimizer(
+    ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]
+) -> None:
+    from . import address
+
+    address._cluster_model_cache.clear()
+    with timed():
+        optimizer = address.HealthFacilityOptimizer(ctx["merged"])
+        optimizer.preprocess()
+        optimizer.normalize_and_score()
+        optimizer.cluster_counties(n_clusters=3)
+        optimizer.suggest_new_facilities()
+
+
+def _bench_render(
+    ctx: Dict[str, Any], timed: Callable[[], ContextManager[Any]]
+) -> None:
+    from . import access, assess
+
+    access._geometry_caches.clear()
+    path = os.path.join(ctx["workdir"], "priority.png")
+    with timed():
+        assess.plot_gdf_column(
+            ctx["optimizer"].counties,
+            "Priority_Score",
+            plot_type="map",
+            show=False,
+            path=path,
+        )
+
+
+_benchmarks = {
+    "load": _bench_load,
+    "merge": _bench_merge,
+    "clean": _bench_clean,
+    "preprocess": _bench_preprocess,
+    "normalize_and_score": _bench_normalize_and_score,
+    "cluster_counties": _bench_cluster_counties,
+    "suggest_new_facilities": _bench_suggest_new_facilities,
+    "optimizer": _bench_optimizer,
+    "render": _bench_render,
+}
+
+
+def run_benchmarks(
+    sizes: Iterable[int] = benchmark_sizes,
+    stages: Optional[Iterable[str]] = None,
+    repeat: int = 3,
+    seed: int = 0,
+    memory: bool = False,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Time the pipeline stages on synthetic data of each size.
+
+    Every stage runs in pipeline order, because later stages need earlier
+    outputs, but only the selected ones are timed. Each timed stage runs
+    ``repeat`` times and the fastest run is kept. Caches that would turn a
+    repeat into a lookup (cluster models, geometry levels, county matches)
+    are cleared first. Optimizers use their default configuration, and the
+    ``optimizer`` stage times that whole path, from ``HealthFacilityOptimizer(gdf)``
+    through ``suggest_new_facilities``. The loader reads from a warm on-disk
+    cache.
+
+    Parameters:
+        sizes (iterable): Unit counts to benchmark.
+        stages (iterable): Stage names from ``benchmark_stages`` (default: all).
+        repeat (int): Timed runs per stage.
+        seed (int): Generator seed.
+        memory (bool): Also record tracemalloc peaks (slows the timed code).
+        workdir (str): Directory for generated sources and caches (default: a temporary one).
+
+    Returns:
+        dict: ``{"meta": {...}, "results": {size: {stage: record}}}`` where each record
+            holds wall_s, cpu_s and peak_bytes (None unless ``memory``).
+    """
+    from .profiling import Profiler
+
+    stages = list(benchmark_stages if stages is None else stages)
+    unknown = [s for s in stages if s not in _benchmarks]
+    if unknown:
+        raise ValueError(
+            f"Unknown stages: {unknown}; choose from {list(benchmark_stages)}"
+        )
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(
+                tempfile.TemporaryDirectory(prefix="fynesse-bench-")
+            )
+        for n in sizes:
+            size_dir = os.path.join(workdir, str(n))
+            gdf = synthetic_counties(n, seed=seed)
+            ctx = {
+                "workdir": size_dir,
+                "base_url": write_sources(gdf, os.path.join(size_dir, "sources")),
+                "cache_dir": os.path.join(size_dir, "cache"),
+                "labels": synthetic_county_labels(n, seed=seed),
+            }
+            # Populate the dataset cache and its columnar copies before timing loads
+            _benchmarks["load"](ctx, contextlib.nullcontext)
+            results[str(n)] = {}
+            for name, bench in _benchmarks.items():
+                if name not in stages:
+                    bench(ctx, contextlib.nullcontext)
+                    continue
+                runs = []
+                for _ in range(max(1, repeat)):
+                    profiler = Profiler(enabled=True, memory=memory)
+                    try:
+                        bench(ctx, lambda: profiler.stage(name))
+                    finally:
+                        profiler.disable()
+                    runs.append(profiler.records[-1])
+                best = min(runs, key=lambda r: r["wall_s"])
+                results[str(n)][name] = {
+                    k: best[k] for k in ("wall_s", "cpu_s", "peak_bytes")
+                }
+    return {"meta": _environment(seed, repeat), "results": results}
+
+
+def _environment(seed: int, repeat: int) -> Dict[str, Any]:
+    """Describe the machine and library versions a benchmark ran with."""
+    import geopandas as gpd
+    import shapely
+    import sklearn
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "geopandas": gpd.__version__,
+        "shapely": shapely.__version__,
+        "sklearn": sklearn.__version__,
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def compare_to_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.25,
+    min_wall_s: float = 0.01,
+) -> pd.DataFrame:
+    """
+    Flag stages that got slower than a baseline run.
+
+    Parameters:
+        current (dict): Output of ``run_benchmarks``.
+        baseline (dict): Earlier output of ``run_benchmarks`` (e.g. loaded from JSON).
+        threshold (float): Allowed relative slowdown, 0.25 for 25%.
+        min_wall_s (float): Ignore stages faster than this in both runs (timer noise).
+
+    Returns:
+        pd.DataFrame: One row per stage timed in both runs (size, stage, baseline_s,
+            current_s, ratio, regression), slowest ratio first.
+    """
+    rows = []
+    for size, stages in current["results"].items():
+        for stage, record in stages.items():
+            before = baseline.get("results", {}).get(size, {}).get(stage)
+            if before is None:
+                continue
+            ratio = record["wall_s"] / before["wall_s"] if before["wall_s"] else np.inf
+            noisy = max(record["wall_s"], before["wall_s"]) < min_wall_s
+            rows.append(
+                {
+                    "size": int(size),
+                    "stage": stage,
+                    "baseline_s": before["wall_s"],
+                    "current_s": record["wall_s"],
+                    "ratio": ratio,
+                    "regression": bool(ratio > 1 + threshold and not noisy),
+                }
+            )
+    columns = ["size", "stage", "baseline_s", "current_s", "ratio", "regression"]
+    return pd.DataFrame(rows, columns=columns).sort_values(
+        "ratio", ascending=False, ignore_index=True
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit status."""
+    parser = argparse.ArgumentParser(
+        prog="python -m fynesse.benchmark", description=__doc__.splitlines()[1]
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(benchmark_sizes))
+    parser.add_argument("--stages", nargs="+", choices=benchmark_stages, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--memory", action="store_true", help="record tracemalloc peaks"
+    )
+    parser.add_argument("--output", help="write results as JSON (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed relative slowdown"
+    )
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(
+        args.sizes, args.stages, repeat=args.repeat, seed=args.seed, memory=args.memory
+    )
+    table = pd.DataFrame(
+        [
+            {"size": int(size), "stage": stage, **record}
+            for size, stages in current["results"].items()
+            for stage, record in stages.items()
+        ]
+    )
+    print(table.to_string(index=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare_to_baseline(
+                current, json.load(f), threshold=args.threshold
+            )
+        print()
+        print(comparison.to_string(index=False))
+        if comparison["regression"].any():
+            print(
+                f"\n{int(comparison['regression'].sum())} stage(s) regressed by more than "
+                f"{args.threshold:.0%}",
+                file=sys.stderr,
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
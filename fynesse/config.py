@@ -1,6 +1,6 @@
 import os
-from typing import Any, Dict
-import yaml
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional
 
 default_file: str = os.path.join(os.path.dirname(__file__), "defaults.yml")
 local_file: str = os.path.abspath(
@@ -8,31 +8,75 @@ local_file: str = os.path.abspath(
 )
 user_file: str = "_config.yml"
 
-config: Dict[str, Any] = {}
-
-if os.path.exists(default_file):
-    with open(default_file) as file:
-        config.update(yaml.load(file, Loader=yaml.FullLoader))
-
-if os.path.exists(local_file):
-    with open(local_file) as file:
-        config.update(yaml.load(file, Loader=yaml.FullLoader))
-
-if os.path.exists(user_file):
-    with open(user_file) as file:
-        config.update(yaml.load(file, Loader=yaml.FullLoader))
-
-if config == {}:
-    raise ValueError(
-        "No configuration file found at either "
-        + user_file
-        + " or "
-        + local_file
-        + " or "
-        + default_file
-        + "."
-    )
-
-for key, item in config.items():
-    if item is str:
-        config[key] = os.path.expandvars(item)
+
+def load_config() -> Dict[str, Any]:
+    """Read and merge the default, machine and user configuration files."""
+    import yaml
+
+    config: Dict[str, Any] = {}
+
+    if os.path.exists(default_file):
+        with open(default_file) as file:
+            config.update(yaml.load(file, Loader=yaml.FullLoader))
+
+    if os.path.exists(local_file):
+        with open(local_file) as file:
+            config.update(yaml.load(file, Loader=yaml.FullLoader))
+
+    if os.path.exists(user_file):
+        with open(user_file) as file:
+            config.update(yaml.load(file, Loader=yaml.FullLoader))
+
+    if config == {}:
+        raise ValueError(
+            "No configuration file found at either "
+            + user_file
+            + " or "
+            + local_file
+            + " or "
+            + default_file
+            + "."
+        )
+
+    for key, item in config.items():
+        if isinstance(item, str):
+            config[key] = os.path.expandvars(item)
+    return config
+
+
+class LazyConfig(MutableMapping):
+    """Configuration mapping that reads the YAML files on first access and caches them."""
+
+    def __init__(self) -> None:
+        self._data: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        data = self._data
+        if data is None:
+            data = self._data = load_config()
+        return data
+
+    def reload(self) -> None:
+        """Forget the cached values so the files are read again on next access."""
+        self._data = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._load()[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._load()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._load()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __repr__(self) -> str:
+        return repr(self._load())
+
+
+config: MutableMapping = LazyConfig()
@@ -0,0 +1,274 @@
+# profiling.py
+"""
+Stage-level instrumentation for fynesse pipelines.
+
+Pipeline entry points (``HealthDataLoader.load_data``, ``merge_dfs_to_gdf``,
+``clean_county_names`` and the ``HealthFacilityOptimizer`` stages) are wrapped
+with ``profiled``. While profiling is disabled, which is the default, the
+wrapper costs one attribute check per call. Once ``enable()`` is called,
+every stage records:
+
+- wall time
+- process CPU time
+- peak traced memory above the stage's starting point (tracemalloc)
+- the row and column count of the frame it produced
+
+The records can be exported as JSON or as a Chrome trace, which opens in
+chrome://tracing or Perfetto.
+
+Example:
+    from fynesse import profiling
+    profiling.enable()
+    ...run the pipeline...
+    profiling.profiler.to_chrome_trace("run.trace.json")
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+Shape = Tuple[Optional[int], Optional[int]]
+
+
+class Profiler:
+    """
+    Collects one record per profiled stage.
+
+    Stages may nest and may run on several threads; each thread keeps its own
+    stack. tracemalloc and process CPU time are process-wide, so stages that
+    overlap in time on different threads share their memory peaks and CPU time.
+    """
+
+    def __init__(self, enabled: bool = False, memory: bool = True) -> None:
+        """
+        Parameters:
+            enabled (bool): Record stages.
+            memory (bool): Trace peak memory with tracemalloc (slows allocation-heavy code).
+        """
+        self.enabled = enabled
+        self.memory = memory
+        self.records: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracing = False
+        if enabled:
+            self.enable(memory)
+
+    def enable(self, memory: Optional[bool] = None) -> None:
+        """Start recording; with memory tracing, start tracemalloc unless it is already running."""
+        if memory is not None:
+            self.memory = memory
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording, and stop tracemalloc if this profiler started it."""
+        self.enabled = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def clear(self) -> None:
+        """Drop all records and restart the trace clock."""
+        with self._lock:
+            self.records = []
+            self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, frame: Any = None) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Record the enclosed block as a stage.
+
+        Parameters:
+            name (str): Stage name.
+            frame: Optional DataFrame (or (rows, cols) tuple) whose size is recorded;
+                it can also be set afterwards as ``record['rows']``/``['cols']``.
+
+        Yields:
+            dict: The stage record (None when profiling is disabled).
+        """
+        if not self.enabled:
+            yield None
+            return
+        record: Dict[str, Any] = {"name": name, "rows": None, "cols": None}
+        record["rows"], record["cols"] = _frame_shape(frame)
+        token = self._enter()
+        try:
+            yield record
+        finally:
+            self._exit(record, token)
+
+    def _enter(self) -> Dict[str, Any]:
+        stack: List[Dict[str, Any]] = self._local.__dict__.setdefault("stack", [])
+        tracing = self.memory and tracemalloc.is_tracing()
+        current = 0
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Keep the enclosing stage's peak so far before resetting for this one
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+        token = {
+            "start": current,
+            "peak": current,
+            "tracing": tracing,
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+        }
+        stack.append(token)
+        return token
+
+    def _exit(self, record: Dict[str, Any], token: Dict[str, Any]) -> None:
+        wall_end, cpu_end = time.perf_counter(), time.process_time()
+        stack = self._local.stack
+        stack.pop()
+        if token["tracing"] and tracemalloc.is_tracing():
+            token["peak"] = max(token["peak"], tracemalloc.get_traced_memory()[1])
+            record["peak_bytes"] = token["peak"] - token["start"]
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], token["peak"])
+        else:
+            record["peak_bytes"] = None
+        record.update(
+            {
+                "start_s": token["wall"] - self._origin,
+                "wall_s": wall_end - token["wall"],
+                "cpu_s": cpu_end - token["cpu"],
+                "depth": len(stack),
+                "thread": threading.get_ident(),
+            }
+        )
+        with self._lock:
+            self.records.append(record)
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """
+        Export the records as JSON.
+
+        Parameters:
+            path (str): File to write; None returns the JSON string.
+        """
+        text = json.dumps({"records": self.records}, indent=2, default=str)
+        if path is None:
+            return text
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def to_chrome_trace(self, path: Optional[str] = None) -> Any:
+        """
+        Export the records in Chrome trace-event format (complete 'X' events).
+
+        Parameters:
+            path (str): File to write; None returns the trace as a dict.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": r["name"],
+                "cat": r["name"].split(".")[0],
+                "ph": "X",
+                "ts": r["start_s"] * 1e6,
+                "dur": r["wall_s"] * 1e6,
+                "pid": pid,
+                "tid": r["thread"],
+                "args": {k: r[k] for k in ("cpu_s", "peak_bytes", "rows", "cols")},
+            }
+            for r in sorted(self.records, key=lambda r: r["start_s"])
+        ]
+        trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if path is None:
+            return trace
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return path
+
+    def summary(self) -> Any:
+        """Return the records as a DataFrame, one row per stage call."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            self.records,
+            columns=[
+                "name",
+                "start_s",
+                "wall_s",
+                "cpu_s",
+                "peak_bytes",
+                "rows",
+                "cols",
+                "depth",
+                "thread",
+            ],
+        )
+
+
+def _frame_shape(frame: Any) -> Shape:
+    """Return (rows, cols) of a frame, a (frame, ...) tuple or a (rows, cols) pair."""
+    if (
+        isinstance(frame, tuple)
+        and len(frame) == 2
+        and all(isinstance(v, int) for v in frame)
+    ):
+        return frame
+    if isinstance(frame, tuple) and frame:
+        frame = frame[0]
+    shape = getattr(frame, "shape", None)
+    if shape is None:
+        return None, None
+    return int(shape[0]), int(shape[1]) if len(shape) > 1 else 1
+
+
+# Process-wide profiler used by the instrumented pipeline stages
+profiler = Profiler()
+
+
+def enable(memory: bool = True) -> None:
+    """Start recording the instrumented stages in the shared ``profiler``."""
+    profiler.enable(memory)
+
+
+def disable() -> None:
+    """Stop recording in the shared ``profiler``."""
+    profiler.disable()
+
+
+def profiled(
+    name: Optional[str] = None, frame: Optional[Callable[..., Any]] = None
+) -> Callable[[F], F]:
+    """
+    Decorate a function so each call is recorded as a stage by the shared profiler.
+
+    Parameters:
+        name (str): Stage name (default: the function's qualified name).
+        frame (callable): ``frame(args, kwargs, result)`` returning the frame, or
+            (rows, cols), whose size is recorded; default uses the return value.
+    """
+
+    def decorator(func: F) -> F:
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                if record is not None:  # None if profiling was disabled meanwhile
+                    record["rows"], record["cols"] = _frame_shape(
+                        frame(args, kwargs, result) if frame is not None else result
+                    )
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
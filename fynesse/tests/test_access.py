@@ -7,6 +7,12 @@ This module tests data access functionality including:
 - Error handling for access issues
 """
 
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.request import url2pathname
+
 import pytest
 from fynesse import access
 
@@ -72,3 +78,796 @@ class TestAccessErrorHandling:
         """Test handling of invalid or corrupted data sources."""
         # Template test - would test actual error handling in real implementation
         pass
+
+
+def _write_sources(directory: Path) -> str:
+    """Write a miniature copy of the loader's sources into directory."""
+    import geopandas as gpd
+    import pandas as pd
+    from shapely.geometry import box
+
+    counties = ["Nairobi", "Mombasa", "Kisumu"]
+    gpd.GeoDataFrame(
+        {"County": counties, "Population_density": [6000.0, 5000.0, 500.0]},
+        geometry=[box(i, 0, i + 1, 1) for i in range(3)],
+        crs="EPSG:4326",
+    ).to_file(directory / "county_with_raster_means.gpkg", driver="GPKG")
+    names = [
+        "facilities_data.csv",
+        "projected_population_2025.csv",
+        "teen_pregnacy_dataByCounty.csv",
+        "level2_lessthan3nursesfacilities_nurses.csv",
+        "sexual_violence.csv",
+    ]
+    for i, name in enumerate(names):
+        pd.DataFrame({"County": counties, f"value_{i}": [1, 2, 3]}).to_csv(
+            directory / name, index=False
+        )
+    return directory.as_uri()
+
+
+@pytest.fixture
+def local_sources(tmp_path: Path) -> str:
+    """Serve the loader's sources from a local directory via file:// URLs."""
+    source_dir = tmp_path / "sources"
+    source_dir.mkdir()
+    return _write_sources(source_dir)
+
+
+class TestDatasetCache:
+    """Test suite for the on-disk dataset cache."""
+
+    def test_warm_load_reads_only_local_files(
+        self, tmp_path: Path, local_sources: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a warm run never contacts the source."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        loader = access.HealthDataLoader(base_url=local_sources, cache=cache)
+        loader.load_data()
+        assert len(cache.manifest) == 6
+
+        def fail(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("source contacted on warm run")
+
+        monkeypatch.setattr(access.urllib.request, "urlopen", fail)
+        warm = access.HealthDataLoader(
+            base_url=local_sources,
+            cache=access.DatasetCache(cache_dir=str(tmp_path / "cache")),
+        )
+        warm.load_data()
+        assert list(warm.get_facilities()["County"]) == ["Nairobi", "Mombasa", "Kisumu"]
+        assert len(warm.get_county_boundaries()) == 3
+
+    def test_revalidation_picks_up_changed_source(
+        self, tmp_path: Path, local_sources: str
+    ) -> None:
+        """Test that a stale entry is refreshed when the source changes."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"), max_age=0)
+        url = f"{local_sources}/facilities_data.csv"
+        first = cache.get(url)
+        assert cache.get(url) == first
+
+        source = os.path.join(
+            url2pathname(local_sources[len("file://") :]), "facilities_data.csv"
+        )
+        with open(source, "w") as file:
+            file.write("County,value\nNairobi,42\n")
+        later = time.time() + 10
+        os.utime(source, (later, later))
+        second = cache.get(url)
+        assert second != first
+        with open(second) as file:
+            assert file.read() == "County,value\nNairobi,42\n"
+
+    def test_lru_eviction_respects_size_limit(
+        self, tmp_path: Path, local_sources: str
+    ) -> None:
+        """Test that least recently used objects are evicted beyond max_bytes."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"), max_bytes=120)
+        first = cache.get(f"{local_sources}/facilities_data.csv")
+        cache.get(f"{local_sources}/projected_population_2025.csv")
+        cache.get(f"{local_sources}/sexual_violence.csv")
+        assert cache.size() <= 120
+        assert f"{local_sources}/facilities_data.csv" not in cache.manifest
+        assert not os.path.exists(first)
+
+    def test_verify_drops_corrupt_objects(
+        self, tmp_path: Path, local_sources: str
+    ) -> None:
+        """Test that verify detects objects whose content no longer matches the hash."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        url = f"{local_sources}/facilities_data.csv"
+        with open(cache.get(url), "a") as file:
+            file.write("corrupt")
+        assert cache.verify() == [url]
+        assert url not in cache.manifest
+
+
+class TestConcurrentLoading:
+    """Test suite for concurrent fetching in HealthDataLoader.load_data."""
+
+    def test_sources_load_concurrently(
+        self, local_sources: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that total latency tracks the slowest source, not the sum."""
+
+        def slow_load(
+            self: Any,
+            url: str,
+            reader: Any,
+            columns: Optional[List[str]] = None,
+            dtypes: Optional[Dict[str, Any]] = None,
+        ) -> str:
+            time.sleep(0.3)
+            return url
+
+        monkeypatch.setattr(access.HealthDataLoader, "_load_source", slow_load)
+        loader = access.HealthDataLoader(base_url=local_sources, cache=False)
+        start = time.perf_counter()
+        loader.load_data()
+        assert time.perf_counter() - start < 1.0
+        assert loader.get_facilities() == loader.health_facilities_data
+
+    def test_uncached_load_reads_all_sources(self, local_sources: str) -> None:
+        """Test loading without a cache goes through in-memory buffers."""
+        loader = access.HealthDataLoader(base_url=local_sources, cache=False)
+        loader.load_data()
+        assert len(loader.get_county_boundaries()) == 3
+        assert "value_4" in loader.get_sexual_violence().columns
+
+    def test_failures_are_aggregated(self, tmp_path: Path) -> None:
+        """Test that every failing source is reported in one DataLoadError."""
+        loader = access.HealthDataLoader(
+            base_url=(tmp_path / "missing").as_uri(), cache=False
+        )
+        with pytest.raises(access.DataLoadError) as excinfo:
+            loader.load_data()
+        assert len(excinfo.value.errors) == 6
+        assert "facilities_df" in excinfo.value.errors
+
+    def test_transient_errors_are_retried(
+        self, tmp_path: Path, local_sources: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a source is retried after transient failures."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        real_get = cache.get
+        calls = []
+
+        def flaky_get(url: str, timeout: Optional[float] = None) -> Any:
+            calls.append(url)
+            if len(calls) < 3:
+                raise access.urllib.error.URLError("connection reset")
+            return real_get(url, timeout=timeout)
+
+        monkeypatch.setattr(cache, "get", flaky_get)
+        loader = access.HealthDataLoader(base_url=local_sources, cache=cache, retries=2)
+        loader.backoff = 0
+        path = loader._fetch(loader.health_facilities_data)
+        assert isinstance(path, str) and os.path.exists(path)
+        assert len(calls) == 3
+
+
+class TestLazyAccessors:
+    """Test suite for lazy, column-projected dataset accessors."""
+
+    def test_accessor_loads_only_its_source(
+        self, tmp_path: Path, local_sources: str
+    ) -> None:
+        """Test that an accessor loads its dataset on first use only."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        loader = access.HealthDataLoader(base_url=local_sources, cache=cache)
+        facilities = loader.get_facilities()
+        assert list(facilities.columns) == ["County", "value_0"]
+        assert loader.get_facilities() is facilities
+        assert list(cache.manifest) == [loader.health_facilities_data]
+        assert loader.sexual_violence_df is None
+
+    def test_column_projection_and_dtypes(self, local_sources: str) -> None:
+        """Test that columns and dtypes are applied when parsing the source."""
+        loader = access.HealthDataLoader(base_url=local_sources, cache=False)
+        df = loader.get_projected_population(
+            columns=["value_1"], dtypes={"value_1": "int32"}
+        )
+        assert list(df.columns) == ["County", "value_1"]
+        assert df["value_1"].dtype == "int32"
+        assert loader.projected_population_df is None
+
+        gdf = loader.get_county_boundaries(columns=[], dtypes={"County": "category"})
+        assert list(gdf.columns) == ["County", "geometry"]
+        assert gdf["County"].dtype == "category"
+
+    def test_projection_reuses_loaded_frame(self, local_sources: str) -> None:
+        """Test that projections are served from an eagerly loaded dataset."""
+        loader = access.HealthDataLoader(base_url=local_sources, cache=False)
+        loader.load_data()
+        df = loader.get_teen_pregnancy(
+            columns=["value_2"], dtypes={"value_2": "float32"}
+        )
+        assert list(df.columns) == ["County", "value_2"]
+        assert df["value_2"].dtype == "float32"
+
+
+class TestColumnarIngestion:
+    """Test suite for the columnar (Geo)Parquet ingestion path."""
+
+    def test_later_loads_read_parquet_copy(
+        self, tmp_path: Path, local_sources: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that sources are parsed once and then read from Parquet."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        access.HealthDataLoader(
+            base_url=local_sources, cache=cache, columnar=True
+        ).load_data()
+        assert len(os.listdir(tmp_path / "cache" / "columnar")) == 6
+
+        def fail(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("source parsed again")
+
+        import geopandas as gpd
+
+        monkeypatch.setattr(access.pd, "read_csv", fail)
+        monkeypatch.setattr(gpd, "read_file", fail)
+        loader = access.HealthDataLoader(
+            base_url=local_sources, cache=cache, columnar=True
+        )
+        loader.load_data()
+        boundaries = loader.get_county_boundaries()
+        assert boundaries.total_bounds.tolist() == [0.0, 0.0, 3.0, 1.0]
+        df = loader.get_low_staff_facilities()
+        assert list(df.columns) == ["County", "value_3"]
+
+    def test_projection_reads_selected_columns(
+        self, tmp_path: Path, local_sources: str
+    ) -> None:
+        """Test that column projection is applied to the Parquet copy."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        loader = access.HealthDataLoader(
+            base_url=local_sources, cache=cache, columnar=True
+        )
+        gdf = loader.get_county_boundaries(columns=["Population_density"])
+        assert list(gdf.columns) == ["County", "Population_density", "geometry"]
+
+    def test_changed_source_is_reconverted(
+        self, tmp_path: Path, local_sources: str
+    ) -> None:
+        """Test that a new source fingerprint replaces the stale Parquet copy."""
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"), max_age=0)
+        loader = access.HealthDataLoader(
+            base_url=local_sources, cache=cache, columnar=True
+        )
+        loader.get_facilities()
+        source = os.path.join(
+            url2pathname(local_sources[len("file://") :]), "facilities_data.csv"
+        )
+        with open(source, "w") as file:
+            file.write("County,beds\nNairobi,7\n")
+        later = time.time() + 10
+        os.utime(source, (later, later))
+
+        reloaded = access.HealthDataLoader(
+            base_url=local_sources, cache=cache, columnar=True
+        )
+        assert list(reloaded.get_facilities()["beds"]) == [7]
+        assert len(os.listdir(tmp_path / "cache" / "columnar")) == 1
+
+    def test_mixed_type_column_falls_back_to_direct_parse(
+        self, tmp_path: Path, local_sources: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a column Arrow cannot store is served from the CSV parse."""
+        import pandas as pd
+
+        source = os.path.join(
+            url2pathname(local_sources[len("file://") :]), "facilities_data.csv"
+        )
+        with open(source, "w") as file:
+            file.write("County,code\nNairobi,7\nMombasa,A12\n")
+        read_csv = access._read_csv
+
+        def mixed_read_csv(
+            source: Any,
+            columns: Optional[List[str]] = None,
+            dtypes: Optional[Dict[str, Any]] = None,
+        ) -> Any:
+            # Large CSVs parsed in chunks can mix ints and strings in one column
+            df = read_csv(source, columns=columns, dtypes=dtypes)
+            if "code" in df.columns:
+                parses.append(source)
+                df["code"] = df["code"].map(lambda v: int(v) if v.isdigit() else v)
+            return df
+
+        parses: List[str] = []
+        monkeypatch.setattr(access, "_read_csv", mixed_read_csv)
+        cache = access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        loader = access.HealthDataLoader(
+            base_url=local_sources, cache=cache, columnar=True
+        )
+        loader.load_data()
+        assert list(loader.get_facilities()["code"]) == [7, "A12"]
+        columnar = sorted(os.listdir(tmp_path / "cache" / "columnar"))
+        assert len(columnar) == 6 and sum(n.endswith(".direct") for n in columnar) == 1
+
+        # Later loads serve the direct parse without retrying the conversion
+        def no_parquet(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("conversion retried")
+
+        monkeypatch.setattr(pd.DataFrame, "to_parquet", no_parquet)
+        for _ in range(2):
+            reloaded = access.HealthDataLoader(
+                base_url=local_sources, cache=cache, columnar=True
+            )
+            reloaded.load_data()
+            assert list(reloaded.get_facilities()["code"]) == [7, "A12"]
+        assert len(parses) == 3
+        assert sorted(os.listdir(tmp_path / "cache" / "columnar")) == columnar
+
+
+class TestMergeDfsToGdf:
+    """Test suite for the single-pass multi-way join."""
+
+    @staticmethod
+    def _frames() -> Any:
+        import geopandas as gpd
+        import pandas as pd
+        from shapely.geometry import box
+
+        gdf = gpd.GeoDataFrame(
+            {
+                "County": ["Nairobi", "Mombasa", "Kisumu"],
+                "Population_density": [6.0, 5.0, 0.5],
+            },
+            geometry=[box(i, 0, i + 1, 1) for i in range(3)],
+            crs="EPSG:4326",
+        )
+        facilities = pd.DataFrame(
+            {"County": ["Kisumu", "Nairobi"], "Facilities": [3, 9]}
+        )
+        population = pd.DataFrame(
+            {
+                "County": ["Mombasa", "Nairobi", "Kisumu", "Lamu"],
+                "Population_density": [1.0, 2.0, 3.0, 4.0],
+            }
+        )
+        return gdf, [facilities, population]
+
+    def test_matches_chained_left_merges(self) -> None:
+        """Test that the result equals the chained pandas merges it replaces."""
+        gdf, dfs = self._frames()
+        expected = gdf.copy()
+        for i, df in enumerate(dfs, 1):
+            expected = expected.merge(
+                df, on="County", how="left", suffixes=("", f"_{i}")
+            )
+        merged = access.merge_dfs_to_gdf(gdf, dfs)
+        assert list(merged.columns) == list(expected.columns)
+        assert merged.crs == gdf.crs
+        assert merged["Facilities"].tolist()[0::2] == [9, 3]
+        assert merged["Facilities"].isna().tolist() == [False, True, False]
+        assert merged["Population_density_2"].tolist() == [2.0, 1.0, 3.0]
+        assert merged.geometry.equals(gdf.geometry)
+
+    def test_duplicate_keys_are_rejected(self) -> None:
+        """Test that duplicate join keys raise instead of multiplying rows."""
+        import pandas as pd
+
+        gdf, dfs = self._frames()
+        duplicated = pd.DataFrame({"County": ["Nairobi", "Nairobi"], "x": [1, 2]})
+        with pytest.raises(ValueError, match="DataFrame 1"):
+            access.merge_dfs_to_gdf(gdf, [duplicated])
+
+        repeated = pd.concat([gdf, gdf.iloc[:1]])
+        with pytest.raises(ValueError, match="GeoDataFrame"):
+            access.merge_dfs_to_gdf(repeated, dfs)
+        merged = access.merge_dfs_to_gdf(repeated, dfs, validate="many_to_one")
+        assert merged["Facilities"].tolist()[-1] == 9
+
+
+class TestFacilityDistanceIndex:
+    """Test suite for the KD-tree nearest-facility distance engine."""
+
+    @staticmethod
+    def _facilities() -> Any:
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "Facility": ["A", "B", "C", "D"],
+                "Longitude": [36.8, 39.7, 34.8, None],
+                "Latitude": [-1.3, -4.0, -0.1, 0.0],
+            }
+        )
+
+    def test_query_matches_brute_force_haversine(self) -> None:
+        """Test nearest distances against an exhaustive great-circle search."""
+        import numpy as np
+
+        facilities = self._facilities()
+        index = access.FacilityDistanceIndex(facilities)
+        rng = np.random.default_rng(0)
+        lon, lat = rng.uniform(34, 41, 1000), rng.uniform(-4.5, 4.5, 1000)
+        distance, nearest = index.query(lon, lat, chunk_size=128)
+
+        flon, flat = np.radians(facilities["Longitude"][:3]), np.radians(
+            facilities["Latitude"][:3]
+        )
+        qlon, qlat = np.radians(lon)[:, None], np.radians(lat)[:, None]
+        h = (
+            np.sin((flat.to_numpy() - qlat) / 2) ** 2
+            + np.cos(qlat)
+            * np.cos(flat.to_numpy())
+            * np.sin((flon.to_numpy() - qlon) / 2) ** 2
+        )
+        brute = 2 * access.EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+        np.testing.assert_allclose(distance, brute.min(axis=1), rtol=1e-9)
+        assert (nearest == brute.argmin(axis=1)).all()
+
+        distance, nearest = index.query([np.nan], [0.0])
+        assert np.isnan(distance[0]) and nearest[0] == -1
+
+    def test_county_stats_for_grid_points_and_polygons(self) -> None:
+        """Test per-county summaries for labelled points and county polygons."""
+        import geopandas as gpd
+        import pandas as pd
+        from shapely.geometry import box
+
+        index = access.FacilityDistanceIndex(self._facilities())
+        grid = pd.DataFrame(
+            {
+                "County": ["Nairobi", "Nairobi", "Mombasa"],
+                "Longitude": [36.8, 37.8, 39.7],
+                "Latitude": [-1.3, -1.3, -4.0],
+                "Population": [3.0, 1.0, 5.0],
+            }
+        )
+        stats = index.county_stats(grid, weight_col="Population").set_index("County")
+        far = index.query([37.8], [-1.3])[0][0]
+        assert stats.loc["Mombasa", "Health_Facilities_distance"] == 0.0
+        assert stats.loc["Nairobi", "Health_Facilities_distance"] == pytest.approx(
+            far / 4
+        )
+        assert stats.loc["Nairobi", "Health_Facilities_distance_max"] == pytest.approx(
+            far
+        )
+        assert stats.loc["Nairobi", "Distance_points"] == 2
+
+        counties = gpd.GeoDataFrame(
+            {"County": ["Kisumu"]},
+            geometry=[box(34.7, -0.2, 34.9, 0.0)],
+            crs="EPSG:4326",
+        )
+        assert index.county_stats(counties)["Health_Facilities_distance"].iloc[0] < 15
+
+
+class TestZonalStatistics:
+    """Test suite for the streaming zonal-statistics stage."""
+
+    @staticmethod
+    def _zones() -> Any:
+        import geopandas as gpd
+        from shapely.geometry import box
+
+        return gpd.GeoDataFrame(
+            {"County": ["West", "East", "Outside"]},
+            geometry=[box(0, 0, 5, 10), box(5, 0, 10, 10), box(20, 20, 21, 21)],
+        )
+
+    def test_streamed_stats_match_full_raster(self, tmp_path: Path) -> None:
+        """Test windowed accumulation against whole-array statistics."""
+        import numpy as np
+
+        values = np.arange(100 * 100, dtype=float).reshape(100, 100)
+        values[0, 0] = -9999
+        path = str(tmp_path / "raster.npy")
+        np.save(path, values)
+        transform = (0.1, 0, 0, 0, -0.1, 10)  # 0.1 unit pixels, top-left at (0, 10)
+
+        result = access.zonal_statistics(
+            path,
+            self._zones(),
+            name="Population_density",
+            transform=transform,
+            nodata=-9999,
+            window_rows=7,
+            label_cache_dir=str(tmp_path / "zones"),
+        ).set_index("County")
+        west = values[:, :50][values[:, :50] != -9999]
+        assert result.loc["West", "Population_density"] == pytest.approx(west.mean())
+        assert result.loc["West", "Population_density_count"] == west.size
+        assert result.loc["East", "Population_density_sum"] == pytest.approx(
+            values[:, 50:].sum()
+        )
+        assert np.isnan(result.loc["Outside", "Population_density"])
+
+    def test_label_mask_is_cached_and_rasterio_sources_work(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the label mask is reused and GeoTIFFs are read in windows."""
+        import numpy as np
+
+        rasterio = pytest.importorskip("rasterio")
+
+        values = np.ones((40, 40), dtype="float32")
+        tif = str(tmp_path / "ones.tif")
+        with rasterio.open(
+            tif,
+            "w",
+            driver="GTiff",
+            height=40,
+            width=40,
+            count=1,
+            dtype="float32",
+            transform=rasterio.Affine(0.25, 0, 0, 0, -0.25, 10),
+        ) as dst:
+            dst.write(values, 1)
+
+        cache = str(tmp_path / "zones")
+        first = access.zonal_statistics(
+            tif, self._zones(), window_rows=16, label_cache_dir=cache
+        )
+        assert len(os.listdir(cache)) == 1
+        monkeypatch.setattr(access, "_rasterize_zones", None)  # a rebuild would fail
+        second = access.zonal_statistics(
+            tif, self._zones(), window_rows=16, label_cache_dir=cache
+        )
+        assert (
+            first["value_count"].tolist()
+            == second["value_count"].tolist()
+            == [800, 800, 0]
+        )
+
+    def test_label_masks_are_keyed_by_labeller_and_evicted(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that each labeller gets its own mask and old masks are evicted."""
+        import importlib.util
+
+        import numpy as np
+
+        pytest.importorskip("rasterio")
+
+        cache = str(tmp_path / "zones")
+        mask_bytes = 100 * 100 * 4 + 128  # int32 grid plus the .npy header
+
+        def labels(top: float, max_bytes: int) -> Any:
+            transform = (0.1, 0, 0, 0, -0.1, top)
+            return access._zone_labels(
+                self._zones(), (100, 100), transform, 16, cache, max_bytes
+            )
+
+        rasterised = np.array(labels(10, 10**6))
+        find_spec = importlib.util.find_spec
+        monkeypatch.setattr(
+            importlib.util,
+            "find_spec",
+            lambda name, *args: None if name == "rasterio" else find_spec(name, *args),
+        )
+        queried = np.array(labels(10, 10**6))
+        assert len(os.listdir(cache)) == 2
+        np.testing.assert_array_equal(rasterised, queried)
+
+        labels(20, mask_bytes)
+        assert len(os.listdir(cache)) == 1
+
+    def test_rasterised_labels_match_pixel_centre_query(self) -> None:
+        """Test that GDAL rasterisation labels the same pixel centres as the STRtree."""
+        import geopandas as gpd
+        import numpy as np
+        from shapely.geometry import Point
+
+        pytest.importorskip("rasterio")
+
+        zones = gpd.GeoDataFrame(
+            geometry=[Point(3.03, 4.07).buffer(2.71), Point(7.11, 6.02).buffer(1.93)]
+        )
+        transform = (0.1, 0, 0, 0, -0.1, 10)
+        rasterised = np.empty((100, 100), dtype=np.int32)
+        queried = np.empty((100, 100), dtype=np.int32)
+        access._rasterize_zones(rasterised, zones, transform, window_rows=13)
+        access._query_zones(queried, zones, transform, window_rows=13)
+        assert (queried >= 0).sum() > 3000
+        np.testing.assert_array_equal(rasterised, queried)
+
+
+class TestStreamingAggregation:
+    """Test suite for out-of-core aggregation of large CSVs to county level."""
+
+    def test_chunked_aggregation_matches_in_memory(self, tmp_path: Path) -> None:
+        """Test that streamed partial aggregates equal a whole-file groupby."""
+        import numpy as np
+        import pandas as pd
+
+        rng = np.random.default_rng(0)
+        n = 5000
+        records = pd.DataFrame(
+            {
+                "County": rng.choice(
+                    ["Nairobi", "nairobi city", "Kisumu", "Total", "Lamu"], n
+                ),
+                "beds": rng.integers(0, 50, n).astype(float),
+                "staff": rng.integers(1, 20, n),
+                "other": "x",
+            }
+        )
+        records.loc[::7, "beds"] = np.nan
+        path = tmp_path / "registry.csv"
+        records.to_csv(path, index=False)
+
+        loader = access.HealthDataLoader(
+            cache=access.DatasetCache(cache_dir=str(tmp_path / "cache"))
+        )
+        result = loader.aggregate_by_county(
+            path.as_uri(),
+            sums=["staff"],
+            means=["beds"],
+            rates={"beds_per_staff": ("beds", "staff")},
+            chunksize=333,
+            max_workers=3,
+        ).set_index("County")
+
+        records["County"] = records["County"].replace({"nairobi city": "Nairobi"})
+        valid = records[records["County"] != "Total"]
+        expected = valid.groupby("County")
+        assert result.attrs["dropped_rows"] == (records["County"] == "Total").sum()
+        assert result["Records"].to_dict() == expected.size().to_dict()
+        assert result["staff"].to_dict() == expected["staff"].sum().to_dict()
+        for county in ["Nairobi", "Kisumu", "Lamu"]:
+            group = valid[valid["County"] == county]
+            assert result.loc[county, "beds_mean"] == pytest.approx(
+                group["beds"].mean()
+            )
+            assert result.loc[county, "beds_per_staff"] == pytest.approx(
+                group["beds"].sum() / group["staff"].sum()
+            )
+
+    @pytest.mark.parametrize("cached", [True, False])
+    def test_download_is_streamed_to_disk(self, tmp_path: Path, cached: bool) -> None:
+        """Test that a cold fetch never holds the whole response body in memory."""
+        import tracemalloc
+
+        path = tmp_path / "registry.csv"
+        with open(path, "w") as file:
+            file.write("County,beds\n")
+            for _ in range(20):
+                file.write("Nairobi,1\n" * 100_000)
+        cache = (
+            access.DatasetCache(cache_dir=str(tmp_path / "cache")) if cached else False
+        )
+        loader = access.HealthDataLoader(cache=cache)
+
+        tracemalloc.start()
+        try:
+            source = loader._fetch(path.as_uri())
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak < 4 * 1024**2 < os.path.getsize(path)
+        if cached:
+            assert isinstance(source, str)
+            assert access._file_sha256(source) == access._file_sha256(str(path))
+        else:
+            assert not isinstance(source, str)
+            with source:
+                assert source.read() == path.read_bytes()
+
+
+def _staircase_zones(n: int = 60) -> Any:
+    """Four adjacent zones with staircase boundaries built from an n x n grid of unit cells."""
+    import geopandas as gpd
+    import numpy as np
+    import shapely
+
+    i, j = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    wave = n / 2 + (n / 6) * np.sin(j / 4)
+    zone = (i > wave).astype(int) * 2 + (j > n / 2 + (n / 6) * np.cos(i / 5)).astype(
+        int
+    )
+    cells = shapely.box(j.ravel(), i.ravel(), j.ravel() + 1, i.ravel() + 1)
+    polygons = [shapely.union_all(cells[zone.ravel() == z]) for z in range(4)]
+    # Scale the grid to about one degree so the default tolerances apply
+    polygons = [
+        shapely.affinity.scale(p, 1 / n, 1 / n, origin=(0, 0)) for p in polygons
+    ]
+    return gpd.GeoSeries(polygons, crs="EPSG:4326")
+
+
+class TestGeometryCache:
+    """Test suite for the multi-resolution simplified geometry cache."""
+
+    def test_levels_are_simplified_and_keep_shared_edges(self) -> None:
+        """Test that coarser levels have fewer vertices and neighbours still tile the area."""
+        import shapely
+
+        zones = _staircase_zones()
+        cache = access.GeometryCache(zones)
+        full = shapely.get_num_coordinates(zones.to_numpy()).sum()
+        counts = [
+            shapely.get_num_coordinates(cache.simplified(t).to_numpy()).sum()
+            for t in cache.tolerances
+        ]
+        assert counts[0] < full
+        assert counts == sorted(counts, reverse=True)
+        coarse = cache.simplified(cache.tolerances[-1]).to_numpy()
+        assert shapely.coverage_is_valid(coarse)
+        assert shapely.union_all(coarse).area == pytest.approx(
+            sum(g.area for g in coarse)
+        )
+        assert cache.simplified(cache.tolerances[-1]) is cache.simplified(
+            cache.tolerances[-1]
+        )
+
+    def test_geojson_is_precomputed_and_smaller(self) -> None:
+        """Test that GeoJSON is built once per level and shrinks with simplification."""
+        import json
+
+        zones = _staircase_zones()
+        cache = access.GeometryCache(zones)
+        coarse = cache.geojson(cache.tolerances[-1])
+        assert cache.geojson(cache.tolerances[-1]) is coarse
+        assert [f["id"] for f in coarse["features"]] == ["0", "1", "2", "3"]
+        assert len(json.dumps(coarse)) * 5 < len(json.dumps(zones.__geo_interface__))
+
+    def test_tolerance_selection_and_sharing(self) -> None:
+        """Test zoom/extent tolerance choice and that equal boundaries share one cache."""
+        zones = _staircase_zones()
+        cache = access.geometry_cache(zones)
+        assert access.geometry_cache(_staircase_zones()) is cache
+        assert cache.tolerance_for_zoom(5.8) == 0.02
+        assert cache.tolerance_for_zoom(20) == 0.0
+        assert cache.tolerance_for_extent(200) == 0.005  # one pixel is 1/200 degree
+        assert access.geometry_cache(zones.to_crs(3857)) is not cache
+
+
+class TestImportTime:
+    """Test suite for lazy loading of submodules, heavy dependencies and config."""
+
+    # Generous budget for the loader-only path; eager imports took about 2.5 s
+    BUDGET_SECONDS = 1.5
+
+    @staticmethod
+    def _run(code: str) -> Any:
+        import json
+        import subprocess
+        import sys
+
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        )
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def test_loader_import_skips_heavy_dependencies(self) -> None:
+        """Test that importing the loader stays within budget without plotting or ML libraries."""
+        result = self._run(
+            "import json, sys, time\n"
+            "t = time.perf_counter()\n"
+            "import fynesse\n"
+            "bare = sorted(m for m in ('pandas', 'fynesse.access') if m in sys.modules)\n"
+            "from fynesse.access import HealthDataLoader\n"
+            "elapsed = time.perf_counter() - t\n"
+            "heavy = ('geopandas', 'matplotlib', 'seaborn', 'sklearn', 'plotly', 'yaml')\n"
+            "print(json.dumps({'bare': bare, 'elapsed': elapsed,\n"
+            "                  'heavy': sorted(m for m in heavy if m in sys.modules)}))"
+        )
+        assert result["bare"] == []
+        assert result["heavy"] == []
+        assert result["elapsed"] < self.BUDGET_SECONDS
+
+    def test_config_is_parsed_on_first_access(self) -> None:
+        """Test that config reads its YAML only when first used, and submodules load on demand."""
+        result = self._run(
+            "import json, sys\n"
+            "import fynesse\n"
+            "cfg = fynesse.config.config\n"
+            "before = 'yaml' in sys.modules\n"
+            "value = cfg.get('loader_retries')\n"
+            "print(json.dumps({'before': before, 'after': 'yaml' in sys.modules, 'value': value,\n"
+            "                  'address': type(fynesse.address).__name__}))"
+        )
+        assert result == {
+            "before": False,
+            "after": True,
+            "value": 2,
+            "address": "module",
+        }
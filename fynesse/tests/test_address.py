@@ -8,10 +8,64 @@ This module tests question addressing functionality including:
 - Dashboard creation
 """
 
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
 import pytest
 from fynesse import address
 
 
+def _counties(n: int = 12, seed: int = 0) -> Any:
+    """Build a synthetic county GeoDataFrame with every column preprocess expects."""
+    import geopandas as gpd
+    import pandas as pd
+    from shapely.geometry import box
+
+    rng = np.random.default_rng(seed)
+    data: Dict[str, Any] = {
+        "Shape_Leng": rng.uniform(1, 10, n),
+        "Shape_Area": rng.uniform(0.1, 2, n),
+        "County": [f"County {i}" for i in range(n)],
+        "ADM1_PCODE": [f"KE{i:03d}" for i in range(n)],
+        "ADM1_REF": None,
+        "ADM1ALT1EN": None,
+        "ADM1ALT2EN": None,
+        "ADM0_EN": "Kenya",
+        "ADM0_PCODE": "KE",
+        "date": "2017-11-03",
+        "validOn": "2019-10-31",
+        "validTo": None,
+        "Population_density": rng.uniform(5, 6000, n),
+        "Health_Facilities_distance": rng.uniform(0.5, 40, n),
+        "Total_number_of_facilities": rng.integers(20, 900, n),
+        "insurance_covered_population": rng.uniform(0, 1, n),
+        "Facilities_Completed": rng.integers(0, 50, n),
+        "Facilities_Closed": rng.integers(0, 10, n),
+        "2025_Projected_Population": rng.integers(100_000, 4_000_000, n),
+        "Have_ever_had_a_pregnancy_loss": rng.uniform(0, 20, n),
+        "Number_of_women_with_underage_pregnancy": rng.integers(0, 500, n),
+        "Total_Level2_Facilities": rng.integers(5, 300, n),
+        "LowStaff_Facilities": rng.integers(0, 100, n),
+        "Percentage_of_scarcity": rng.uniform(0, 60, n),
+        "Ever_got_underage_pregnancy(%)": rng.uniform(0, 40, n),
+        "Number_of_women_5": rng.integers(100, 3000, n),
+    }
+    data["Health_Facilities_distance"][0] = np.nan
+    geometry = [box(i % 6, i // 6, i % 6 + 1, i // 6 + 1) for i in range(n)]
+    return gpd.GeoDataFrame(pd.DataFrame(data), geometry=geometry, crs="EPSG:4326")
+
+
+@pytest.fixture
+def optimizer() -> address.HealthFacilityOptimizer:
+    """A HealthFacilityOptimizer over synthetic counties, already preprocessed."""
+    opt = address.HealthFacilityOptimizer(_counties())
+    opt.preprocess()
+    return opt
+
+
 class TestAddressModule:
     """Test suite for the address module."""
 
@@ -131,3 +185,616 @@ class TestAddressIntegration:
         """Test communication of results to stakeholders."""
         # Template test - would test actual result communication in real implementation
         pass
+
+
+class TestScenarioScoring:
+    """Test suite for batch Priority_Score weight sweeps."""
+
+    def test_default_scenario_matches_priority_score(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that one scenario with default weights reproduces Priority_Score."""
+        optimizer.normalize_and_score()
+        weights = [[address.default_weights[k] for k in address.score_indicators]]
+        scores, ranks = optimizer.score_scenarios(weights)
+        assert scores.shape == ranks.shape == (1, len(optimizer.counties))
+        assert scores.dtype == np.float32 and ranks.dtype == np.int32
+        np.testing.assert_allclose(
+            scores[0], optimizer.counties["Priority_Score"], atol=1e-6
+        )
+        assert ranks[0][optimizer.counties["Priority_Score"].to_numpy().argmax()] == 1
+
+    def test_each_scenario_matches_single_scoring(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that every row of a weight sweep equals scoring that weighting alone."""
+        rng = np.random.default_rng(1)
+        W = rng.dirichlet(np.ones(len(address.score_indicators)), size=50)
+        scores, ranks = optimizer.score_scenarios(W)
+        for i in (0, 17, 49):
+            optimizer.normalize_and_score(dict(zip(address.score_indicators, W[i])))
+            np.testing.assert_allclose(
+                scores[i], optimizer.counties["Priority_Score"], atol=1e-6
+            )
+        assert sorted(ranks[3]) == list(range(1, len(optimizer.counties) + 1))
+
+    def test_weights_must_cover_every_indicator(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that a weight matrix with the wrong width is rejected."""
+        with pytest.raises(ValueError):
+            optimizer.score_scenarios([[0.5, 0.5]])
+
+
+class TestRankStability:
+    """Test suite for Monte Carlo rank-stability analysis."""
+
+    def test_without_uncertainty_ranks_are_fixed(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that zero uncertainty reproduces the baseline ranking in every draw."""
+        result = optimizer.rank_stability(n_draws=20, top_n=3, uncertainty={}, n_jobs=1)
+        optimizer.normalize_and_score()
+        top = optimizer.counties.nlargest(3, "Priority_Score")["County"]
+        assert set(result.loc[result["P_Top_3"] == 1.0, "County"]) == set(top)
+        assert (result["Mean_Rank"] == result["Baseline_Rank"]).all()
+
+    def test_results_reproducible_across_workers(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that the fixed seed gives identical results in-process and in a pool."""
+        serial = optimizer.rank_stability(n_draws=300, batch_size=100, n_jobs=1, seed=7)
+        distribution = optimizer.rank_distribution.copy()
+        pooled = optimizer.rank_stability(n_draws=300, batch_size=100, n_jobs=2, seed=7)
+        assert serial.equals(pooled)
+        assert optimizer.rank_distribution.equals(distribution)
+        np.testing.assert_allclose(distribution.sum(axis=1), 1.0)
+        assert serial["P_Top_10"].between(0, 1).all()
+        assert (serial["Rank_p05"] <= serial["Rank_p95"]).all()
+
+    def test_requires_preprocess(self) -> None:
+        """Test that rank_stability refuses to run before preprocess."""
+        opt = address.HealthFacilityOptimizer(_counties())
+        with pytest.raises(ValueError):
+            opt.rank_stability(n_draws=10)
+
+
+class TestSuggestNewFacilities:
+    """Test suite for vectorised facility suggestions."""
+
+    def test_scalar_threshold_matches_row_formula(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test the vectorised column against the per-row ceil formula."""
+        import math
+
+        optimizer.suggest_new_facilities(people_per_facility=25000)
+        expected = [
+            max(0, math.ceil(pop / 25000) - int(cur))
+            for pop, cur in zip(
+                optimizer.counties["2025_Projected_Population"],
+                optimizer.counties["Total_number_of_facilities"],
+            )
+        ]
+        assert optimizer.counties["Suggested_New_Facilities"].tolist() == expected
+
+    def test_threshold_array_returns_table(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that several service standards are evaluated in one call."""
+        table = optimizer.suggest_new_facilities(people_per_facility=[5000, 30000, 0])
+        assert table is not None
+        assert table.shape == (len(optimizer.counties), 3)
+        assert list(table.columns) == [5000, 30000, 0]
+        optimizer.suggest_new_facilities(people_per_facility=30000)
+        assert (
+            table[30000].tolist()
+            == optimizer.counties["Suggested_New_Facilities"].tolist()
+        )
+        assert (table[5000] >= table[30000]).all()
+
+
+class TestClustering:
+    """Test suite for the clustering subsystem."""
+
+    def test_kmeans_backend_matches_previous_fit(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that the full-batch backend reproduces the original KMeans labels."""
+        from sklearn.cluster import KMeans
+        from sklearn.preprocessing import StandardScaler
+
+        optimizer.cluster_counties(n_clusters=3)
+        X = StandardScaler().fit_transform(
+            optimizer.counties[address.cluster_features].fillna(0)
+        )
+        expected = KMeans(n_clusters=3, random_state=42, n_init=10).fit_predict(X)
+        assert optimizer.counties["Cluster"].tolist() == expected.tolist()
+
+    def test_models_are_cached_by_fingerprint(self) -> None:
+        """Test that re-clustering identical features reuses the fitted model."""
+        optimizer = address.HealthFacilityOptimizer(_counties())
+        optimizer.preprocess()
+        optimizer.cluster_counties(n_clusters=4)
+        model = optimizer.cluster_model
+        optimizer.cluster_counties(n_clusters=4)
+        assert optimizer.cluster_model is model
+        optimizer.counties.loc[0, "Scarcity"] += 1.0
+        optimizer.cluster_counties(n_clusters=4, warm_start=True)
+        assert optimizer.cluster_model is not model
+        assert optimizer.cluster_model.n_init == 1
+
+    def test_minibatch_backend_and_k_sweep(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test the mini-batch backend and the parallel sweep over k."""
+        optimizer.cluster_counties(n_clusters=3, method="minibatch", batch_size=8)
+        assert optimizer.counties["Cluster"].nunique() == 3
+        scores = optimizer.select_n_clusters(k_values=[2, 3, 4], n_jobs=1)
+        assert scores["n_clusters"].tolist() == [2, 3, 4]
+        assert scores["inertia"].is_monotonic_decreasing
+        assert scores["silhouette"].between(-1, 1).all()
+
+
+class TestFacilitySiting:
+    """Test suite for the lazy-greedy facility siting optimizer."""
+
+    @staticmethod
+    def _points(n: int, seed: int) -> Any:
+        import pandas as pd
+
+        rng = np.random.default_rng(seed)
+        return pd.DataFrame(
+            {
+                "Longitude": rng.uniform(36.6, 37.1, n),
+                "Latitude": rng.uniform(-1.5, -1.0, n),
+                "Population": rng.integers(1, 500, n),
+            }
+        )
+
+    def test_lazy_greedy_matches_full_greedy(self) -> None:
+        """Test that lazy evaluation picks the same sites as exhaustive greedy."""
+        demand, candidates = self._points(2000, 0), self._points(150, 1)
+        existing = self._points(5, 2)
+        siting = address.FacilitySitingOptimizer(
+            demand, candidates, existing=existing, radius_km=4
+        )
+        result = siting.solve(8)
+
+        covered = siting.covered.copy()
+        expected = []
+        for _ in range(8):
+            gains = [
+                siting.weights[idx][~covered[idx]].sum()
+                for idx in np.split(siting.indices, siting.indptr[1:-1])
+            ]
+            best = int(np.argmax(gains))
+            expected.append(best)
+            covered[np.split(siting.indices, siting.indptr[1:-1])[best]] = True
+        assert result["candidate"].tolist() == expected
+        assert result["covered_weight"].is_monotonic_increasing
+        assert result["covered_weight"].iloc[-1] == siting.weights[covered].sum()
+
+    def test_median_objective_reduces_distance(self) -> None:
+        """Test that the median objective returns positive distance reductions."""
+        siting = address.FacilitySitingOptimizer(
+            self._points(500, 3), self._points(40, 4), radius_km=10
+        )
+        result = siting.solve(5, objective="median")
+        assert len(result) == 5
+        assert result["gain"].is_monotonic_decreasing
+        assert (result["gain"] > 0).all()
+        with pytest.raises(ValueError):
+            siting.solve(1, objective="center")
+
+
+class TestFacilityDistanceMerge:
+    """Test suite for feeding nearest-facility distances into preprocess."""
+
+    def test_merged_distances_drive_accessibility(self) -> None:
+        """Test that county_stats distances replace the boundaries' column."""
+        import pandas as pd
+        from fynesse import access
+
+        counties = _counties()
+        facilities = pd.DataFrame({"Longitude": [0.5, 4.5], "Latitude": [0.5, 1.5]})
+        index = access.FacilityDistanceIndex(facilities)
+        stats = index.county_stats(counties)
+        merged = access.merge_dfs_to_gdf(counties, [stats], overwrite=True)
+        assert "Health_Facilities_distance_1" not in merged.columns
+
+        opt = address.HealthFacilityOptimizer(merged)
+        opt.preprocess()
+        expected = 1 / (stats["Health_Facilities_distance"].to_numpy() + 1)
+        np.testing.assert_allclose(opt.counties["Accessibility"], expected)
+
+
+class TestIncrementalUpdate:
+    """Test suite for incremental recomputation after row-level corrections."""
+
+    @staticmethod
+    def _pipeline(gdf: Any) -> address.HealthFacilityOptimizer:
+        opt = address.HealthFacilityOptimizer(gdf)
+        opt.preprocess()
+        opt.normalize_and_score()
+        opt.cluster_counties()
+        opt.suggest_new_facilities()
+        return opt
+
+    def _check_against_full_run(
+        self, opt: address.HealthFacilityOptimizer, gdf: Any, updates: Any
+    ) -> Any:
+        for col in updates.columns:
+            gdf.loc[updates.index, col] = updates[col]
+        full = self._pipeline(gdf)
+        for col in address.score_indicators + [
+            "Priority_Score",
+            "Suggested_New_Facilities",
+        ]:
+            np.testing.assert_allclose(
+                opt.counties[col], full.counties[col], atol=1e-12
+            )
+        np.testing.assert_array_equal(opt.counties["Cluster"], full.counties["Cluster"])
+
+    def test_row_update_within_range_rescores_rows(self) -> None:
+        """Test that an update inside the min/max range only touches its rows."""
+        import pandas as pd
+
+        gdf = _counties()
+        opt = self._pipeline(gdf)
+        counties = opt.counties
+        # Pick a county that holds no indicator extreme and nudge its facility count
+        X = counties[address.score_indicators].to_numpy()
+        interior = np.flatnonzero(
+            ((X > X.min(axis=0)) & (X < X.max(axis=0))).all(axis=1)
+        )[0]
+        label = counties.index[interior]
+        new_total = counties.loc[label, "Total_number_of_facilities"] + 1
+        updates = pd.DataFrame(
+            {"Total_number_of_facilities": [new_total]}, index=[label]
+        )
+        report = opt.update(updates)
+        assert report["indicators"] == ["Facility_Ratio"]
+        assert report["rescored"] in ("rows", "rescaled")
+        self._check_against_full_run(opt, gdf, updates)
+
+    def test_update_moving_extremes_renormalises(self) -> None:
+        """Test that an update beyond the current max triggers a global rescore."""
+        import pandas as pd
+
+        gdf = _counties()
+        opt = self._pipeline(gdf)
+        updates = pd.DataFrame(
+            {
+                "2025_Projected_Population": [50_000_000],
+                "Percentage_of_scarcity": [99.0],
+            },
+            index=[3],
+        )
+        report = opt.update(updates)
+        assert report["rescored"] == "global"
+        assert set(report["indicators"]) == {"Facility_Ratio", "Scarcity"}
+        assert opt.counties.loc[3, "Cluster"] in set(opt.counties["Cluster"])
+        self._check_against_full_run(opt, gdf, updates)
+
+    def test_large_update_refits_clusters(self) -> None:
+        """Test that Cluster matches a full run after half the counties change."""
+        import pandas as pd
+
+        gdf = _counties()
+        opt = self._pipeline(gdf)
+        rows = gdf.index[::2]
+        updates = pd.DataFrame(
+            {
+                "Population_density": gdf.loc[rows, "Population_density"].to_numpy()[
+                    ::-1
+                ]
+                * 3,
+                "Health_Facilities_distance": np.linspace(1, 60, len(rows)),
+            },
+            index=rows,
+        )
+        report = opt.update(updates)
+        assert report["reclustered"] > 0
+        self._check_against_full_run(opt, gdf, updates)
+
+    def test_unrelated_update_skips_recomputation(
+        self, optimizer: address.HealthFacilityOptimizer
+    ) -> None:
+        """Test that columns no indicator depends on trigger no recomputation."""
+        import pandas as pd
+
+        optimizer.normalize_and_score()
+        report = optimizer.update(
+            pd.DataFrame({"insurance_covered_population": [0.5]}, index=[0])
+        )
+        assert report == {
+            "rows": 1,
+            "indicators": [],
+            "rescored": None,
+            "reclustered": 0,
+        }
+        with pytest.raises(KeyError):
+            optimizer.update(pd.DataFrame({"Scarcity": [1.0]}, index=[999]))
+
+
+class TestStageMemoization:
+    """Test suite for fingerprint-based stage memoisation."""
+
+    @staticmethod
+    def _run(opt: address.HealthFacilityOptimizer) -> address.HealthFacilityOptimizer:
+        opt.preprocess()
+        opt.normalize_and_score(weights={"Scarcity": 0.4})
+        opt.cluster_counties(n_clusters=3)
+        opt.suggest_new_facilities(people_per_facility=20000)
+        return opt
+
+    def test_rerun_skips_to_cached_outputs(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a rerun on identical inputs reuses every stage's outputs."""
+        cache = address.StageCache()
+        first = self._run(
+            address.HealthFacilityOptimizer(_counties(seed=5), stage_cache=cache)
+        )
+        assert len(cache) == 4
+
+        def fail(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("stage recomputed")
+
+        monkeypatch.setattr(address, "_derive_indicators", fail)
+        monkeypatch.setattr(address, "_fit_kmeans", fail)
+        monkeypatch.setattr(address, "_additional_facilities", fail)
+        monkeypatch.setattr(address, "_normalize_indicators", fail)
+        second = self._run(
+            address.HealthFacilityOptimizer(_counties(seed=5), stage_cache=cache)
+        )
+        cols = address.score_indicators + [
+            "Priority_Score",
+            "Cluster",
+            "Suggested_New_Facilities",
+        ]
+        assert second.counties[cols].equals(first.counties[cols])
+        assert second.cluster_model is not first.cluster_model
+        assert second._score_state["raw"] is not first._score_state["raw"]
+
+    def test_changed_inputs_or_parameters_miss(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that new data or parameters recompute, and the disk store persists entries."""
+        cache = address.StageCache(directory=str(tmp_path / "stages"))
+        opt = self._run(
+            address.HealthFacilityOptimizer(_counties(seed=6), stage_cache=cache)
+        )
+        opt.suggest_new_facilities(people_per_facility=10000)
+        assert len(cache) == 5
+        changed = _counties(seed=6)
+        changed.loc[0, "Percentage_of_scarcity"] = 1.0
+        self._run(address.HealthFacilityOptimizer(changed, stage_cache=cache))
+        assert len(cache) == 8  # preprocess, score and cluster miss; suggestions hit
+
+        reloaded = address.StageCache(directory=str(tmp_path / "stages"))
+        monkeypatch.setattr(address, "_fit_kmeans", None)  # a recomputation would fail
+        fresh = self._run(
+            address.HealthFacilityOptimizer(_counties(seed=6), stage_cache=reloaded)
+        )
+        assert fresh.counties["Priority_Score"].equals(opt.counties["Priority_Score"])
+
+    def test_hits_keep_admin_columns_and_check_expected_columns(self) -> None:
+        """Test that restored columns are keyed and missing columns raise on a hit."""
+        cache = address.StageCache()
+        address.HealthFacilityOptimizer(
+            _counties(seed=7), stage_cache=cache
+        ).preprocess()
+        renamed = _counties(seed=7)
+        renamed["County"] = [f"Renamed {i}" for i in range(len(renamed))]
+        opt = address.HealthFacilityOptimizer(renamed, stage_cache=cache)
+        opt.preprocess()
+        assert opt.counties["County"].tolist() == renamed["County"].tolist()
+
+        with pytest.raises(ValueError, match="Shape_Leng"):
+            incomplete = _counties(seed=7).drop(columns="Shape_Leng")
+            address.HealthFacilityOptimizer(incomplete, stage_cache=cache).preprocess()
+
+    def test_threshold_table_hit_keeps_scalar_threshold(self) -> None:
+        """Test that a cached array-threshold call does not restore another run's threshold."""
+        cache = address.StageCache()
+        first = address.HealthFacilityOptimizer(_counties(seed=9), stage_cache=cache)
+        first.preprocess()
+        first.suggest_new_facilities(people_per_facility=30000)
+        first.suggest_new_facilities(people_per_facility=[10000, 20000])
+
+        second = address.HealthFacilityOptimizer(_counties(seed=9), stage_cache=cache)
+        second.preprocess()
+        second.suggest_new_facilities(people_per_facility=50000)
+        second.suggest_new_facilities(people_per_facility=[10000, 20000])
+        assert second._people_per_facility == 50000
+
+        expected = second.counties["Suggested_New_Facilities"].copy()
+        second.update(second.counties[["Percentage_of_scarcity"]].iloc[:2])
+        assert second.counties["Suggested_New_Facilities"].equals(expected)
+
+    def test_memoisation_is_opt_in(self) -> None:
+        """Test that optimizers only memoise when given a cache or stage_cache=True."""
+        assert address.HealthFacilityOptimizer(_counties()).stage_cache is None
+        opt = address.HealthFacilityOptimizer(_counties(), stage_cache=True)
+        assert opt.stage_cache is address.default_stage_cache
+
+    def test_stores_are_bounded_by_bytes(self, tmp_path: Path) -> None:
+        """Test that the least recently used entries are evicted beyond max_bytes."""
+        entry = {"columns": {}, "attrs": {}, "result": np.zeros(1000)}
+        size = len(pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+        cache = address.StageCache(max_bytes=2 * size)
+        cache.put("a", entry)
+        cache.put("b", entry)
+        assert cache.get("a") is not None  # "b" is now least recently used
+        cache.put("c", entry)
+        assert len(cache) == 2 and cache.size() == 2 * size
+        assert cache.get("b") is None
+
+        restored = cache.get("a")
+        assert restored is not None
+        restored["result"][0] = 1.0
+        assert cache.get("a")["result"][0] == 0.0  # type: ignore[index]
+
+        disk = address.StageCache(max_bytes=2 * size, directory=str(tmp_path))
+        for age, key in enumerate(("c", "b", "a")):
+            disk.put(key, entry)
+            os.utime(tmp_path / f"{key}.pkl", (age, age))
+        assert sorted(os.listdir(tmp_path)) == ["a.pkl", "b.pkl"]
+
+    def test_warm_start_is_keyed_by_previous_centroids(self) -> None:
+        """Test that warm-started clustering from different prior fits does not share entries."""
+        cache = address.StageCache()
+        results = []
+        for k in (2, 3):
+            opt = address.HealthFacilityOptimizer(_counties(seed=8), stage_cache=cache)
+            opt.preprocess()
+            opt.cluster_counties(n_clusters=k)
+            previous = opt.cluster_model
+            opt.cluster_counties(n_clusters=3, warm_start=True)
+            results.append((previous, opt.cluster_model))
+        # A fresh start for k=2; the k=3 run starts from its own previous centroids
+        assert results[0][1].n_init == 10
+        assert results[1][1].n_init == 1
+        np.testing.assert_array_equal(
+            results[1][1].init, results[1][0].cluster_centers_
+        )
+
+
+class TestCompactMode:
+    """Test suite for the compact typed mode and per-stage memory report."""
+
+    @staticmethod
+    def _run(gdf: Any, **kwargs: Any) -> address.HealthFacilityOptimizer:
+        opt = address.HealthFacilityOptimizer(gdf, **kwargs)
+        opt.preprocess()
+        opt.normalize_and_score()
+        opt.cluster_counties(n_clusters=3)
+        opt.suggest_new_facilities()
+        return opt
+
+    def test_compact_dtypes_and_input_untouched(self) -> None:
+        """Test that compact mode stores 32-bit numbers and categoricals, input left intact."""
+        import pandas as pd
+
+        gdf = _counties(n=30, seed=7)
+        before = gdf.copy()
+        opt = self._run(gdf, compact=True)
+        assert opt.counties["Total_number_of_facilities"].dtype == np.int32
+        assert opt.counties["Facility_Ratio"].dtype == np.float32
+        assert opt.counties["Priority_Score"].dtype == np.float32
+        assert isinstance(opt.counties["ADM0_EN"].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(pd.DataFrame(gdf), pd.DataFrame(before))
+
+    def test_compact_matches_full_precision(self) -> None:
+        """Test that compact scores and suggestions agree with the float64 path."""
+        full = self._run(_counties(n=30, seed=7))
+        compact = self._run(_counties(n=30, seed=7), compact=True)
+        np.testing.assert_allclose(
+            compact.counties["Priority_Score"],
+            full.counties["Priority_Score"],
+            atol=1e-5,
+        )
+        np.testing.assert_array_equal(
+            compact.counties["Suggested_New_Facilities"],
+            full.counties["Suggested_New_Facilities"],
+        )
+
+    def test_memory_report_per_stage(self) -> None:
+        """Test that every stage is recorded and compact mode uses less memory."""
+        full = self._run(_counties(n=200, seed=8), report_memory=True)
+        compact = self._run(_counties(n=200, seed=8), compact=True)
+        stages = [r["stage"] for r in compact.memory_report]
+        assert stages == [
+            "init",
+            "preprocess",
+            "normalize_and_score",
+            "cluster_counties",
+            "suggest_new_facilities",
+        ]
+        assert compact.memory_report[-1]["bytes"] < full.memory_report[-1]["bytes"]
+        assert self._run(_counties(n=5), compact=False).memory_report == []
+
+    def test_update_keeps_compact_dtypes(self) -> None:
+        """Test that incremental updates write through without upcasting columns."""
+        import pandas as pd
+
+        opt = self._run(_counties(n=30, seed=9), compact=True)
+        opt.update(pd.DataFrame({"Health_Facilities_distance": [3.5]}, index=[4]))
+        assert opt.counties["Accessibility"].dtype == np.float32
+        assert opt.counties["Priority_Score"].dtype == np.float32
+        assert opt.counties.loc[4, "Accessibility"] == pytest.approx(1 / 4.5)
+        assert opt.counties["Suggested_New_Facilities"].dtype == np.int32
+        opt.update(pd.DataFrame({"2025_Projected_Population": [9_000_000]}, index=[4]))
+        assert opt.counties["Suggested_New_Facilities"].dtype == np.int32
+        assert opt.counties.loc[4, "Suggested_New_Facilities"] == max(
+            0, 300 - opt.counties.loc[4, "Total_number_of_facilities"]
+        )
+
+    def test_whole_number_inputs_still_take_fractional_updates(self) -> None:
+        """Test that only counts become int32 and updates are never truncated."""
+        import pandas as pd
+
+        gdf = _counties(n=30, seed=9)
+        for col in ["Percentage_of_scarcity", "Health_Facilities_distance"]:
+            gdf[col] = np.round(gdf[col].fillna(10))
+        opt = self._run(gdf, compact=True)
+        assert opt.counties["Percentage_of_scarcity"].dtype == np.float32
+        assert opt.counties["Scarcity"].dtype == np.float32
+        updates = pd.DataFrame(
+            {
+                "Percentage_of_scarcity": [12.7],
+                "Health_Facilities_distance": [3.6],
+                "LowStaff_Facilities": [2.5],
+            },
+            index=[4],
+        )
+        opt.update(updates)
+        row = opt.counties.loc[4]
+        assert row["Scarcity"] == pytest.approx(12.7)
+        assert row["Accessibility"] == pytest.approx(1 / 4.6)
+        assert row["LowStaff_Facilities"] == 2.5
+        assert opt.counties["LowStaff_Facilities"].dtype == np.float32
+
+
+class TestHeadlessPlots:
+    """Test suite for headless priority maps and scenario export."""
+
+    def test_plot_priority_writes_files(
+        self, optimizer: address.HealthFacilityOptimizer, tmp_path: Path
+    ) -> None:
+        """Test that plot_priority renders both figures without displaying them."""
+        optimizer.normalize_and_score()
+        optimizer.cluster_counties(n_clusters=3)
+        optimizer.suggest_new_facilities()
+        figures = optimizer.plot_priority(
+            show=False,
+            path=str(tmp_path / "priority.png"),
+            html_path=str(tmp_path / "priority.html"),
+        )
+        assert figures is not None
+        fig, map_fig = figures
+        assert len(fig.axes) >= 2
+        assert (tmp_path / "priority.png").read_bytes()[:4] == b"\x89PNG"
+        assert "plotly" in (tmp_path / "priority.html").read_text()
+        assert len(map_fig.data[0].locations) == len(optimizer.counties)
+
+    def test_export_scenario_maps(
+        self, optimizer: address.HealthFacilityOptimizer, tmp_path: Path
+    ) -> None:
+        """Test that every weighting scenario is written, named by the weights' index."""
+        import pandas as pd
+
+        weights = pd.DataFrame(
+            [address.default_weights, {**address.default_weights, "Scarcity": 0.6}],
+            index=["baseline", "scarcity heavy"],
+        )
+        paths = optimizer.export_scenario_maps(
+            weights, str(tmp_path), fmt="svg", max_workers=2
+        )
+        assert list(paths) == ["baseline", "scarcity heavy"]
+        assert paths["scarcity heavy"].endswith("scarcity_heavy.svg")
+        for path in paths.values():
+            with open(path) as f:
+                assert "<svg" in f.read()
@@ -9,6 +9,9 @@ This module tests data assessment functionality including:
 - Visualization for assessment
 """
 
+from pathlib import Path
+from typing import Any
+
 import pytest
 from fynesse import assess
 
@@ -118,3 +121,326 @@ class TestAssessUserInteraction:
         """Test interface for user data verification."""
         # Template test - would test actual verification interface in real implementation
         pass
+
+
+class TestCleanCountyNames:
+    """Test suite for county-name canonicalisation."""
+
+    def test_known_variants_are_canonicalised(self) -> None:
+        """Test that punctuation, case and quote variants map to canonical names."""
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "County": [
+                    "Murang’a",
+                    "Taita/Taveta",
+                    "THARAKA NITHI",
+                    "Nairobi City",
+                    "HomaBay",
+                ],
+                "value": range(5),
+            }
+        )
+        cleaned = assess.clean_county_names(df)
+        assert cleaned["County"].tolist() == [
+            "Murang'a",
+            "Taita Taveta",
+            "Tharaka-Nithi",
+            "Nairobi",
+            "Homa Bay",
+        ]
+        assert cleaned["County"].dtype == assess.county_dtype
+        assert df["County"].iloc[0] == "Murang’a"
+
+    def test_county_suffix_is_ignored(self) -> None:
+        """Test that "<Name> County" and "<Name> City County" spellings match."""
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "County": [
+                    "Kisumu County",
+                    "Nairobi City County",
+                    "ELGEYO/MARAKWET COUNTY",
+                    "County",
+                ]
+            }
+        )
+        cleaned, dropped = assess.clean_county_names(
+            df, fuzzy=False, return_dropped=True
+        )
+        assert cleaned["County"].tolist() == ["Kisumu", "Nairobi", "Elgeyo-Marakwet"]
+        assert dropped["County"].tolist() == ["County"]
+
+    def test_fuzzy_fallback_and_dropped_report(self) -> None:
+        """Test that near-misses are matched and unmatched rows are reported."""
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {"County": ["Kakamegga", "Total", None, "Nakuru"], "value": range(4)}
+        )
+        cleaned, dropped = assess.clean_county_names(df, return_dropped=True)
+        assert cleaned["County"].tolist() == ["Kakamega", "Nakuru"]
+        assert dropped["value"].tolist() == [1, 2]
+
+        strict = assess.clean_county_names(df, fuzzy=False)
+        assert strict["County"].tolist() == ["Nakuru"]
+
+    def test_categories_are_shared(self) -> None:
+        """Test that separately cleaned frames share category codes."""
+        import pandas as pd
+
+        a = assess.clean_county_names(pd.DataFrame({"County": ["Kisumu", "Lamu"]}))
+        b = assess.clean_county_names(pd.DataFrame({"County": ["lamu"]}))
+        assert a["County"].cat.categories.equals(b["County"].cat.categories)
+        assert a["County"].cat.codes.iloc[1] == b["County"].cat.codes.iloc[0]
+
+
+class TestAssignFacilitiesToCounties:
+    """Test suite for bulk point-in-polygon assignment of facilities."""
+
+    def test_assignment_and_report(self) -> None:
+        """Test that facilities are located and bad labels are reported."""
+        import geopandas as gpd
+        import pandas as pd
+        from shapely.geometry import box
+
+        counties = gpd.GeoDataFrame(
+            {"County": ["Nairobi", "Kiambu"]},
+            geometry=[box(36.6, -1.45, 37.1, -1.15), box(36.6, -1.15, 37.1, -0.75)],
+            crs="EPSG:4326",
+        )
+        facilities = pd.DataFrame(
+            {
+                "County": ["Nairobi City", "Nairobi", "Kiambu", "Kiambu"],
+                "Longitude": [36.8, 36.9, 36.7, 40.0],
+                "Latitude": [-1.3, -1.0, -1.0, 0.0],
+            }
+        )
+        assigned, report = assess.assign_facilities_to_counties(
+            facilities, counties, chunk_size=3
+        )
+        assert assigned["County_spatial"].tolist()[:3] == [
+            "Nairobi",
+            "Kiambu",
+            "Kiambu",
+        ]
+        assert pd.isna(assigned["County_spatial"].iloc[3])
+        assert report.index.tolist() == [1, 3]
+        assert report["issue"].tolist() == ["mismatch", "outside"]
+        assert report["label"].tolist() == ["Nairobi", "Kiambu"]
+
+
+class TestHeadlessExport:
+    """Test suite for headless rendering and parallel batch export of plots."""
+
+    @staticmethod
+    def _gdf() -> Any:
+        import geopandas as gpd
+        import numpy as np
+        from shapely.geometry import box
+
+        rng = np.random.default_rng(0)
+        return gpd.GeoDataFrame(
+            {
+                "County": [f"County {i}" for i in range(6)],
+                "Population_density": rng.uniform(5, 6000, 6),
+                "Ever_got_underage_pregnancy(%)": rng.uniform(0, 40, 6),
+            },
+            geometry=[box(i, 0, i + 1, 1) for i in range(6)],
+            crs="EPSG:4326",
+        )
+
+    def test_headless_plot_saves_without_pyplot(self, tmp_path: Path) -> None:
+        """Test that show=False renders to a file and leaves pyplot untouched."""
+        import matplotlib.pyplot as plt
+
+        before = plt.get_fignums()
+        for plot_type in ("bar", "hist", "map"):
+            path = tmp_path / f"{plot_type}.svg"
+            fig = assess.plot_gdf_column(
+                self._gdf(),
+                "Population_density",
+                plot_type=plot_type,
+                show=False,
+                path=str(path),
+            )
+            assert path.read_text().lstrip().startswith("<?xml")
+            assert (
+                fig.axes[0].get_title() == "Population_density distribution by County"
+            )
+        fig = assess.plot_gdf_correlation(
+            self._gdf(), show=False, path=str(tmp_path / "corr.png")
+        )
+        assert (tmp_path / "corr.png").read_bytes()[:4] == b"\x89PNG"
+        assert plt.get_fignums() == before
+
+    def test_shown_plots_return_none(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that shown figures are not also returned for notebooks to render again."""
+        import matplotlib.pyplot as plt
+
+        shown = []
+        monkeypatch.setattr(plt, "show", lambda: shown.append(True))
+        assert assess.plot_gdf_column(self._gdf(), "Population_density") is None
+        assert assess.plot_gdf_correlation(self._gdf()) is None
+        assert len(shown) == 2
+        plt.close("all")
+
+    def test_batch_export_across_processes(self, tmp_path: Path) -> None:
+        """Test that a batch export writes one file per column from a process pool."""
+        columns = ["Population_density", "Ever_got_underage_pregnancy(%)"]
+        paths = assess.export_gdf_columns(
+            self._gdf(),
+            columns,
+            str(tmp_path / "report"),
+            plot_type="map",
+            max_workers=2,
+        )
+        assert list(paths) == columns
+        assert paths[columns[1]].endswith("Ever_got_underage_pregnancy.png")
+        for path in paths.values():
+            with open(path, "rb") as f:
+                assert f.read(4) == b"\x89PNG"
+        with pytest.raises(ValueError, match="not found"):
+            assess.export_gdf_columns(self._gdf(), ["Missing"], str(tmp_path))
+
+
+class TestSpatialAutocorrelation:
+    """Test suite for sparse spatial weights, Moran's I and LISA."""
+
+    @staticmethod
+    def _grid(values: Any) -> Any:
+        import geopandas as gpd
+        import numpy as np
+        from shapely.geometry import box
+
+        values = np.asarray(values, dtype=float)
+        rows, cols = values.shape
+        return gpd.GeoDataFrame(
+            {"value": values.ravel()},
+            geometry=[
+                box(j, i, j + 1, i + 1) for i in range(rows) for j in range(cols)
+            ],
+        )
+
+    def test_weights_from_spatial_index(self) -> None:
+        """Test queen, rook and k-NN neighbour counts on a 3 x 3 grid."""
+        import numpy as np
+
+        gdf = self._grid(np.zeros((3, 3)))
+        queen = assess.spatial_weights(gdf, row_standardize=False)
+        assert queen.format == "csr"
+        assert np.diff(queen.indptr).tolist() == [3, 5, 3, 5, 8, 5, 3, 5, 3]
+        rook = assess.spatial_weights(gdf, method="rook")
+        assert np.diff(rook.indptr).tolist() == [2, 3, 2, 3, 4, 3, 2, 3, 2]
+        np.testing.assert_allclose(np.asarray(rook.sum(axis=1)).ravel(), 1.0)
+        knn = assess.spatial_weights(gdf, method="knn", k=2)
+        assert (np.diff(knn.indptr) == 2).all()
+        assert 4 not in knn[4].indices
+        with pytest.raises(ValueError, match="method"):
+            assess.spatial_weights(gdf, method="distance")
+
+    def test_global_morans_i(self) -> None:
+        """Test Moran's I against the dense formula and its sign on known patterns."""
+        import numpy as np
+
+        gradient = self._grid(np.add.outer(np.arange(8), np.arange(8)))
+        w = assess.spatial_weights(gradient, method="rook")
+        z = gradient["value"].to_numpy() - gradient["value"].mean()
+        dense = w.toarray()
+        expected = len(z) / dense.sum() * (z @ dense @ z) / (z @ z)
+        result = assess.morans_i(
+            gradient, "value", weights=w, permutations=199, block_size=50
+        )
+        assert result["I"] == pytest.approx(expected)
+        assert result["p_sim"] == pytest.approx(1 / 200)
+
+        checkerboard = self._grid(np.indices((8, 8)).sum(axis=0) % 2)
+        result = assess.morans_i(
+            checkerboard, "value", weights=assess.spatial_weights(checkerboard, "rook")
+        )
+        assert result["I"] == pytest.approx(-1.0)
+        assert result["p_sim"] == pytest.approx(0.001)
+
+    def test_local_morans_finds_hot_spot(self) -> None:
+        """Test that LISA flags a high-value corner as a significant HH cluster."""
+        import numpy as np
+
+        values = np.random.default_rng(0).normal(0, 1, (12, 12))
+        values[:3, :3] += 10
+        gdf = self._grid(values)
+        lisa = assess.local_morans(gdf, "value", permutations=499, block_size=7)
+        w = assess.spatial_weights(gdf)
+        z = gdf["value"].to_numpy() - gdf["value"].mean()
+        np.testing.assert_allclose(lisa["I"], z * (w @ z) / (z @ z / len(z)))
+        hot = lisa.loc[[0, 1, 12, 13]]
+        assert (hot["quadrant"] == "HH").all() and hot["significant"].all()
+        assert lisa["significant"].mean() < 0.3
+        with pytest.raises(ValueError, match="missing"):
+            assess.local_morans(gdf.assign(value=np.nan), "value")
+
+
+class TestCorrelationEngine:
+    """Test suite for the blocked float32 correlation engine."""
+
+    @staticmethod
+    def _frame() -> Any:
+        import numpy as np
+        import pandas as pd
+
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(
+            rng.normal(size=(150, 12)) * 1e6 + 5e6, columns=[f"c{i}" for i in range(12)]
+        )
+        df["c1"] = df["c0"] * 2 + rng.normal(size=150) * 1e5
+        df["c5"] = -df["c4"] + rng.normal(size=150) * 4e5
+        return df.mask(rng.random(df.shape) < 0.2)
+
+    def test_matches_pandas_pairwise_complete(self) -> None:
+        """Test blocked float32 Pearson against pandas, with scipy p-values."""
+        import numpy as np
+        from scipy import stats
+
+        df = self._frame()
+        corr, pvalues, counts = assess.correlation_matrix(
+            df, block_size=5, return_pvalues=True
+        )
+        assert corr.dtypes.eq(np.float32).all()
+        np.testing.assert_allclose(corr, df.corr(), atol=1e-5)
+        pair = df[["c2", "c7"]].dropna()
+        assert counts.loc["c2", "c7"] == len(pair)
+        assert pvalues.loc["c2", "c7"] == pytest.approx(
+            stats.pearsonr(pair["c2"], pair["c7"])[1], rel=1e-3
+        )
+        full = self._frame().dropna()
+        np.testing.assert_allclose(
+            assess.correlation_matrix(full, method="spearman"),
+            full.corr(method="spearman"),
+            atol=1e-5,
+        )
+        # Pairs missing different rows are re-ranked over their common rows
+        np.testing.assert_allclose(
+            assess.correlation_matrix(df, method="spearman", block_size=5),
+            df.corr(method="spearman"),
+            atol=1e-5,
+        )
+        with pytest.raises(ValueError, match="method"):
+            assess.correlation_matrix(df, method="kendall")
+
+    def test_top_correlations(self) -> None:
+        """Test that the strongest pairs are found across block boundaries."""
+        top = assess.top_correlations(self._frame(), k=2, block_size=3)
+        assert [tuple(sorted(p)) for p in top[["a", "b"]].to_numpy()] == [
+            ("c0", "c1"),
+            ("c4", "c5"),
+        ]
+        assert top["r"].iloc[0] > 0.99 and top["r"].iloc[1] < -0.8
+        assert (top["p_value"] < 1e-6).all()
+
+    def test_heatmap_draws_reduced_clustered_matrix(self) -> None:
+        """Test that the heatmap keeps max_columns columns with correlated pairs adjacent."""
+        fig = assess.plot_gdf_correlation(self._frame(), show=False, max_columns=4)
+        labels = [t.get_text() for t in fig.axes[0].get_xticklabels()]
+        assert sorted(labels) == ["c0", "c1", "c4", "c5"]
+        assert abs(labels.index("c0") - labels.index("c1")) == 1
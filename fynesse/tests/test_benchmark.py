@@ -0,0 +1,94 @@
+"""
+Tests for the benchmark module of the fynesse framework.
+
+This module tests the benchmark suite including:
+- The deterministic synthetic geo-dataset generator
+- Offline stage timing
+- Baseline comparison and regression flagging
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from fynesse import benchmark
+
+
+class TestSyntheticData:
+    """Test suite for the synthetic county generator."""
+
+    def test_generator_is_deterministic_and_complete(self) -> None:
+        """Test that equal seeds give equal frames with every column preprocess expects."""
+        import shapely
+        from fynesse import address, assess
+
+        gdf = benchmark.synthetic_counties(200, seed=3)
+        assert gdf.equals(benchmark.synthetic_counties(200, seed=3))
+        assert not gdf.equals(benchmark.synthetic_counties(200, seed=4))
+        assert len(gdf) == 200 and gdf["County"].is_unique
+        assert shapely.coverage_is_valid(gdf.geometry.to_numpy())
+        assert shapely.area(gdf.geometry.to_numpy()).sum() == pytest.approx(
+            shapely.box(*benchmark.KENYA_BOUNDS).area
+        )
+        assert (shapely.get_num_coordinates(gdf.geometry.to_numpy()) > 20).all()
+        assert list(benchmark.synthetic_counties(47)["County"]) == assess.valid_counties
+
+        opt = address.HealthFacilityOptimizer(gdf)
+        opt.preprocess()
+        assert opt.counties[address.score_indicators].notna().all().all()
+
+    def test_messy_labels_clean_back(self) -> None:
+        """Test that the generated labels are messy but map back to valid counties."""
+        from fynesse import assess
+
+        labels = benchmark.synthetic_county_labels(500, seed=1)
+        assert labels.isin(assess.valid_counties).mean() < 0.5
+        cleaned, dropped = assess.clean_county_names(
+            labels.to_frame(), return_dropped=True
+        )
+        assert len(cleaned) == 500 and dropped.empty
+
+
+class TestBenchmarkRun:
+    """Test suite for offline benchmark runs and baseline comparison."""
+
+    def test_run_and_compare(self, tmp_path: Path) -> None:
+        """Test a small offline run, its JSON round trip and regression flagging."""
+        result = benchmark.run_benchmarks(
+            sizes=[47],
+            stages=["load", "merge", "preprocess", "optimizer"],
+            repeat=1,
+            workdir=str(tmp_path),
+        )
+        assert set(result["results"]["47"]) == {
+            "load",
+            "merge",
+            "preprocess",
+            "optimizer",
+        }
+        assert all(r["wall_s"] > 0 for r in result["results"]["47"].values())
+        baseline = json.loads(json.dumps(result))
+
+        slower = json.loads(json.dumps(result))
+        slower["results"]["47"]["merge"]["wall_s"] = max(
+            1.0, 2 * baseline["results"]["47"]["merge"]["wall_s"]
+        )
+        comparison = benchmark.compare_to_baseline(slower, baseline, threshold=0.25)
+        assert comparison.loc[0, "stage"] == "merge" and comparison.loc[0, "regression"]
+        assert comparison["regression"].sum() == 1
+        assert not benchmark.compare_to_baseline(result, baseline)["regression"].any()
+        with pytest.raises(ValueError, match="Unknown stages"):
+            benchmark.run_benchmarks(sizes=[47], stages=["fly"])
+
+    def test_cli_exit_status(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that the command line writes a baseline and fails on a regression."""
+        base = tmp_path / "baseline.json"
+        args = ["--sizes", "47", "--stages", "render", "--repeat", "1"]
+        assert benchmark.main(args + ["--output", str(base)]) == 0
+        data = json.loads(base.read_text())
+        data["results"]["47"]["render"]["wall_s"] /= 10
+        base.write_text(json.dumps(data))
+        assert benchmark.main(args + ["--baseline", str(base)]) == 1
+        assert "regressed" in capsys.readouterr().err
@@ -0,0 +1,113 @@
+"""
+Tests for the profiling module of the fynesse framework.
+
+This module tests stage instrumentation including:
+- Wall time, CPU time, peak memory and frame size records
+- Zero recording while disabled
+- JSON and Chrome-trace export
+"""
+
+import json
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+import pytest
+from fynesse import assess, profiling
+
+
+@pytest.fixture
+def recorder(monkeypatch: pytest.MonkeyPatch) -> Iterator[profiling.Profiler]:
+    """A fresh, enabled profiler installed as the shared one."""
+    prof = profiling.Profiler(enabled=True)
+    monkeypatch.setattr(profiling, "profiler", prof)
+    yield prof
+    prof.disable()
+
+
+class TestProfiler:
+    """Test suite for the stage profiler."""
+
+    def test_stage_records_time_memory_and_shape(self) -> None:
+        """Test that a stage records timings, its own peak memory and the frame size."""
+        import pandas as pd
+
+        prof = profiling.Profiler(enabled=True)
+        try:
+            with prof.stage("outer") as outer:
+                with prof.stage("inner", frame=pd.DataFrame({"a": range(5), "b": 0})):
+                    block = np.ones(2_000_000)  # 16 MB
+                    del block
+                assert outer is not None
+                outer["rows"], outer["cols"] = 7, 1
+        finally:
+            prof.disable()
+        inner, outer = prof.records
+        assert (inner["name"], inner["rows"], inner["cols"], inner["depth"]) == (
+            "inner",
+            5,
+            2,
+            1,
+        )
+        assert inner["peak_bytes"] >= 16_000_000
+        assert outer["peak_bytes"] >= inner["peak_bytes"]
+        assert outer["wall_s"] >= inner["wall_s"] >= 0 and outer["cpu_s"] >= 0
+        assert (outer["rows"], outer["depth"]) == (7, 0)
+
+    def test_disabled_records_nothing(self) -> None:
+        """Test that profiled functions run untouched while profiling is off."""
+        assert not profiling.profiler.enabled
+        calls: List[int] = []
+
+        @profiling.profiled()
+        def work(x: int) -> int:
+            calls.append(x)
+            return x * 2
+
+        assert work(3) == 6 and calls == [3]
+        assert profiling.profiler.records == []
+        prof = profiling.Profiler()
+        with prof.stage("off") as record:
+            assert record is None
+        assert prof.records == []
+
+    def test_pipeline_stages_are_instrumented(
+        self, recorder: profiling.Profiler
+    ) -> None:
+        """Test that cleaning and optimizer stages are recorded with their frame sizes."""
+        from fynesse import address
+        from fynesse.tests.test_address import _counties
+
+        cleaned = assess.clean_county_names(
+            _counties(n=4).assign(County=["Nairobi City", "Kisumu", "Lamu", "Meru"])
+        )
+        opt = address.HealthFacilityOptimizer(cleaned)
+        opt.preprocess()
+        opt.normalize_and_score()
+        names = [r["name"] for r in recorder.records]
+        assert names == [
+            "clean_county_names",
+            "HealthFacilityOptimizer.preprocess",
+            "HealthFacilityOptimizer.normalize_and_score",
+        ]
+        assert recorder.records[0]["rows"] == 4
+        assert recorder.records[-1]["cols"] == len(opt.counties.columns)
+        summary = recorder.summary()
+        assert list(summary["name"]) == names
+
+    def test_exports(self, recorder: profiling.Profiler, tmp_path: Path) -> None:
+        """Test JSON and Chrome-trace exports."""
+
+        @profiling.profiled("custom.stage")
+        def work() -> np.ndarray:
+            return np.zeros((3, 4))
+
+        work()
+        data = json.loads(recorder.to_json())
+        assert data["records"][0]["name"] == "custom.stage"
+        path = recorder.to_chrome_trace(str(tmp_path / "run.trace.json"))
+        with open(path) as f:
+            event = json.load(f)["traceEvents"][0]
+        assert event["ph"] == "X" and event["cat"] == "custom"
+        assert event["args"]["rows"] == 3 and event["args"]["cols"] == 4
+        assert event["dur"] >= 0